@@ -1,10 +1,15 @@
 # Assuming you have not changed the general structure of the template no modification is needed in this file.
+import os
+
 from . import commands
+from . import config
 from .lib import fusion360utils as futil
 
 
 def run(context):
     try:
+        futil.start_logging()
+
         # This will run the start function in each of your commands as defined in commands/__init__.py
         commands.start()
 
@@ -20,5 +25,12 @@ def stop(context):
         # This will run the start function in each of your commands as defined in commands/__init__.py
         commands.stop()
 
+        # Keep the trace of this session for the analysis of slow dialogs.
+        if config.TRACE_ENABLED and config.TRACE_EXPORT_PATH:
+            os.makedirs(os.path.dirname(config.TRACE_EXPORT_PATH), exist_ok=True)
+            futil.get_recorder().export(config.TRACE_EXPORT_PATH)
+
+        futil.stop_logging()
+
     except:
         futil.handle_error('stop')
\ No newline at end of file
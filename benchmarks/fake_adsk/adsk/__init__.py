@@ -0,0 +1,7 @@
+"""In-process stand-in for the Fusion 360 Python API.
+
+Only the members used by the add-in are implemented. Put the fake_adsk folder in front
+of sys.path to import it as adsk, see benchmarks/handler_latency.py.
+"""
+
+from . import core, fusion
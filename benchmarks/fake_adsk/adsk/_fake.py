@@ -0,0 +1,163 @@
+"""Bookkeeping shared by the fake adsk.core and adsk.fusion modules.
+
+Every public attribute read, attribute write and method call on a fake API object is
+recorded in the global ledger together with a simulated cost in milliseconds. Costs
+approximate the relative expense of the real Fusion calls: feature creation and timeline
+recomputes are expensive, plain property access is cheap. The absolute numbers are not
+meant to predict Fusion timings, only to make changes in API traffic comparable.
+"""
+
+from __future__ import annotations
+
+import collections
+import re
+import math
+import sys
+
+# Simulated cost in milliseconds of a single access to a member, keyed by "Class.member".
+# Members not listed cost DEFAULT_COST.
+DEFAULT_COST = 0.005
+COSTS = {
+    'Sketches.add': 2.0,
+    'SketchLines.addByTwoPoints': 0.2,
+    'SketchArcs.addByCenterStartEnd': 0.2,
+    'Sketch.project': 0.5,
+    'GeometricConstraints.addTangent': 0.3,
+    'GeometricConstraints.addCoincident': 0.3,
+    'GeometricConstraints.addCollinear': 0.3,
+    'GeometricConstraints.addEqual': 0.3,
+    'GeometricConstraints.addHorizontalPoints': 0.3,
+    'SketchDimensions.addAngularDimension': 0.5,
+    'SketchDimensions.addDistanceDimension': 0.5,
+    'ExtrudeFeatures.add': 20.0,
+    'RevolveFeatures.add': 25.0,
+    'RectangularPatternFeatures.add': 10.0,
+    'CircularPatternFeatures.add': 10.0,
+    'CombineFeatures.add': 15.0,
+    'BaseFeatures.add': 5.0,
+    'BRepBodies.add': 5.0,
+    'Design.findAttributes': 0.05,
+    'Attributes.add': 0.05,
+    'UserParameters.add': 1.0,
+    'UserParameter.deleteMe': 1.0,
+}
+
+# Additional simulated cost per pattern instance, per combine tool body, per entity
+# visited by an attribute search and per timeline item visited by a recompute.
+COST_PER_PATTERN_INSTANCE = 5.0
+COST_PER_COMBINE_TOOL = 10.0
+COST_PER_ATTRIBUTE_SCAN = 0.002
+COST_PER_RECOMPUTED_FEATURE = 0.5
+# Simulated cost of a transient B-rep boolean per lump of its operands.
+COST_PER_BOOLEAN_LUMP = 0.05
+# Simulated cost of uploading one custom graphics vertex.
+COST_PER_GRAPHICS_VERTEX = 0.0001
+# Simulated cost of writing one entity of the design to an export file.
+COST_PER_EXPORTED_ENTITY = 0.1
+
+# Internal calls are the operations recorded with Ledger.charge and the members the fake
+# modules access on their own objects.
+Call = collections.namedtuple('Call', 'name cost internal', defaults=(False,))
+
+
+class Ledger:
+    """Records the API calls made through the fake adsk modules."""
+
+    def __init__(self):
+        self.calls = []
+        self.enabled = True
+
+    def record(self, name: str, cost: float = None, internal: bool = False):
+        if self.enabled:
+            self.calls.append(Call(name, COSTS.get(name, DEFAULT_COST) if cost is None else cost, internal))
+
+    def charge(self, name: str, cost: float):
+        """Records an internal operation such as a recompute that has no public member of its own."""
+        self.record(name, cost, True)
+
+    def mark(self) -> int:
+        return len(self.calls)
+
+    def since(self, mark: int) -> list:
+        return self.calls[mark:]
+
+    def clear(self):
+        self.calls = []
+
+
+ledger = Ledger()
+
+
+class ApiObject:
+    """Base class of all fake API objects. Public member access is recorded in the ledger.
+
+    Members the fake modules access on their own objects are recorded as internal calls.
+    """
+
+    def __getattribute__(self, name):
+        if not name.startswith('_'):
+            ledger.record(f'{type(self).__name__}.{name}', internal=_called_by_fake())
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        # Attributes assigned for the first time are set up by the constructor and not recorded.
+        if not name.startswith('_') and (name in self.__dict__ or hasattr(type(self), name)):
+            ledger.record(f'{type(self).__name__}.{name}', internal=_called_by_fake())
+        object.__setattr__(self, name, value)
+
+
+def _called_by_fake() -> bool:
+    # The caller of the attribute hook that called this function.
+    return sys._getframe(2).f_globals.get('__name__', '').startswith('adsk')
+
+
+# Conversion factors of the units understood by the expression evaluator to Fusion's
+# internal units (cm and radians).
+UNITS = {
+    'um': 1e-4,
+    'mm': 0.1,
+    'cm': 1.0,
+    'm': 100.0,
+    'in': 2.54,
+    'deg': math.pi/180,
+    'degree': math.pi/180,
+    'degrees': math.pi/180,
+    'rad': 1.0,
+    '': 1.0,
+}
+
+_TOKEN = re.compile(r'(?P<number>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)\s*(?P<unit>[A-Za-z_]\w*)?|(?P<name>[A-Za-z_]\w*)|(?P<other>\S)')
+
+
+def evaluate(expression: str, unit: str = '', parameters: dict = None) -> float:
+    """Evaluates a Fusion value expression such as "3 mm", "90 - Texture_flank_angle" or "Texture_period".
+
+    Numbers without a unit are interpreted in the given default unit, names are looked up
+    in parameters, a mapping from parameter name to value in internal units.
+    Circular references between parameters are not detected.
+    """
+    parameters = parameters or {}
+    default_factor = UNITS.get(unit, 1.0)
+    parts = []
+    for match in _TOKEN.finditer(str(expression)):
+        if match.group('number') is not None:
+            suffix = match.group('unit')
+            if suffix is not None and suffix in UNITS:
+                parts.append(f'({match.group("number")}*{UNITS[suffix]!r})')
+            else:
+                parts.append(f'({match.group("number")}*{default_factor!r})')
+                if suffix is not None:
+                    parts.append('*' + repr(_lookup(suffix, parameters)))
+        elif match.group('name') is not None:
+            parts.append(repr(_lookup(match.group('name'), parameters)))
+        else:
+            parts.append(match.group('other'))
+    return float(eval(''.join(parts), {'__builtins__': {}}, {}))
+
+
+def _lookup(name: str, parameters: dict) -> float:
+    if name in parameters:
+        return parameters[name]
+    if name in UNITS:
+        return UNITS[name]
+    raise ValueError(f'Unknown name in expression: {name}')
@@ -0,0 +1,824 @@
+"""Fake of the parts of adsk.core used by the add-in."""
+
+from __future__ import annotations
+
+import math
+import queue
+
+from ._fake import ApiObject, evaluate, ledger
+
+
+class LogLevels:
+    InfoLogLevel = 0
+    WarningLogLevel = 1
+    ErrorLogLevel = 2
+
+
+class LogTypes:
+    ConsoleLogType = 0
+    FileLogType = 1
+
+
+class DropDownStyles:
+    LabeledIconDropDownStyle = 0
+    TextListDropDownStyle = 1
+    CheckBoxDropDownStyle = 2
+
+
+class ValueInput(ApiObject):
+    def __init__(self, expression: str = None, real: float = None):
+        self._expression = expression
+        self._real = real
+
+    @staticmethod
+    def createByString(expression: str) -> ValueInput:
+        ledger.record('ValueInput.createByString')
+        return ValueInput(expression=expression)
+
+    @staticmethod
+    def createByReal(value: float) -> ValueInput:
+        ledger.record('ValueInput.createByReal')
+        return ValueInput(real=float(value))
+
+    @property
+    def stringValue(self) -> str:
+        return self._expression or ''
+
+    @property
+    def realValue(self) -> float:
+        return self._real if self._real is not None else 0.0
+
+    def _evaluate(self, unit: str = '', parameters: dict = None) -> float:
+        if self._real is not None:
+            return self._real
+        return evaluate(self._expression, unit, parameters)
+
+    def _as_expression(self, unit: str = '') -> str:
+        if self._expression is not None:
+            return self._expression
+        # Real values are in internal units.
+        return f'{self._real/_unit_factor(unit)!r} {unit}'.strip()
+
+
+class Point3D(ApiObject):
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    @staticmethod
+    def create(x: float = 0.0, y: float = 0.0, z: float = 0.0) -> Point3D:
+        ledger.record('Point3D.create')
+        return Point3D(x, y, z)
+
+
+class Vector3D(ApiObject):
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    @staticmethod
+    def create(x: float = 0.0, y: float = 0.0, z: float = 0.0) -> Vector3D:
+        ledger.record('Vector3D.create')
+        return Vector3D(x, y, z)
+
+    def crossProduct(self, rightSide: Vector3D) -> Vector3D:
+        return Vector3D(self.y*rightSide.z-self.z*rightSide.y, self.z*rightSide.x-self.x*rightSide.z,
+                        self.x*rightSide.y-self.y*rightSide.x)
+
+    def normalize(self) -> bool:
+        length = math.sqrt(self.x*self.x+self.y*self.y+self.z*self.z)
+        if length == 0:
+            return False
+        self.x, self.y, self.z = self.x/length, self.y/length, self.z/length
+        return True
+
+
+class Matrix3D(ApiObject):
+    """Only keeps the translation, rotations are accepted and ignored."""
+
+    def __init__(self):
+        self.translation = Vector3D()
+
+    @staticmethod
+    def create() -> Matrix3D:
+        ledger.record('Matrix3D.create')
+        return Matrix3D()
+
+    def setToRotation(self, angle: float, axis: Vector3D, origin: Point3D) -> bool:
+        return True
+
+    def setWithArray(self, cells: list) -> bool:
+        # Row major 4 by 4 cells, the translation is the last column.
+        self.translation = Vector3D(cells[3], cells[7], cells[11])
+        return True
+
+
+class OrientedBoundingBox3D(ApiObject):
+    def __init__(self, center: Point3D, length_direction: Vector3D, width_direction: Vector3D, length: float, width: float, height: float):
+        self.centerPoint = center
+        self.lengthDirection = length_direction
+        self.widthDirection = width_direction
+        self.length = length
+        self.width = width
+        self.height = height
+
+    @staticmethod
+    def create(centerPoint: Point3D, lengthDirection: Vector3D, widthDirection: Vector3D, length: float, width: float, height: float) -> OrientedBoundingBox3D:
+        ledger.record('OrientedBoundingBox3D.create')
+        return OrientedBoundingBox3D(centerPoint, lengthDirection, widthDirection, length, width, height)
+
+
+class ObjectCollection(ApiObject):
+    def __init__(self, items=None):
+        self._items = list(items or [])
+
+    @staticmethod
+    def create() -> ObjectCollection:
+        ledger.record('ObjectCollection.create')
+        return ObjectCollection()
+
+    @staticmethod
+    def createWithArray(items) -> ObjectCollection:
+        ledger.record('ObjectCollection.createWithArray')
+        return ObjectCollection(items)
+
+    def add(self, item) -> bool:
+        self._items.append(item)
+        return True
+
+    def item(self, index: int):
+        return self._items[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+# ********** Events **********
+
+class Event(ApiObject):
+    def __init__(self):
+        self._handlers = []
+
+    def remove(self, handler) -> bool:
+        self._handlers.remove(handler)
+        return True
+
+    def _fire(self, args):
+        for handler in list(self._handlers):
+            handler.notify(args)
+
+
+class CommandCreatedEventHandler:
+    def notify(self, args):
+        pass
+
+
+class CommandEventHandler:
+    def notify(self, args):
+        pass
+
+
+class InputChangedEventHandler:
+    def notify(self, args):
+        pass
+
+
+class ValidateInputsEventHandler:
+    def notify(self, args):
+        pass
+
+
+class CustomEventHandler:
+    def notify(self, args):
+        pass
+
+
+class CustomEvent(Event):
+    def __init__(self, event_id: str):
+        super().__init__()
+        self._id = event_id
+
+    @property
+    def eventId(self) -> str:
+        return self._id
+
+    def add(self, handler: CustomEventHandler) -> bool:
+        self._handlers.append(handler)
+        return True
+
+
+class CustomEventArgs(ApiObject):
+    def __init__(self, additional_info: str):
+        self.additionalInfo = additional_info
+
+
+class CommandCreatedEvent(Event):
+    def add(self, handler: CommandCreatedEventHandler) -> bool:
+        self._handlers.append(handler)
+        return True
+
+
+class CommandEvent(Event):
+    def add(self, handler: CommandEventHandler) -> bool:
+        self._handlers.append(handler)
+        return True
+
+
+class InputChangedEvent(Event):
+    def add(self, handler: InputChangedEventHandler) -> bool:
+        self._handlers.append(handler)
+        return True
+
+
+class ValidateInputsEvent(Event):
+    def add(self, handler: ValidateInputsEventHandler) -> bool:
+        self._handlers.append(handler)
+        return True
+
+
+class CommandCreatedEventArgs(ApiObject):
+    def __init__(self, command: Command):
+        self.command = command
+
+
+class CommandEventArgs(ApiObject):
+    def __init__(self, command: Command):
+        self.command = command
+        self.isValidResult = False
+
+
+class InputChangedEventArgs(ApiObject):
+    def __init__(self, command: Command, changed_input: CommandInput):
+        self.input = changed_input
+        self.inputs = command._inputs
+        self.firingEvent = command.inputChanged
+
+
+class ValidateInputsEventArgs(ApiObject):
+    def __init__(self, command: Command):
+        self.inputs = command._inputs
+        self.areInputsValid = True
+
+
+# ********** Commands and command inputs **********
+
+class CommandInput(ApiObject):
+    def __init__(self, inputs: CommandInputs, input_id: str, name: str):
+        self._inputs = inputs
+        self._id = input_id
+        self._name = name
+        self.isVisible = True
+        self.isEnabled = True
+        self.tooltip = ''
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def parentCommand(self) -> Command:
+        return self._inputs._command
+
+
+class ListItem(ApiObject):
+    def __init__(self, items: ListItems, name: str, is_selected: bool):
+        self._items = items
+        self._name = name
+        self._selected = is_selected
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def isSelected(self) -> bool:
+        return self._selected
+
+    @isSelected.setter
+    def isSelected(self, value: bool):
+        if value:
+            for item in self._items._items:
+                item._selected = False
+        self._selected = value
+
+
+class ListItems(ApiObject):
+    def __init__(self):
+        self._items = []
+
+    def add(self, name: str, isSelected: bool, icon: str = '', beforeIndex: int = -1) -> ListItem:
+        item = ListItem(self, name, False)
+        self._items.append(item)
+        if isSelected:
+            for other in self._items:
+                other._selected = False
+            item._selected = True
+        return item
+
+    def item(self, index: int) -> ListItem:
+        return self._items[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+
+class DropDownCommandInput(CommandInput):
+    def __init__(self, inputs, input_id, name, style):
+        super().__init__(inputs, input_id, name)
+        self._list_items = ListItems()
+
+    @property
+    def listItems(self) -> ListItems:
+        return self._list_items
+
+    @property
+    def selectedItem(self) -> ListItem:
+        for item in self._list_items._items:
+            if item._selected:
+                return item
+        return None
+
+
+class ImageCommandInput(CommandInput):
+    def __init__(self, inputs, input_id, name, image_file):
+        super().__init__(inputs, input_id, name)
+        self.imageFile = image_file
+
+
+class TextBoxCommandInput(CommandInput):
+    def __init__(self, inputs, input_id, name, formatted_text, num_rows, is_read_only):
+        super().__init__(inputs, input_id, name)
+        self.formattedText = formatted_text
+        self.numRows = num_rows
+        self.isReadOnly = is_read_only
+        self.text = formatted_text
+
+
+class BoolValueCommandInput(CommandInput):
+    def __init__(self, inputs, input_id, name, is_check_box, resource_folder, initial_value):
+        super().__init__(inputs, input_id, name)
+        self.value = initial_value
+
+
+class IntegerSpinnerCommandInput(CommandInput):
+    def __init__(self, inputs, input_id, name, minimum, maximum, spin_step, initial_value):
+        super().__init__(inputs, input_id, name)
+        self.minimumValue = minimum
+        self.maximumValue = maximum
+        self.spinStep = spin_step
+        self.value = initial_value
+
+
+class SelectionCommandInput(CommandInput):
+    """Never holds a selection, the benchmark does not pick entities."""
+
+    def __init__(self, inputs, input_id, name, command_prompt):
+        super().__init__(inputs, input_id, name)
+        self.commandPrompt = command_prompt
+        self._filters = []
+
+    def addSelectionFilter(self, filter: str) -> bool:
+        self._filters.append(filter)
+        return True
+
+    def clearSelectionFilter(self) -> bool:
+        self._filters.clear()
+        return True
+
+    def setSelectionLimits(self, minimum: int, maximum: int = 0) -> bool:
+        return True
+
+    @property
+    def selectionCount(self) -> int:
+        return 0
+
+
+class _ValueCommandInput(CommandInput):
+    _unit = ''
+
+    def __init__(self, inputs, input_id, name, initial_value: ValueInput):
+        super().__init__(inputs, input_id, name)
+        self._value = initial_value._evaluate(self._unit, inputs._parameters())
+        self._minimum = None
+        self._maximum = None
+        self.isMinimumValueInclusive = True
+        self.isMaximumValueInclusive = True
+        self.manipulatorOrigin = None
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    @value.setter
+    def value(self, value: float):
+        self._value = float(value)
+
+    @property
+    def expression(self) -> str:
+        return f'{self._value/_unit_factor(self._unit)} {self._unit}'
+
+    @expression.setter
+    def expression(self, expression: str):
+        try:
+            self._value = evaluate(expression, self._unit, self._inputs._parameters())
+            self._valid_expression = True
+        except Exception:
+            self._valid_expression = False
+
+    @property
+    def isValidExpression(self) -> bool:
+        return getattr(self, '_valid_expression', True)
+
+    @property
+    def minimumValue(self) -> float:
+        return self._minimum
+
+    @minimumValue.setter
+    def minimumValue(self, value: float):
+        self._minimum = float(value)
+
+    @property
+    def maximumValue(self) -> float:
+        return self._maximum
+
+    @maximumValue.setter
+    def maximumValue(self, value: float):
+        self._maximum = float(value)
+
+    @property
+    def hasMinimumValue(self) -> bool:
+        return self._minimum is not None
+
+    @hasMinimumValue.setter
+    def hasMinimumValue(self, value: bool):
+        if not value:
+            self._minimum = None
+
+    @property
+    def hasMaximumValue(self) -> bool:
+        return self._maximum is not None
+
+    @hasMaximumValue.setter
+    def hasMaximumValue(self, value: bool):
+        if not value:
+            self._maximum = None
+
+    @property
+    def isValidExpression(self) -> bool:
+        return True
+
+
+class DistanceValueCommandInput(_ValueCommandInput):
+    _unit = 'mm'
+
+    def setManipulator(self, origin: Point3D, direction: Vector3D) -> bool:
+        self.manipulatorOrigin = origin
+        return True
+
+
+class AngleValueCommandInput(_ValueCommandInput):
+    _unit = 'deg'
+
+    def setManipulator(self, origin: Point3D, xDirection: Vector3D, yDirection: Vector3D) -> bool:
+        self.manipulatorOrigin = origin
+        return True
+
+
+class CommandInputs(ApiObject):
+    def __init__(self, command: Command):
+        self._command = command
+        self._items = []
+
+    def _parameters(self) -> dict:
+        design = Application._instance._design if Application._instance else None
+        return design._parameter_values() if design is not None else {}
+
+    def _append(self, command_input: CommandInput) -> CommandInput:
+        self._items.append(command_input)
+        return command_input
+
+    def addDropDownCommandInput(self, id: str, name: str, dropDownStyle: int) -> DropDownCommandInput:
+        return self._append(DropDownCommandInput(self, id, name, dropDownStyle))
+
+    def addImageCommandInput(self, id: str, name: str, imageFile: str) -> ImageCommandInput:
+        return self._append(ImageCommandInput(self, id, name, imageFile))
+
+    def addTextBoxCommandInput(self, id: str, name: str, formattedText: str, numRows: int, isReadOnly: bool) -> TextBoxCommandInput:
+        return self._append(TextBoxCommandInput(self, id, name, formattedText, numRows, isReadOnly))
+
+    def addBoolValueInput(self, id: str, name: str, isCheckBox: bool, resourceFolder: str = '', initialValue: bool = False) -> BoolValueCommandInput:
+        return self._append(BoolValueCommandInput(self, id, name, isCheckBox, resourceFolder, initialValue))
+
+    def addSelectionInput(self, id: str, name: str, commandPrompt: str) -> SelectionCommandInput:
+        return self._append(SelectionCommandInput(self, id, name, commandPrompt))
+
+    def addIntegerSpinnerCommandInput(self, id: str, name: str, min: int, max: int, spinStep: int, initialValue: int) -> IntegerSpinnerCommandInput:
+        return self._append(IntegerSpinnerCommandInput(self, id, name, min, max, spinStep, initialValue))
+
+    def addDistanceValueCommandInput(self, id: str, name: str, initialValue: ValueInput) -> DistanceValueCommandInput:
+        return self._append(DistanceValueCommandInput(self, id, name, initialValue))
+
+    def addAngleValueCommandInput(self, id: str, name: str, initialValue: ValueInput) -> AngleValueCommandInput:
+        return self._append(AngleValueCommandInput(self, id, name, initialValue))
+
+    def itemById(self, id: str) -> CommandInput:
+        for command_input in self._items:
+            if command_input._id == id:
+                return command_input
+        return None
+
+    def item(self, index: int) -> CommandInput:
+        return self._items[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+    @property
+    def command(self) -> Command:
+        return self._command
+
+
+class Command(ApiObject):
+    def __init__(self, definition: CommandDefinition):
+        self._definition = definition
+        self._inputs = CommandInputs(self)
+        self.execute = CommandEvent()
+        self.executePreview = CommandEvent()
+        self.destroy = CommandEvent()
+        self.inputChanged = InputChangedEvent()
+        self.validateInputs = ValidateInputsEvent()
+        self.isOKButtonVisible = True
+        self.okButtonText = 'OK'
+
+    @property
+    def commandInputs(self) -> CommandInputs:
+        return self._inputs
+
+    @property
+    def parentCommandDefinition(self) -> CommandDefinition:
+        return self._definition
+
+    def doExecutePreview(self) -> bool:
+        self.executePreview._fire(CommandEventArgs(self))
+        return True
+
+
+class CommandDefinition(ApiObject):
+    def __init__(self, definitions: CommandDefinitions, definition_id: str, name: str, tooltip: str, resource_folder: str):
+        self._definitions = definitions
+        self._id = definition_id
+        self.name = name
+        self.tooltip = tooltip
+        self.resourceFolder = resource_folder
+        self.commandCreated = CommandCreatedEvent()
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    def execute(self, input=None) -> bool:
+        command = Command(self)
+        self._definitions._last_command = command
+        self.commandCreated._fire(CommandCreatedEventArgs(command))
+        return True
+
+    def deleteMe(self) -> bool:
+        self._definitions._items.remove(self)
+        return True
+
+
+class CommandDefinitions(ApiObject):
+    def __init__(self):
+        self._items = []
+        self._last_command = None
+
+    def addButtonDefinition(self, id: str, name: str, tooltip: str, resourceFolder: str = '') -> CommandDefinition:
+        definition = CommandDefinition(self, id, name, tooltip, resourceFolder)
+        self._items.append(definition)
+        return definition
+
+    def itemById(self, id: str) -> CommandDefinition:
+        for definition in self._items:
+            if definition._id == id:
+                return definition
+        return None
+
+
+class CommandControl(ApiObject):
+    def __init__(self, controls: ToolbarControls, definition: CommandDefinition):
+        self._controls = controls
+        self._definition = definition
+        self.isPromoted = False
+        self.isVisible = True
+
+    @property
+    def id(self) -> str:
+        return self._definition._id
+
+    @property
+    def commandDefinition(self) -> CommandDefinition:
+        return self._definition
+
+    def deleteMe(self) -> bool:
+        self._controls._items.remove(self)
+        return True
+
+
+class ToolbarControls(ApiObject):
+    def __init__(self):
+        self._items = []
+
+    def addCommand(self, commandDefinition: CommandDefinition, positionID: str = '', isBefore: bool = True) -> CommandControl:
+        control = CommandControl(self, commandDefinition)
+        self._items.append(control)
+        return control
+
+    def itemById(self, id: str) -> CommandControl:
+        for control in self._items:
+            if control._definition._id == id:
+                return control
+        return None
+
+
+class ToolbarPanel(ApiObject):
+    def __init__(self, panel_id: str):
+        self._id = panel_id
+        self._controls = ToolbarControls()
+
+    @property
+    def controls(self) -> ToolbarControls:
+        return self._controls
+
+
+class ToolbarPanels(ApiObject):
+    def __init__(self):
+        self._items = {}
+
+    def itemById(self, id: str) -> ToolbarPanel:
+        return self._items.setdefault(id, ToolbarPanel(id))
+
+
+class Workspace(ApiObject):
+    def __init__(self, workspace_id: str):
+        self._id = workspace_id
+        self._panels = ToolbarPanels()
+
+    @property
+    def toolbarPanels(self) -> ToolbarPanels:
+        return self._panels
+
+
+class Workspaces(ApiObject):
+    def __init__(self):
+        self._items = {}
+
+    def itemById(self, id: str) -> Workspace:
+        return self._items.setdefault(id, Workspace(id))
+
+
+class UserInterface(ApiObject):
+    def __init__(self):
+        self._definitions = CommandDefinitions()
+        self._workspaces = Workspaces()
+        self._messages = []
+
+    @property
+    def commandDefinitions(self) -> CommandDefinitions:
+        return self._definitions
+
+    @property
+    def workspaces(self) -> Workspaces:
+        return self._workspaces
+
+    def messageBox(self, text: str, title: str = '', buttons: int = 0, icon: int = 0) -> int:
+        self._messages.append(text)
+        return 0
+
+    def createFileDialog(self) -> FileDialog:
+        return FileDialog()
+
+
+class DialogResults:
+    DialogOK = 0
+    DialogCancel = 1
+    DialogError = 2
+    DialogYes = 3
+    DialogNo = 4
+
+
+class FileDialog(ApiObject):
+    # Files the next dialogs return, in order. Without one the dialog is cancelled.
+    _answers = []
+
+    def __init__(self):
+        self.title = ''
+        self.filter = ''
+        self.isMultiSelectEnabled = False
+        self.filename = ''
+
+    def showOpen(self) -> int:
+        if not FileDialog._answers:
+            return DialogResults.DialogCancel
+        self.filename = FileDialog._answers.pop(0)
+        return DialogResults.DialogOK
+
+
+# ********** Application **********
+
+class UnitAndValuePreferences(ApiObject):
+    def __init__(self):
+        self.generalPrecision = 3
+        self.angularPrecision = 2
+
+
+class Preferences(ApiObject):
+    def __init__(self):
+        self._unit_and_value = UnitAndValuePreferences()
+
+    @property
+    def unitAndValuePreferences(self) -> UnitAndValuePreferences:
+        return self._unit_and_value
+
+
+class Application(ApiObject):
+    _instance = None
+
+    def __init__(self):
+        self._ui = UserInterface()
+        self._preferences = Preferences()
+        self._design = None
+        self._log = []
+        self._custom_events = {}
+        self._pending_events = queue.Queue()
+
+    @staticmethod
+    def get() -> Application:
+        ledger.record('Application.get')
+        if Application._instance is None:
+            Application._instance = Application()
+        return Application._instance
+
+    @property
+    def userInterface(self) -> UserInterface:
+        return self._ui
+
+    @property
+    def preferences(self) -> Preferences:
+        return self._preferences
+
+    @property
+    def activeProduct(self):
+        if self._design is None:
+            from .fusion import Design
+            self._design = Design()
+        return self._design
+
+    def log(self, message: str, level: int = LogLevels.InfoLogLevel, type: int = LogTypes.ConsoleLogType):
+        self._log.append((message, level, type))
+
+    def registerCustomEvent(self, eventId: str) -> CustomEvent:
+        event = CustomEvent(eventId)
+        self._custom_events[eventId] = event
+        return event
+
+    def unregisterCustomEvent(self, eventId: str) -> bool:
+        return self._custom_events.pop(eventId, None) is not None
+
+    def fireCustomEvent(self, eventId: str, additionalInfo: str = '') -> bool:
+        # May be called from any thread. The event is delivered by _dispatch_custom_events,
+        # which stands in for Fusion's main thread message loop.
+        self._pending_events.put((eventId, additionalInfo))
+        return True
+
+    def _dispatch_custom_events(self) -> int:
+        dispatched = 0
+        while True:
+            try:
+                event_id, additional_info = self._pending_events.get_nowait()
+            except queue.Empty:
+                return dispatched
+            event = self._custom_events.get(event_id)
+            if event is not None:
+                event._fire(CustomEventArgs(additional_info))
+                dispatched += 1
+
+
+def _unit_factor(unit: str) -> float:
+    from ._fake import UNITS
+    return UNITS.get(unit, 1.0)
+
@@ -0,0 +1,1241 @@
+"""Fake of the parts of adsk.fusion used by the add-in.
+
+Features do not compute any geometry. They keep track of the bodies they would create so
+that the add-in can chain patterns and combines, and they take part in the simulated
+timeline recompute that follows every parameter change.
+"""
+
+from __future__ import annotations
+
+import itertools
+
+from . import core
+from ._fake import (ApiObject, COST_PER_EXPORTED_ENTITY, COST_PER_ATTRIBUTE_SCAN, COST_PER_BOOLEAN_LUMP, COST_PER_COMBINE_TOOL,
+                    COST_PER_GRAPHICS_VERTEX, COST_PER_PATTERN_INSTANCE, COST_PER_RECOMPUTED_FEATURE, COSTS,
+                    evaluate, ledger)
+
+
+class FeatureOperations:
+    JoinFeatureOperation = 0
+    CutFeatureOperation = 1
+    IntersectFeatureOperation = 2
+    NewBodyFeatureOperation = 3
+    NewComponentFeatureOperation = 4
+
+
+class PatternDistanceType:
+    ExtentPatternDistanceType = 0
+    SpacingPatternDistanceType = 1
+
+
+class PatternComputeOptions:
+    OptimizedPatternCompute = 0
+    IdenticalPatternCompute = 1
+    AdjustPatternCompute = 2
+
+
+class DesignTypes:
+    DirectDesignType = 0
+    ParametricDesignType = 1
+
+
+class BooleanTypes:
+    DifferenceBooleanType = 0
+    IntersectionBooleanType = 1
+    UnionBooleanType = 2
+
+
+_tokens = itertools.count(1)
+
+
+# ********** Attributes **********
+
+class Attribute(ApiObject):
+    def __init__(self, attributes: Attributes, group_name: str, name: str, value: str):
+        self._attributes = attributes
+        self._group_name = group_name
+        self._name = name
+        self._value = value
+
+    @property
+    def groupName(self) -> str:
+        return self._group_name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def value(self) -> str:
+        return self._value
+
+    @value.setter
+    def value(self, value: str):
+        self._value = value
+
+    @property
+    def parent(self):
+        return self._attributes._parent
+
+    def deleteMe(self) -> bool:
+        self._attributes._items.remove(self)
+        return True
+
+
+class Attributes(ApiObject):
+    def __init__(self, parent):
+        self._parent = parent
+        self._items = []
+
+    def add(self, groupName: str, name: str, value: str) -> Attribute:
+        attribute = self._find(groupName, name)
+        if attribute is not None:
+            attribute._value = value
+            return attribute
+        attribute = Attribute(self, groupName, name, value)
+        self._items.append(attribute)
+        return attribute
+
+    def itemByName(self, groupName: str, name: str) -> Attribute:
+        return self._find(groupName, name)
+
+    def _find(self, group_name: str, name: str) -> Attribute:
+        for attribute in self._items:
+            if attribute._group_name == group_name and attribute._name == name:
+                return attribute
+        return None
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+
+class _Entity(ApiObject):
+    """Base class of all entities that can carry attributes and be found by token."""
+
+    def __init__(self, design: Design):
+        self._design = design
+        self._valid = True
+        self._attributes = Attributes(self)
+        self._token = f'token-{next(_tokens)}'
+        design._entities.append(self)
+
+    @property
+    def attributes(self) -> Attributes:
+        return self._attributes
+
+    @property
+    def isValid(self) -> bool:
+        return self._valid
+
+    @property
+    def entityToken(self) -> str:
+        return self._token
+
+    @property
+    def parentDesign(self) -> Design:
+        return self._design
+
+    def deleteMe(self) -> bool:
+        in_timeline = self._design._timeline._object_of(self) is not None
+        self._delete()
+        if in_timeline:
+            # Deleting a timeline item recomputes the items after it.
+            self._design._recompute()
+        return True
+
+    def _delete(self):
+        self._valid = False
+        if self in self._design._entities:
+            self._design._entities.remove(self)
+        self._design._timeline._remove(self)
+
+
+# ********** Parameters **********
+
+class UserParameter(ApiObject):
+    def __init__(self, parameters: UserParameters, name: str, expression: str, unit: str, comment: str):
+        self._parameters = parameters
+        self._name = name
+        self._expression = expression
+        self._unit = unit
+        self.comment = comment
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def unit(self) -> str:
+        return self._unit
+
+    @property
+    def isValid(self) -> bool:
+        return self in self._parameters._items
+
+    @property
+    def expression(self) -> str:
+        return self._expression
+
+    @expression.setter
+    def expression(self, value: str):
+        if value != self._expression:
+            self._expression = value
+            self._parameters._design._parameters_changed()
+
+    @property
+    def value(self) -> float:
+        return self._value()
+
+    @value.setter
+    def value(self, value: float):
+        self.expression = self._expression_of(value)
+
+    def _expression_of(self, value: float) -> str:
+        factor = evaluate('1', self._unit)
+        return f'{value/factor!r} {self._unit}'.strip()
+
+    def _value(self) -> float:
+        return evaluate(self._expression, self._unit, self._parameters._design._parameter_values(exclude=self._name))
+
+    def deleteMe(self) -> bool:
+        self._parameters._items.remove(self)
+        return True
+
+
+class UserParameters(ApiObject):
+    def __init__(self, design: Design):
+        self._design = design
+        self._items = []
+
+    def add(self, name: str, value: core.ValueInput, units: str, comment: str) -> UserParameter:
+        parameter = UserParameter(self, name, value._as_expression(units), units, comment)
+        self._items.append(parameter)
+        return parameter
+
+    def itemByName(self, name: str) -> UserParameter:
+        return self._find(name)
+
+    def _find(self, name: str) -> UserParameter:
+        for parameter in self._items:
+            if parameter._name == name:
+                return parameter
+        return None
+
+    def item(self, index: int) -> UserParameter:
+        return self._items[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+
+class ParameterScope:
+    """Mapping from user parameter name to value that evaluates parameters only when they are looked up."""
+
+    def __init__(self, design: Design, exclude: str = None):
+        self._design = design
+        self._exclude = exclude
+
+    def _parameter(self, name: str) -> UserParameter:
+        if name == self._exclude:
+            return None
+        return self._design._user_parameters._find(name)
+
+    def __contains__(self, name: str) -> bool:
+        return self._parameter(name) is not None
+
+    def __getitem__(self, name: str) -> float:
+        parameter = self._parameter(name)
+        if parameter is None:
+            raise KeyError(name)
+        return parameter._value()
+
+
+class ModelParameter(ApiObject):
+    def __init__(self, design: Design, expression: str = ''):
+        self._design = design
+        self._expression = expression
+
+    @property
+    def expression(self) -> str:
+        return self._expression
+
+    @expression.setter
+    def expression(self, value: str):
+        self._expression = value
+
+
+# ********** Construction geometry **********
+
+class ConstructionPlane(_Entity):
+    pass
+
+
+class ConstructionAxis(_Entity):
+    pass
+
+
+# ********** Sketches **********
+
+class SketchPoint(ApiObject):
+    def __init__(self, point: core.Point3D):
+        self._point = point
+
+    @property
+    def geometry(self) -> core.Point3D:
+        return self._point
+
+
+class SketchEntity(_Entity):
+    def __init__(self, sketch: Sketch):
+        super().__init__(sketch._design)
+        self._sketch = sketch
+        self.isConstruction = False
+
+    @property
+    def parentSketch(self) -> Sketch:
+        return self._sketch
+
+
+class SketchLine(SketchEntity):
+    def __init__(self, sketch, start: SketchPoint, end: SketchPoint):
+        super().__init__(sketch)
+        self._start = start
+        self._end = end
+        self.isCenterLine = False
+
+    @property
+    def startSketchPoint(self) -> SketchPoint:
+        return self._start
+
+    @property
+    def endSketchPoint(self) -> SketchPoint:
+        return self._end
+
+
+class SketchArc(SketchEntity):
+    def __init__(self, sketch, center: SketchPoint, start: SketchPoint, end: SketchPoint):
+        super().__init__(sketch)
+        self._center = center
+        self._start = start
+        self._end = end
+
+    @property
+    def centerSketchPoint(self) -> SketchPoint:
+        return self._center
+
+
+def _sketch_point(point) -> SketchPoint:
+    return point if isinstance(point, SketchPoint) else SketchPoint(point)
+
+
+class SketchLines(ApiObject):
+    def __init__(self, sketch: Sketch):
+        self._sketch = sketch
+
+    def addByTwoPoints(self, startPoint, endPoint) -> SketchLine:
+        line = SketchLine(self._sketch, _sketch_point(startPoint), _sketch_point(endPoint))
+        self._sketch._curves.append(line)
+        return line
+
+
+class SketchArcs(ApiObject):
+    def __init__(self, sketch: Sketch):
+        self._sketch = sketch
+
+    def addByCenterStartEnd(self, centerPoint, startPoint, endPoint) -> SketchArc:
+        arc = SketchArc(self._sketch, _sketch_point(centerPoint), _sketch_point(startPoint), _sketch_point(endPoint))
+        self._sketch._curves.append(arc)
+        return arc
+
+
+class SketchCurves(ApiObject):
+    def __init__(self, sketch: Sketch):
+        self._lines = SketchLines(sketch)
+        self._arcs = SketchArcs(sketch)
+
+    @property
+    def sketchLines(self) -> SketchLines:
+        return self._lines
+
+    @property
+    def sketchArcs(self) -> SketchArcs:
+        return self._arcs
+
+
+class GeometricConstraint(ApiObject):
+    pass
+
+
+class GeometricConstraints(ApiObject):
+    def _add(self) -> GeometricConstraint:
+        return GeometricConstraint()
+
+    def addTangent(self, curveOne, curveTwo) -> GeometricConstraint:
+        return self._add()
+
+    def addCoincident(self, point, entity) -> GeometricConstraint:
+        return self._add()
+
+    def addCollinear(self, lineOne, lineTwo) -> GeometricConstraint:
+        return self._add()
+
+    def addEqual(self, curveOne, curveTwo) -> GeometricConstraint:
+        return self._add()
+
+    def addHorizontalPoints(self, pointOne, pointTwo) -> GeometricConstraint:
+        return self._add()
+
+
+class SketchDimension(ApiObject):
+    def __init__(self, design: Design):
+        self._parameter = ModelParameter(design)
+
+    @property
+    def parameter(self) -> ModelParameter:
+        return self._parameter
+
+
+class SketchDimensions(ApiObject):
+    def __init__(self, sketch: Sketch):
+        self._sketch = sketch
+
+    def addAngularDimension(self, lineOne, lineTwo, textPoint) -> SketchDimension:
+        return SketchDimension(self._sketch._design)
+
+    def addDistanceDimension(self, pointOne, pointTwo, orientation, textPoint) -> SketchDimension:
+        return SketchDimension(self._sketch._design)
+
+
+class Profile(_Entity):
+    def __init__(self, sketch: Sketch):
+        super().__init__(sketch._design)
+        self._sketch = sketch
+
+    @property
+    def parentSketch(self) -> Sketch:
+        return self._sketch
+
+
+class Profiles(ApiObject):
+    def __init__(self, sketch: Sketch):
+        self._items = [Profile(sketch), Profile(sketch)]
+
+    def item(self, index: int) -> Profile:
+        return self._items[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+
+class Sketch(_Entity):
+    def __init__(self, component: Component, plane):
+        super().__init__(component._design)
+        self._component = component
+        self._curves = []
+        self._sketch_curves = SketchCurves(self)
+        self._constraints = GeometricConstraints()
+        self._dimensions = SketchDimensions(self)
+        self._profiles = Profiles(self)
+        self.isComputeDeferred = False
+        self.isVisible = True
+        component._design._timeline._append(self, 1.0)
+
+    @property
+    def sketchCurves(self) -> SketchCurves:
+        return self._sketch_curves
+
+    @property
+    def geometricConstraints(self) -> GeometricConstraints:
+        return self._constraints
+
+    @property
+    def sketchDimensions(self) -> SketchDimensions:
+        return self._dimensions
+
+    @property
+    def profiles(self) -> Profiles:
+        return self._profiles
+
+    @property
+    def parentComponent(self) -> Component:
+        return self._component
+
+    def project(self, entity) -> core.ObjectCollection:
+        line = SketchLine(self, SketchPoint(core.Point3D()), SketchPoint(core.Point3D()))
+        return core.ObjectCollection([line])
+
+
+class Sketches(ApiObject):
+    def __init__(self, component: Component):
+        self._component = component
+        self._items = []
+
+    def add(self, planarEntity) -> Sketch:
+        sketch = Sketch(self._component, planarEntity)
+        self._items.append(sketch)
+        return sketch
+
+    def item(self, index: int) -> Sketch:
+        return self._items[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+
+# ********** Bodies **********
+
+class BRepBody(_Entity):
+    def __init__(self, design: Design, source=None):
+        super().__init__(design)
+        self._source = source
+        self.name = 'Body'
+        self.isVisible = True
+
+
+class BRepFace(_Entity):
+    """Only exists for type hints, the benchmark never selects faces."""
+
+
+class BRepBodies(ApiObject):
+    def __init__(self, bodies=None):
+        self._items = list(bodies or [])
+
+    def item(self, index: int) -> BRepBody:
+        return self._items[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class ComponentBodies(BRepBodies):
+    """Bodies of a component, transient bodies are added through it."""
+
+    def __init__(self, component: Component):
+        super().__init__()
+        self._component = component
+
+    def add(self, body: TransientBRepBody, targetBaseFeature: BaseFeature = None) -> BRepBody:
+        ledger.charge('BRepBodies.add[lumps]', COST_PER_BOOLEAN_LUMP*body._lumps)
+        added = BRepBody(self._component._design, targetBaseFeature)
+        if targetBaseFeature is not None:
+            targetBaseFeature._bodies.append(added)
+        self._items.append(added)
+        return added
+
+
+class TransientBRepBody(ApiObject):
+    """Body created by the TemporaryBRepManager. Only the number of lumps is tracked."""
+
+    def __init__(self, lumps: int = 1):
+        self._lumps = lumps
+
+
+class TemporaryBRepManager(ApiObject):
+    _instance = None
+
+    @staticmethod
+    def get() -> TemporaryBRepManager:
+        ledger.record('TemporaryBRepManager.get')
+        if TemporaryBRepManager._instance is None:
+            TemporaryBRepManager._instance = TemporaryBRepManager()
+        return TemporaryBRepManager._instance
+
+    def createBox(self, box: core.OrientedBoundingBox3D) -> TransientBRepBody:
+        return TransientBRepBody()
+
+    def createSphere(self, center: core.Point3D, radius: float) -> TransientBRepBody:
+        return TransientBRepBody()
+
+    def createCylinderOrCone(self, pointOne: core.Point3D, pointOneRadius: float, pointTwo: core.Point3D, pointTwoRadius: float) -> TransientBRepBody:
+        return TransientBRepBody()
+
+    def exportToFile(self, bodies: list, filename: str) -> bool:
+        with open(filename, 'w') as file:
+            file.write(f'{sum(body._lumps for body in bodies)}\n')
+        return True
+
+    def createFromFile(self, filename: str) -> BRepBodies:
+        with open(filename) as file:
+            return BRepBodies([TransientBRepBody(int(file.read()))])
+
+    def copy(self, body: TransientBRepBody) -> TransientBRepBody:
+        return TransientBRepBody(body._lumps)
+
+    def transform(self, body: TransientBRepBody, transform: core.Matrix3D) -> bool:
+        return True
+
+    def booleanOperation(self, targetBody: TransientBRepBody, toolBody: TransientBRepBody, booleanType: int) -> bool:
+        # Neighbouring cells may touch and merge, the lumps are counted as if they were disjoint.
+        ledger.charge('TemporaryBRepManager.booleanOperation[lumps]', COST_PER_BOOLEAN_LUMP*(targetBody._lumps+toolBody._lumps))
+        if booleanType == BooleanTypes.UnionBooleanType:
+            targetBody._lumps += toolBody._lumps
+        return True
+
+
+# ********** Custom graphics **********
+
+class CustomGraphicsCoordinates(ApiObject):
+    def __init__(self, coordinates: list):
+        self.coordinateCount = len(coordinates)//3
+
+    @staticmethod
+    def create(coordinates: list) -> CustomGraphicsCoordinates:
+        ledger.record('CustomGraphicsCoordinates.create')
+        ledger.charge('CustomGraphicsCoordinates.create[coordinates]', COST_PER_GRAPHICS_VERTEX*(len(coordinates)//3))
+        return CustomGraphicsCoordinates(coordinates)
+
+
+class CustomGraphicsMesh(ApiObject):
+    def __init__(self, coordinates: CustomGraphicsCoordinates, vertex_indices: list):
+        self.coordinates = coordinates
+        self._triangles = len(vertex_indices)//3
+
+
+class CustomGraphicsGroup(ApiObject):
+    def __init__(self, groups: CustomGraphicsGroups):
+        self._groups = groups
+        self._entities = []
+        self._valid = True
+
+    @property
+    def isValid(self) -> bool:
+        return self._valid
+
+    def addMesh(self, coordinates: CustomGraphicsCoordinates, vertexIndexList: list, normalVectors: list, normalIndexList: list) -> CustomGraphicsMesh:
+        mesh = CustomGraphicsMesh(coordinates, vertexIndexList)
+        self._entities.append(mesh)
+        return mesh
+
+    def deleteMe(self) -> bool:
+        self._valid = False
+        self._groups._items.remove(self)
+        return True
+
+
+class CustomGraphicsGroups(ApiObject):
+    def __init__(self):
+        self._items = []
+
+    def add(self) -> CustomGraphicsGroup:
+        group = CustomGraphicsGroup(self)
+        self._items.append(group)
+        return group
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+
+# ********** Features **********
+
+class Feature(_Entity):
+    """Base class of the fake timeline features."""
+
+    def __init__(self, component: Component, weight: float, body_count: int):
+        super().__init__(component._design)
+        self._component = component
+        self._bodies = [BRepBody(component._design, self) for _ in range(body_count)]
+        self.name = type(self).__name__
+        component._design._timeline._append(self, weight)
+
+    @property
+    def bodies(self) -> BRepBodies:
+        return BRepBodies(self._bodies)
+
+    @property
+    def parentComponent(self) -> Component:
+        return self._component
+
+    @property
+    def timelineObject(self) -> TimelineObject:
+        return self._design._timeline._object_of(self)
+
+    def _delete(self):
+        for body in self._bodies:
+            body._delete()
+        super()._delete()
+
+
+def _body_count(entities) -> int:
+    count = 0
+    for entity in entities:
+        if isinstance(entity, Feature):
+            count += len(entity._bodies)
+        else:
+            count += 1
+    return max(count, 1)
+
+
+class DistanceExtentDefinition(ApiObject):
+    def __init__(self, distance: core.ValueInput):
+        self._distance = distance
+
+    @staticmethod
+    def create(distance: core.ValueInput) -> DistanceExtentDefinition:
+        ledger.record('DistanceExtentDefinition.create')
+        return DistanceExtentDefinition(distance)
+
+
+class ExtrudeFeatureInput(ApiObject):
+    def __init__(self, profiles, operation: int):
+        self._profiles = profiles
+        self._operation = operation
+
+    def setOneSideExtent(self, extent: DistanceExtentDefinition, direction: int, taperAngle=None) -> bool:
+        return True
+
+    def setSymmetricExtent(self, distance: core.ValueInput, isFullLength: bool, taperAngle=None) -> bool:
+        return True
+
+
+class ExtrudeFeature(Feature):
+    pass
+
+
+class ExtrudeFeatures(ApiObject):
+    def __init__(self, component: Component):
+        self._component = component
+
+    def createInput(self, profile, operation: int) -> ExtrudeFeatureInput:
+        return ExtrudeFeatureInput(profile, operation)
+
+    def add(self, input: ExtrudeFeatureInput) -> ExtrudeFeature:
+        return ExtrudeFeature(self._component, COSTS['ExtrudeFeatures.add'], 1)
+
+
+class RevolveFeatureInput(ApiObject):
+    def __init__(self, profile, axis, operation: int):
+        self._profile = profile
+        self._axis = axis
+        self._operation = operation
+
+    def setAngleExtent(self, isSymmetric: bool, angle: core.ValueInput) -> bool:
+        return True
+
+
+class RevolveFeature(Feature):
+    pass
+
+
+class RevolveFeatures(ApiObject):
+    def __init__(self, component: Component):
+        self._component = component
+
+    def createInput(self, profile, axis, operation: int) -> RevolveFeatureInput:
+        return RevolveFeatureInput(profile, axis, operation)
+
+    def add(self, input: RevolveFeatureInput) -> RevolveFeature:
+        return RevolveFeature(self._component, COSTS['RevolveFeatures.add'], 1)
+
+
+def _quantity(value: core.ValueInput, design: Design) -> int:
+    """Evaluates the quantity value input of a pattern against the user parameters."""
+    return max(int(round(value._evaluate('', design._parameter_values()))), 1)
+
+
+class RectangularPatternFeatureInput(ApiObject):
+    def __init__(self, entities, direction_one, quantity_one, distance_one, distance_type):
+        self._entities = list(entities)
+        self._quantity_one = quantity_one
+        self._distance_one = distance_one
+        self._quantity_two = core.ValueInput(real=1.0)
+        self._distance_two = distance_one
+        self.patternComputeOption = PatternComputeOptions.OptimizedPatternCompute
+
+    def setDirectionTwo(self, directionTwoEntity, quantityTwo: core.ValueInput, distanceTwo: core.ValueInput) -> bool:
+        self._quantity_two = quantityTwo
+        self._distance_two = distanceTwo
+        return True
+
+
+class PatternQuantity(ApiObject):
+    """Stands in for the ModelParameter returned by the quantity properties of a pattern."""
+
+    def __init__(self, feature: Feature, value: core.ValueInput):
+        self._feature = feature
+        self._expression = value._as_expression()
+
+    @property
+    def expression(self) -> str:
+        return self._expression
+
+    @expression.setter
+    def expression(self, value: str):
+        if value != self._expression:
+            self._expression = value
+            self._feature._quantities_changed()
+
+    @property
+    def value(self) -> float:
+        return evaluate(self._expression, '', self._feature._design._parameter_values())
+
+
+class RectangularPatternFeature(Feature):
+    def __init__(self, component: Component, pattern_input: RectangularPatternFeatureInput):
+        design = component._design
+        self._input_entities = pattern_input._entities
+        self._quantity_one = None
+        quantity = _quantity(pattern_input._quantity_one, design)*_quantity(pattern_input._quantity_two, design)
+        weight = COSTS['RectangularPatternFeatures.add'] + COST_PER_PATTERN_INSTANCE*quantity
+        # The first instance is the input itself, only the other ones are new bodies.
+        super().__init__(component, weight, (quantity-1)*_body_count(pattern_input._entities))
+        self._quantity_one = PatternQuantity(self, pattern_input._quantity_one)
+        self._quantity_two = PatternQuantity(self, pattern_input._quantity_two)
+        ledger.charge('RectangularPatternFeatures.add[instances]', COST_PER_PATTERN_INSTANCE*quantity)
+
+    @property
+    def quantityOne(self) -> PatternQuantity:
+        return self._quantity_one
+
+    @property
+    def quantityTwo(self) -> PatternQuantity:
+        return self._quantity_two
+
+    @property
+    def inputEntities(self) -> core.ObjectCollection:
+        return core.ObjectCollection(self._input_entities)
+
+    def _instance_count(self) -> int:
+        return max(int(round(self._quantity_one.value)), 1)*max(int(round(self._quantity_two.value)), 1)
+
+    def _quantities_changed(self):
+        quantity = self._instance_count()
+        self._design._timeline._reweight(self, COSTS['RectangularPatternFeatures.add'] + COST_PER_PATTERN_INSTANCE*quantity)
+        self._design._recompute()
+
+
+class RectangularPatternFeatures(ApiObject):
+    def __init__(self, component: Component):
+        self._component = component
+        self._items = []
+
+    def createInput(self, inputEntities, directionOneEntity, quantityOne, distanceOne, patternDistanceType) -> RectangularPatternFeatureInput:
+        return RectangularPatternFeatureInput(inputEntities, directionOneEntity, quantityOne, distanceOne, patternDistanceType)
+
+    def add(self, input: RectangularPatternFeatureInput) -> RectangularPatternFeature:
+        feature = RectangularPatternFeature(self._component, input)
+        self._items.append(feature)
+        return feature
+
+    def item(self, index: int) -> RectangularPatternFeature:
+        return [feature for feature in self._items if feature._valid][index]
+
+    @property
+    def count(self) -> int:
+        return len([feature for feature in self._items if feature._valid])
+
+
+class CircularPatternFeatureInput(ApiObject):
+    def __init__(self, entities, axis):
+        self._entities = list(entities)
+        self.quantity = core.ValueInput(real=1.0)
+        self.totalAngle = core.ValueInput(expression='360 deg')
+
+
+class CircularPatternFeature(Feature):
+    pass
+
+
+class CircularPatternFeatures(ApiObject):
+    def __init__(self, component: Component):
+        self._component = component
+        self._items = []
+
+    def createInput(self, inputEntities, axis) -> CircularPatternFeatureInput:
+        return CircularPatternFeatureInput(inputEntities, axis)
+
+    def add(self, input: CircularPatternFeatureInput) -> CircularPatternFeature:
+        quantity = _quantity(vars(input)['quantity'], self._component._design)
+        weight = COSTS['CircularPatternFeatures.add'] + COST_PER_PATTERN_INSTANCE*quantity
+        ledger.charge('CircularPatternFeatures.add[instances]', COST_PER_PATTERN_INSTANCE*quantity)
+        feature = CircularPatternFeature(self._component, weight, (quantity-1)*_body_count(input._entities))
+        self._items.append(feature)
+        return feature
+
+    def item(self, index: int) -> CircularPatternFeature:
+        return [feature for feature in self._items if feature._valid][index]
+
+    @property
+    def count(self) -> int:
+        return len([feature for feature in self._items if feature._valid])
+
+
+class CombineFeatureInput(ApiObject):
+    def __init__(self, target_body, tool_bodies):
+        self._target = target_body
+        self._tools = list(tool_bodies)
+        self.operation = FeatureOperations.JoinFeatureOperation
+        self.isKeepToolBodies = False
+        self.isNewComponent = False
+
+
+class CombineFeature(Feature):
+    pass
+
+
+class BaseFeature(Feature):
+    def __init__(self, component: Component):
+        super().__init__(component, COSTS['BaseFeatures.add'], 0)
+        self._editing = False
+
+    def startEdit(self) -> bool:
+        self._editing = True
+        return True
+
+    def finishEdit(self) -> bool:
+        self._editing = False
+        return True
+
+
+class BaseFeatures(ApiObject):
+    def __init__(self, component: Component):
+        self._component = component
+        self._items = []
+
+    def add(self) -> BaseFeature:
+        feature = BaseFeature(self._component)
+        self._items.append(feature)
+        return feature
+
+    def item(self, index: int) -> BaseFeature:
+        return [feature for feature in self._items if feature._valid][index]
+
+    @property
+    def count(self) -> int:
+        return len([feature for feature in self._items if feature._valid])
+
+
+class CombineFeatures(ApiObject):
+    def __init__(self, component: Component):
+        self._component = component
+        self._items = []
+
+    def createInput(self, targetBody, toolBodies) -> CombineFeatureInput:
+        return CombineFeatureInput(targetBody, toolBodies)
+
+    def add(self, input: CombineFeatureInput) -> CombineFeature:
+        tools = len(input._tools)
+        weight = COSTS['CombineFeatures.add'] + COST_PER_COMBINE_TOOL*tools
+        ledger.charge('CombineFeatures.add[tools]', COST_PER_COMBINE_TOOL*tools)
+        feature = CombineFeature(self._component, weight, 0)
+        feature._bodies = [input._target]
+        self._items.append(feature)
+        return feature
+
+    def item(self, index: int) -> CombineFeature:
+        return [feature for feature in self._items if feature._valid][index]
+
+    @property
+    def count(self) -> int:
+        return len([feature for feature in self._items if feature._valid])
+
+
+class Features(ApiObject):
+    def __init__(self, component: Component):
+        self._extrude = ExtrudeFeatures(component)
+        self._revolve = RevolveFeatures(component)
+        self._rectangular = RectangularPatternFeatures(component)
+        self._circular = CircularPatternFeatures(component)
+        self._combine = CombineFeatures(component)
+        self._base = BaseFeatures(component)
+
+    @property
+    def extrudeFeatures(self) -> ExtrudeFeatures:
+        return self._extrude
+
+    @property
+    def revolveFeatures(self) -> RevolveFeatures:
+        return self._revolve
+
+    @property
+    def rectangularPatternFeatures(self) -> RectangularPatternFeatures:
+        return self._rectangular
+
+    @property
+    def circularPatternFeatures(self) -> CircularPatternFeatures:
+        return self._circular
+
+    @property
+    def combineFeatures(self) -> CombineFeatures:
+        return self._combine
+
+    @property
+    def baseFeatures(self) -> BaseFeatures:
+        return self._base
+
+
+class Component(_Entity):
+    def __init__(self, design: Design):
+        super().__init__(design)
+        self._sketches = Sketches(self)
+        self._features = Features(self)
+        self._bodies = ComponentBodies(self)
+        self._graphics = CustomGraphicsGroups()
+        self._planes = {name: ConstructionPlane(design) for name in ('xY', 'xZ', 'yZ')}
+        self._axes = {name: ConstructionAxis(design) for name in 'xyz'}
+        self.name = 'Component'
+
+    @property
+    def sketches(self) -> Sketches:
+        return self._sketches
+
+    @property
+    def features(self) -> Features:
+        return self._features
+
+    @property
+    def bRepBodies(self) -> ComponentBodies:
+        return self._bodies
+
+    @property
+    def customGraphicsGroups(self) -> CustomGraphicsGroups:
+        return self._graphics
+
+    @property
+    def xYConstructionPlane(self) -> ConstructionPlane:
+        return self._planes['xY']
+
+    @property
+    def xZConstructionPlane(self) -> ConstructionPlane:
+        return self._planes['xZ']
+
+    @property
+    def yZConstructionPlane(self) -> ConstructionPlane:
+        return self._planes['yZ']
+
+    @property
+    def xConstructionAxis(self) -> ConstructionAxis:
+        return self._axes['x']
+
+    @property
+    def yConstructionAxis(self) -> ConstructionAxis:
+        return self._axes['y']
+
+    @property
+    def zConstructionAxis(self) -> ConstructionAxis:
+        return self._axes['z']
+
+
+# ********** Timeline **********
+
+class TimelineObject(ApiObject):
+    def __init__(self, timeline: Timeline, entity, weight: float):
+        self._timeline = timeline
+        self._entity = entity
+        self._weight = weight
+
+    @property
+    def entity(self):
+        return self._entity
+
+    @property
+    def index(self) -> int:
+        return self._timeline._items.index(self)
+
+
+class Timeline(ApiObject):
+    def __init__(self, design: Design):
+        self._design = design
+        self._items = []
+
+    def _append(self, entity, weight: float):
+        self._items.append(TimelineObject(self, entity, weight))
+
+    def _remove(self, entity):
+        self._items = [item for item in self._items if item._entity is not entity]
+
+    def _object_of(self, entity) -> TimelineObject:
+        for item in self._items:
+            if item._entity is entity:
+                return item
+        return None
+
+    def _reweight(self, entity, weight: float):
+        item = self._object_of(entity)
+        if item is not None:
+            item._weight = weight
+
+    def _weight(self) -> float:
+        return sum(item._weight for item in self._items)
+
+    def item(self, index: int) -> TimelineObject:
+        return self._items[index]
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+    @property
+    def markerPosition(self) -> int:
+        # The marker is always at the end, items are appended.
+        return len(self._items)
+
+    @property
+    def timelineGroups(self) -> TimelineGroups:
+        return TimelineGroups(self)
+
+
+class TimelineGroup(ApiObject):
+    def __init__(self, timeline: Timeline, items: list):
+        self._timeline = timeline
+        self._items = items
+
+    @property
+    def count(self) -> int:
+        return len(self._items)
+
+    def deleteMe(self, deleteGroupAndContents: bool = False) -> bool:
+        if deleteGroupAndContents:
+            for item in reversed(self._items):
+                item._entity._delete()
+            self._timeline._design._recompute()
+        return True
+
+
+class TimelineGroups(ApiObject):
+    def __init__(self, timeline: Timeline):
+        self._timeline = timeline
+
+    def add(self, startIndex: int, endIndex: int) -> TimelineGroup:
+        return TimelineGroup(self._timeline, self._timeline._items[startIndex:endIndex+1])
+
+
+class ExportOptions(ApiObject):
+    def __init__(self, filename: str, format: str):
+        self.filename = filename
+        self._format = format
+
+
+class ExportManager(ApiObject):
+    def __init__(self, design: Design):
+        self._design = design
+
+    def createFusionArchiveExportOptions(self, filename: str, geometry=None) -> ExportOptions:
+        return ExportOptions(filename, 'f3d')
+
+    def createSTEPExportOptions(self, filename: str, geometry=None) -> ExportOptions:
+        return ExportOptions(filename, 'step')
+
+    def createSMTExportOptions(self, filename: str, geometry=None) -> ExportOptions:
+        return ExportOptions(filename, 'smt')
+
+    def createSTLExportOptions(self, geometry, filename: str = '') -> ExportOptions:
+        return ExportOptions(filename, 'stl')
+
+    def execute(self, exportOptions: ExportOptions) -> bool:
+        ledger.charge('ExportManager.execute', COST_PER_EXPORTED_ENTITY*len(self._design._entities))
+        with open(exportOptions.filename, 'w') as file:
+            file.write(f'{exportOptions._format} {len(self._design._entities)}\n')
+        return True
+
+
+class FusionUnitsManager(ApiObject):
+    def __init__(self, design: Design):
+        self._design = design
+        self.defaultLengthUnits = 'mm'
+
+    def evaluateExpression(self, expression: str, units: str = 'DefaultDistance') -> float:
+        return self._evaluate(expression, units)
+
+    def isValidExpression(self, expression: str, units: str) -> bool:
+        try:
+            self._evaluate(expression, units)
+        except Exception:
+            return False
+        return True
+
+    def _evaluate(self, expression: str, units: str) -> float:
+        if units == 'DefaultDistance':
+            units = object.__getattribute__(self, 'defaultLengthUnits')
+        return evaluate(expression, units, self._design._parameter_values())
+
+
+class Design(ApiObject):
+    def __init__(self):
+        self._entities = []
+        self._attributes = Attributes(self)
+        self._timeline = Timeline(self)
+        self._user_parameters = UserParameters(self)
+        self._root = Component(self)
+        self._units_manager = FusionUnitsManager(self)
+        self._recomputes = 0
+        self.designType = DesignTypes.ParametricDesignType
+
+    @staticmethod
+    def cast(obj) -> Design:
+        ledger.record('Design.cast')
+        return obj if isinstance(obj, Design) else None
+
+    @property
+    def userParameters(self) -> UserParameters:
+        return self._user_parameters
+
+    @property
+    def exportManager(self) -> ExportManager:
+        return ExportManager(self)
+
+    @property
+    def rootComponent(self) -> Component:
+        return self._root
+
+    @property
+    def activeComponent(self) -> Component:
+        return self._root
+
+    @property
+    def timeline(self) -> Timeline:
+        return self._timeline
+
+    @property
+    def unitsManager(self) -> FusionUnitsManager:
+        return self._units_manager
+
+    @property
+    def attributes(self) -> Attributes:
+        return self._attributes
+
+    def findAttributes(self, groupName: str, attributeName: str) -> list:
+        ledger.charge('Design.findAttributes[scan]', COST_PER_ATTRIBUTE_SCAN*len(self._entities))
+        found = []
+        for entity in self._entities:
+            attribute = entity._attributes._find(groupName, attributeName)
+            if attribute is not None:
+                found.append(attribute)
+        return found
+
+    def findEntityByToken(self, entityToken: str) -> list:
+        return [entity for entity in self._entities if entity._token == entityToken]
+
+    def modifyParameters(self, parameters: list, values: list) -> bool:
+        for parameter, value in zip(parameters, values):
+            if value._real is not None:
+                parameter._expression = parameter._expression_of(value._real)
+            else:
+                parameter._expression = value._expression
+        self._recompute()
+        return True
+
+    def computeAll(self) -> bool:
+        self._recompute()
+        return True
+
+    def _parameter_values(self, exclude: str = None) -> ParameterScope:
+        return ParameterScope(self, exclude)
+
+    def _parameters_changed(self):
+        self._recompute()
+
+    def _recompute(self):
+        self._recomputes += 1
+        ledger.charge('Design.recompute', COST_PER_RECOMPUTED_FEATURE*self._timeline._weight())
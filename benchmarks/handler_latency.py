@@ -0,0 +1,214 @@
+"""Latency benchmark of the command handlers, run against the fake adsk modules.
+
+The add-in is loaded outside of Fusion with benchmarks/fake_adsk in front of sys.path.
+For every texture type the script opens the command dialog, drags each value input
+through a number of intermediate values with a preview after every step, and finishes
+with OK. A second pass cancels the dialog after one preview to measure the cleanup.
+The build engine, the preview mode and the number of instances in each direction can be chosen.
+For every handler it reports the wall time, the number of adsk calls and the simulated
+API cost recorded by the fake.
+
+Usage:
+    python benchmarks/handler_latency.py [--steps N] [--engine ENGINE] [--preview MODE] [--count N] [--json results.json]
+"""
+
+import argparse
+import collections
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks', 'fake_adsk'))
+
+import adsk.core
+import adsk.fusion
+from adsk._fake import ledger
+
+TEXTURE_TYPES = ('Dots', 'Lines', 'Hatch')
+VALUE_INPUTS = ('texture_depth_input', 'texture_width_input', 'texture_flank_angle_input', 'texture_period_input')
+ADDIN_PACKAGE = 'SurfaceTextureCreator'
+
+Sample = collections.namedtuple('Sample', 'wall_ms api_calls simulated_ms')
+
+
+def load_addin():
+    """Imports the add-in as a package the same way Fusion does and returns its entry module."""
+    if ADDIN_PACKAGE not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            ADDIN_PACKAGE, os.path.join(ROOT, 'SurfaceTextureCreator.py'), submodule_search_locations=[ROOT])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[ADDIN_PACKAGE] = module
+        spec.loader.exec_module(module)
+    return sys.modules[ADDIN_PACKAGE]
+
+
+class Recorder:
+    """Collects one Sample per handler invocation, grouped by texture type and handler name."""
+
+    def __init__(self):
+        self.samples = collections.defaultdict(list)
+
+    def measure(self, texture_type: str, handler: str, function, *args):
+        mark = ledger.mark()
+        start = time.perf_counter()
+        # Log messages are still formatted and printed, just not shown between the results.
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(*args)
+        wall_ms = (time.perf_counter()-start)*1000
+        calls = ledger.since(mark)
+        self.samples[(texture_type, handler)].append(Sample(wall_ms, len(calls), sum(call.cost for call in calls)))
+
+    def summary(self) -> list:
+        rows = []
+        for (texture_type, handler), samples in self.samples.items():
+            rows.append({
+                'texture_type': texture_type,
+                'handler': handler,
+                'invocations': len(samples),
+                'wall_ms_mean': statistics.fmean(sample.wall_ms for sample in samples),
+                'wall_ms_max': max(sample.wall_ms for sample in samples),
+                'api_calls_mean': statistics.fmean(sample.api_calls for sample in samples),
+                'simulated_ms_mean': statistics.fmean(sample.simulated_ms for sample in samples),
+            })
+        return rows
+
+
+class Session:
+    """Drives one command dialog through the fake API like a user would."""
+
+    def __init__(self, recorder: Recorder, texture_type: str, command_id: str, label: str = None,
+                 engine: str = 'Parametric', count: int = 2, preview: str = 'Features'):
+        self.recorder = recorder
+        self.texture_type = texture_type
+        self.engine = engine
+        self.preview_mode = preview
+        self.count = count
+        self.label = label or texture_type
+        app = adsk.core.Application.get()
+        app._design = None
+        definition = app.userInterface.commandDefinitions.itemById(command_id)
+        self.recorder.measure(self.label, 'command_created', definition.execute)
+        self.command = app.userInterface.commandDefinitions._last_command
+        self.inputs = self.command.commandInputs
+
+    def change(self, input_id: str, value=None):
+        command_input = self.inputs.itemById(input_id)
+        if value is not None:
+            command_input.value = value
+        args = adsk.core.InputChangedEventArgs(self.command, command_input)
+        self.recorder.measure(self.label, 'command_input_changed', self.command.inputChanged._fire, args)
+
+    def preview(self):
+        args = adsk.core.CommandEventArgs(self.command)
+        self.recorder.measure(self.label, 'command_preview', self.command.executePreview._fire, args)
+
+    def select(self, input_id: str, name: str):
+        selector = self.inputs.itemById(input_id)
+        for index in range(selector.listItems.count):
+            if selector.listItems.item(index).name == name:
+                selector.listItems.item(index).isSelected = True
+        self.change(input_id)
+
+    def select_texture_type(self):
+        self.select('texture_engine_input', self.engine)
+        self.select('texture_preview_input', self.preview_mode)
+        for input_id in ('texture_count_x_input', 'texture_count_y_input'):
+            if self.inputs.itemById(input_id).value != self.count:
+                self.change(input_id, self.count)
+        self.select('texture_type_input', self.texture_type)
+        self.preview()
+
+    def drag(self, input_id: str, steps: int):
+        """Moves a value input in steps towards the middle of its allowed range, previewing every step.
+
+        After the last step the script waits for the previews postponed by the add-in and
+        delivers them like Fusion's message loop would.
+        """
+        command_input = self.inputs.itemById(input_id)
+        start = command_input.value
+        low = command_input.minimumValue if command_input.hasMinimumValue else 0.5*start
+        high = command_input.maximumValue if command_input.hasMaximumValue else 1.5*start
+        target = low+0.5*(high-low) if high > low else start
+        for step in range(1, steps+1):
+            self.change(input_id, start+(target-start)*step/steps)
+            self.preview()
+        self.settle()
+
+    def settle(self, timeout: float = 2.0):
+        """Delivers pending custom events until none arrive for a while."""
+        app = adsk.core.Application.get()
+        deadline = time.monotonic()+timeout
+        quiet_since = time.monotonic()
+        while time.monotonic() < deadline and time.monotonic()-quiet_since < 0.5:
+            if not app._pending_events.empty():
+                self.recorder.measure(self.label, 'deferred_preview', app._dispatch_custom_events)
+                quiet_since = time.monotonic()
+            time.sleep(0.005)
+
+    def execute(self):
+        args = adsk.core.CommandEventArgs(self.command)
+        self.recorder.measure(self.label, 'command_execute', self.command.execute._fire, args)
+
+    def destroy(self):
+        args = adsk.core.CommandEventArgs(self.command)
+        self.recorder.measure(self.label, 'command_destroy', self.command.destroy._fire, args)
+
+
+def run(steps: int, engine: str = 'Parametric', count: int = 2, preview: str = 'Features') -> list:
+    addin = load_addin()
+    entry = sys.modules[f'{ADDIN_PACKAGE}.commands.commandDialog.entry']
+    addin.run(None)
+    # The dialog module is imported on the first click, its cost is tracked by import_time.py instead.
+    entry.get_dialog()
+    recorder = Recorder()
+    try:
+        for texture_type in TEXTURE_TYPES:
+            session = Session(recorder, texture_type, entry.CMD_ID, engine=engine, count=count, preview=preview)
+            session.select_texture_type()
+            for input_id in VALUE_INPUTS:
+                session.drag(input_id, steps)
+            session.execute()
+            session.destroy()
+
+            cancelled = Session(recorder, texture_type, entry.CMD_ID, f'{texture_type} (cancel)', engine, count, preview)
+            cancelled.select_texture_type()
+            cancelled.destroy()
+    finally:
+        addin.stop(None)
+    return recorder.summary()
+
+
+def print_table(rows: list):
+    header = f'{"texture":<16}{"handler":<24}{"n":>5}{"wall ms":>10}{"max ms":>10}{"api calls":>11}{"sim. ms":>11}'
+    print(header)
+    print('-'*len(header))
+    for row in rows:
+        print(f'{row["texture_type"]:<16}{row["handler"]:<24}{row["invocations"]:>5}'
+              f'{row["wall_ms_mean"]:>10.2f}{row["wall_ms_max"]:>10.2f}'
+              f'{row["api_calls_mean"]:>11.0f}{row["simulated_ms_mean"]:>11.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=10, help='Intermediate values per dragged input.')
+    parser.add_argument('--engine', default='Parametric', choices=['Parametric', 'Base feature'])
+    parser.add_argument('--preview', default='Features', choices=['Features', 'Mesh'])
+    parser.add_argument('--count', type=int, default=2, help='Instances of the texture in each direction.')
+    parser.add_argument('--json', help='Write the results to this file for tracking across changes.')
+    arguments = parser.parse_args()
+
+    rows = run(arguments.steps, arguments.engine, arguments.count, arguments.preview)
+    print_table(rows)
+    if arguments.json:
+        with open(arguments.json, 'w') as file:
+            json.dump(rows, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Throughput benchmark of the tiled heightmap export.
+
+Exports the same field with an increasing number of worker processes and reports
+the pixel rate and the peak memory of the main process and of the workers. The
+field should be large compared to a tile, otherwise starting the pool dominates.
+
+Usage:
+    python benchmarks/heightmap_export.py [--texture Dots] [--pixels 20000] [--workers 1 2 4] [--output field.npy]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lib'))
+
+from surfacetexture.tiled_export import export_heightmap
+
+# Default texture parameters of the command dialog in cm and radians.
+DEPTH = 0.1
+WIDTH = 0.1
+FLANK_ANGLE = 0.3491
+PERIOD = 0.3
+PIXEL_SIZE = 5e-4
+
+
+def peak_memory_mb(who: int) -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak = resource.getrusage(who).ru_maxrss
+    return peak/(1 << 20) if sys.platform == 'darwin' else peak/1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--texture', default='Dots', choices=('Dots', 'Lines', 'Hatch'))
+    parser.add_argument('--pixels', type=int, default=20000, help='Edge length of the square field in pixels.')
+    parser.add_argument('--tile-size', type=int, default=2048)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument('--output', help='Output file, defaults to a temporary .npy file.')
+    arguments = parser.parse_args()
+
+    output = arguments.output or os.path.join(tempfile.gettempdir(), 'heightmap_export_benchmark.npy')
+    size = (arguments.pixels*PIXEL_SIZE, arguments.pixels*PIXEL_SIZE)
+    print(f'{"workers":>8}{"seconds":>10}{"Mpixel/s":>10}{"main MB":>10}{"worker MB":>11}')
+    try:
+        for workers in sorted(set(arguments.workers)):
+            result = export_heightmap(output, arguments.texture, DEPTH, WIDTH, FLANK_ANGLE, PERIOD, size, PIXEL_SIZE,
+                                      tile_size=arguments.tile_size, workers=workers, resume=False)
+            pixels = result.shape[0]*result.shape[1]
+            print(f'{workers:>8}{result.seconds:>10.2f}{pixels/result.seconds/1e6:>10.1f}'
+                  f'{peak_memory_mb(resource.RUSAGE_SELF):>10.0f}{peak_memory_mb(resource.RUSAGE_CHILDREN):>11.0f}')
+    finally:
+        if not arguments.output and os.path.exists(output):
+            os.remove(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Startup benchmark of the add-in, run against the fake adsk modules.
+
+Every repetition starts a fresh interpreter, so nothing is cached in sys.modules, and
+measures the phases Fusion goes through:
+
+    import         -- the add-in package is imported
+    run            -- run() registers the commands
+    first command  -- the first click on the button, which imports the dialog module
+    second command -- a later click
+
+For every phase it reports the median wall time, the number of modules imported by it
+and whether NumPy is loaded at its end. Import and run are paid by every Fusion session,
+so they should stay free of NumPy and the geometry code.
+
+Usage:
+    python benchmarks/import_time.py [--repeat N] [--json results.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PHASES = ('import', 'run', 'first command', 'second command')
+
+
+def measure() -> list:
+    """Runs the phases once in this interpreter and returns one row per phase."""
+    import handler_latency
+    import adsk.core
+
+    rows = []
+
+    def phase(name: str, function):
+        modules = len(sys.modules)
+        start = time.perf_counter()
+        # Log messages of the add-in are not shown between the results.
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = function()
+        rows.append({'phase': name, 'wall_ms': (time.perf_counter()-start)*1000,
+                     'modules': len(sys.modules)-modules, 'numpy_loaded': 'numpy' in sys.modules})
+        return result
+
+    addin = phase('import', handler_latency.load_addin)
+    phase('run', lambda: addin.run(None))
+    entry = sys.modules[f'{handler_latency.ADDIN_PACKAGE}.commands.commandDialog.entry']
+    app = adsk.core.Application.get()
+    for name in PHASES[2:]:
+        app._design = None
+        definition = app.userInterface.commandDefinitions.itemById(entry.CMD_ID)
+        phase(name, definition.execute)
+        command = app.userInterface.commandDefinitions._last_command
+        with contextlib.redirect_stdout(io.StringIO()):
+            command.destroy._fire(adsk.core.CommandEventArgs(command))
+    with contextlib.redirect_stdout(io.StringIO()):
+        addin.stop(None)
+    return rows
+
+
+def run(repeat: int) -> list:
+    """Measures the phases in repeat fresh interpreters and returns the median of every phase."""
+    samples = {name: [] for name in PHASES}
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'],
+                                check=True, capture_output=True, text=True).stdout
+        for row in json.loads(output.splitlines()[-1]):
+            samples[row['phase']].append(row)
+    return [{
+        'phase': name,
+        'wall_ms_median': statistics.median(row['wall_ms'] for row in rows),
+        'wall_ms_max': max(row['wall_ms'] for row in rows),
+        'modules': rows[-1]['modules'],
+        'numpy_loaded': rows[-1]['numpy_loaded'],
+    } for name, rows in samples.items()]
+
+
+def print_table(rows: list):
+    header = f'{"phase":<16}{"median ms":>11}{"max ms":>10}{"modules":>9}{"numpy":>7}'
+    print(header)
+    print('-'*len(header))
+    for row in rows:
+        print(f'{row["phase"]:<16}{row["wall_ms_median"]:>11.1f}{row["wall_ms_max"]:>10.1f}'
+              f'{row["modules"]:>9}{"yes" if row["numpy_loaded"] else "no":>7}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters to measure in.')
+    parser.add_argument('--json', help='Write the results to this file for tracking across changes.')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.child:
+        print(json.dumps(measure()))
+        return
+    rows = run(arguments.repeat)
+    print_table(rows)
+    if arguments.json:
+        with open(arguments.json, 'w') as file:
+            json.dump(rows, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Throughput benchmark of the patch mesh writers.
+
+Builds a closed patch of N by N periods of every texture type with the default
+parameters of the command dialog and writes it as binary STL and as 3MF.
+
+Usage:
+    python benchmarks/mesh_export.py [--count 1000] [--tolerance 0.001] [--output-dir DIR]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lib'))
+
+from surfacetexture.mesh import patch_mesh, write_mesh
+
+# Default texture parameters of the command dialog in cm and radians.
+DEPTH = 0.1
+WIDTH = 0.1
+FLANK_ANGLE = 0.3491
+PERIOD = 0.3
+THICKNESS = 0.5
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=1000, help='Periods along each side of the patch.')
+    parser.add_argument('--tolerance', type=float, default=1e-3, help='Chord tolerance of the profile arcs in cm.')
+    parser.add_argument('--textures', nargs='+', default=['Lines', 'Hatch', 'Dots'])
+    parser.add_argument('--formats', nargs='+', default=['.stl', '.3mf'])
+    parser.add_argument('--output-dir', help='Keep the files in this folder instead of deleting them.')
+    arguments = parser.parse_args()
+
+    directory = arguments.output_dir or tempfile.gettempdir()
+    print(f'{"texture":<8}{"format":<8}{"triangles":>12}{"seconds":>10}{"Mtri/s":>9}{"MB":>9}')
+    for texture_type in arguments.textures:
+        patch = patch_mesh(texture_type, DEPTH, WIDTH, FLANK_ANGLE, PERIOD, arguments.count, arguments.count,
+                           arguments.tolerance, THICKNESS)
+        for extension in arguments.formats:
+            path = os.path.join(directory, f'patch_{texture_type.lower()}{extension}')
+            start = time.perf_counter()
+            write_mesh(path, patch)
+            seconds = time.perf_counter()-start
+            size = os.path.getsize(path)/(1 << 20)
+            if not arguments.output_dir:
+                os.remove(path)
+            print(f'{texture_type:<8}{extension:<8}{patch.triangle_count:>12}{seconds:>10.2f}'
+                  f'{patch.triangle_count/seconds/1e6:>9.2f}{size:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Checks the API calls counted by the trace recorder against the fake adsk modules.
+
+The handlers are driven like in handler_latency.py with TRACE_API_CALLS turned on. For
+every outermost span the calls counted by the recorder are compared with the public
+member accesses of the add-in the fake recorded in its ledger while the span was open.
+Special methods such as __len__ are counted by the recorder but not recorded by the fake,
+so they are left out, as are the internal calls of the fake.
+
+The fake records methods when they are looked up and the recorder counts them when they
+are called, under the class that defines them. Differences in methods are listed for
+inspection, e.g. add_handler looks up Event.add once more to read its annotations. The
+script exits with status 1 if the reads and writes of any other member differ.
+
+Usage:
+    python benchmarks/trace_counts.py [--steps N] [--engine ENGINE] [--preview MODE]
+"""
+
+import argparse
+import collections
+import contextlib
+import io
+import sys
+
+import handler_latency
+import adsk.core
+import adsk.fusion
+from adsk._fake import ledger
+
+
+def is_special(name: str) -> bool:
+    return name.rsplit('.', 1)[-1].startswith('__')
+
+
+def is_method(name: str) -> bool:
+    class_name, member = name.rsplit('.', 1)
+    for module in (adsk.core, adsk.fusion):
+        if hasattr(module, class_name):
+            return callable(getattr(getattr(module, class_name), member, None))
+    return False
+
+
+def run(steps: int, engine: str, preview: str) -> list:
+    """Runs the handlers and returns the counted and recorded calls of every outermost span."""
+    futil = handler_latency.load_addin().lib.fusion360utils
+    recorder = futil.get_recorder()
+    recorder.enabled = True
+    recorder.count_api_calls = True
+    record_span = recorder.span
+    results = []
+
+    @contextlib.contextmanager
+    def span(name: str, category: str = ''):
+        if recorder._stack():
+            with record_span(name, category):
+                yield
+            return
+        mark = ledger.mark()
+        with record_span(name, category):
+            yield
+        calls = recorder.spans()[-1].api_calls
+        results.append((name, collections.Counter({call: count for call, count in calls.items() if not is_special(call)}),
+                        collections.Counter(call.name for call in ledger.since(mark) if not call.internal)))
+
+    recorder.span = span
+    try:
+        handler_latency.run(steps, engine, preview=preview)
+    finally:
+        recorder.span = record_span
+        recorder.count_api_calls = False
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=2, help='Intermediate values per dragged input.')
+    parser.add_argument('--engine', default='Parametric', choices=['Parametric', 'Base feature'])
+    parser.add_argument('--preview', default='Features', choices=['Features', 'Mesh'])
+    arguments = parser.parse_args()
+
+    # Log messages of the add-in are not shown between the results.
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = run(arguments.steps, arguments.engine, arguments.preview)
+    totals = collections.defaultdict(lambda: [0, 0, 0])
+    differences = collections.Counter()
+    for name, counted, recorded in results:
+        row = totals[name]
+        row[0] += 1
+        row[1] += sum(counted.values())
+        row[2] += sum(recorded.values())
+        differences.update(counted)
+        differences.subtract(recorded)
+
+    header = f'{"span":<28}{"n":>5}{"counted":>10}{"recorded":>10}'
+    print(header)
+    print('-'*len(header))
+    for name, (spans, counted, recorded) in totals.items():
+        print(f'{name:<28}{spans:>5}{counted:>10}{recorded:>10}')
+    differences = {call: count for call, count in differences.items() if count}
+    methods = {call: count for call, count in differences.items() if is_method(call)}
+    members = {call: count for call, count in differences.items() if call not in methods}
+    for title, calls in (('Methods', methods), ('Properties', members)):
+        if calls:
+            print(f'\n{title} counted (+) or recorded (-) more often:')
+            for call, count in sorted(calls.items()):
+                print(f'  {count:+6d} {call}')
+    sys.exit(1 if members else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+import math
+
+import adsk.core
+import adsk.fusion
+
+from ...lib.surfacetexture import groove_profile, pattern_plan, uv_layout
+from ...lib.surfacetexture.cell_cache import CellCache, cell_key
+
+
+class BRepTextureBuilder:
+    '''Builds the texture bodies as transient B-rep bodies with the TemporaryBRepManager.
+
+    The bodies are the same as the ones of the parametric features: the groove profile of the feature
+    sketch revolved around the z axis for Dots and extruded along y for Lines, Hatch adds a copy of the
+    line rotated by 90 degrees. Neither revolve nor extrude exist for transient bodies, so the groove is
+    put together from primitives. The flanks are a cone for Dots and a box cut by the two flank planes
+    for Lines, the bottom arc is a sphere or a cylinder. Every cell spans one period centered on its site
+    at (i*period, j*period), the top surface lies at z = 0 and the groove extends towards negative z.
+
+    With a cache the cell of every parameter set is modelled once and exported as SMT file, later
+    builds import it instead. The cells are replicated by the doubling plan of pattern_plan and united in memory, so N by M cells
+    take about 2*(log2 N + log2 M) boolean operations. Nothing is added to the timeline before the result
+    is inserted by the caller.
+    '''
+
+    def __init__(self, depth : float, width : float, flank_angle : float, period : float, cache : CellCache = None,
+                 period_y : float = None):
+        self.depth = depth
+        self.width = width
+        self.flank_angle = flank_angle
+        self.period = period
+        # Extent of the cells along y, differs from period for the rows of a rectangular lattice.
+        self.period_y = period if period_y is None else period_y
+        self.radius = float(groove_profile.calculate_radius(depth, width, flank_angle))
+        self.tangent_x, self.tangent_z = (float(value) for value in groove_profile.tangent_points(depth, width, flank_angle))
+        self.cache = cache
+        self._manager = adsk.fusion.TemporaryBRepManager.get()
+        # Number of boolean operations of the last build.
+        self.boolean_count = 0
+
+    def build(self, texture_type : str, count_x : int, count_y : int) -> adsk.fusion.BRepBody:
+        '''Returns the transient body of count_x by count_y cells of the given texture type.'''
+        self.boolean_count = 0
+        return self.replicate(self.cell(texture_type), count_x, count_y)
+
+    def cell(self, texture_type : str) -> adsk.fusion.BRepBody:
+        '''Returns the transient body of one cell, imported from the cache if it holds the cell.'''
+        if self.cache is None:
+            return self.model_cell(texture_type)
+
+        kind = "cell.smt"
+        extra = {} if self.period_y == self.period else {'period_y': self.period_y}
+        key = cell_key(texture_type, kind, self.depth, self.width, self.flank_angle, self.period, **extra)
+        path = self.cache.get(key, kind)
+        if path is not None:
+            bodies = self._manager.createFromFile(path)
+            if bodies is not None and bodies.count == 1:
+                return bodies.item(0)
+
+        cell = self.model_cell(texture_type)
+
+        def export(path : str):
+            if not self._manager.exportToFile([cell], path):
+                raise OSError(f'The cell could not be exported to {path}.')
+
+        self.cache.store(key, kind, export)
+        return cell
+
+    def model_cell(self, texture_type : str) -> adsk.fusion.BRepBody:
+        '''Models the transient body of one cell from primitives.'''
+        match texture_type:
+            case "Dots":
+                return self.dot()
+            case "Lines":
+                return self.line(self.period_y)
+            case "Hatch":
+                cell = self.line(self.period_y)
+                cross = self.line(self.period)
+                rotation = adsk.core.Matrix3D.create()
+                rotation.setToRotation(math.pi/2, adsk.core.Vector3D.create(0, 0, 1), adsk.core.Point3D.create(0, 0, 0))
+                self._manager.transform(cross, rotation)
+                self._unite(cell, cross)
+                return cell
+            case _:
+                raise ValueError(f'Unknown texture type: {texture_type}')
+
+    def dot(self) -> adsk.fusion.BRepBody:
+        '''Returns the groove revolved around the z axis.'''
+        points = adsk.core.Point3D
+        cap = self._manager.createSphere(points.create(0, 0, self.radius-self.depth), self.radius)
+        # The sphere may reach above the top surface, it is trimmed to the groove.
+        self._intersect(cap, self._manager.createCylinderOrCone(
+            points.create(0, 0, 0), self.width/2, points.create(0, 0, -self.depth), self.width/2))
+        if self.tangent_z <= 0:
+            return cap
+        flank = self._manager.createCylinderOrCone(
+            points.create(0, 0, 0), self.width/2, points.create(0, 0, -self.tangent_z), self.tangent_x)
+        self._unite(flank, cap)
+        return flank
+
+    def line(self, length : float) -> adsk.fusion.BRepBody:
+        '''Returns the groove extruded along y over the given length.'''
+        points = adsk.core.Point3D
+        cap = self._manager.createCylinderOrCone(points.create(0, -length/2, self.radius-self.depth), self.radius,
+                                                 points.create(0, length/2, self.radius-self.depth), self.radius)
+        self._intersect(cap, self._box(self.width, length, 0, -self.depth))
+        if self.tangent_z <= 0:
+            return cap
+
+        flank = self._box(self.width, length, 0, -self.tangent_z)
+        # The flanks run from (+-width/2, 0) to (+-tangent_x, -tangent_z), the normals point into the groove.
+        size = 4*(self.width+self.depth)
+        for side in (1, -1):
+            normal = adsk.core.Vector3D.create(-side*self.tangent_z, 0, self.width/2-self.tangent_x)
+            normal.normalize()
+            self._intersect(flank, self._half_space(points.create(side*self.width/2, 0, 0), normal, size, length))
+        self._unite(flank, cap)
+        return flank
+
+    def replicate(self, cell : adsk.fusion.BRepBody, count_x : int, count_y : int) -> adsk.fusion.BRepBody:
+        '''Returns the union of count_x by count_y copies of the cell, one period apart.'''
+        # Each step of the plan copies the union of the cell and a prefix of the earlier steps, so the
+        # unions of all prefixes are kept.
+        prefixes = [cell]
+        for step in pattern_plan.plan_pattern(count_x, count_y, 1):
+            source = prefixes[step.sources]
+            total = self._manager.copy(prefixes[-1])
+            for a in range(step.quantity_one):
+                for b in range(step.quantity_two):
+                    if a == b == 0:
+                        continue
+                    instance = self._manager.copy(source)
+                    translation = adsk.core.Matrix3D.create()
+                    translation.translation = adsk.core.Vector3D.create(
+                        a*step.spacing_one*self.period, b*step.spacing_two*self.period, 0)
+                    self._manager.transform(instance, translation)
+                    self._unite(total, instance)
+            prefixes.append(total)
+        return prefixes[-1]
+
+    def build_placed(self, texture_type : str, placements : uv_layout.Placements) -> adsk.fusion.BRepBody:
+        '''Returns the union of copies of the cell moved into the frames of the placements, e.g. the sites
+        of a texture laid out on a curved face. Copies are united pairwise, so the operands of every
+        boolean stay about as large as each other.
+        '''
+        self.boolean_count = 0
+        cell = self.cell(texture_type)
+        bodies = []
+        for matrix in placements.matrices():
+            instance = self._manager.copy(cell)
+            transform = adsk.core.Matrix3D.create()
+            transform.setWithArray(matrix.ravel().tolist())
+            self._manager.transform(instance, transform)
+            bodies.append(instance)
+        if not bodies:
+            raise ValueError('There are no placements to build.')
+        while len(bodies) > 1:
+            for target, tool in zip(bodies[::2], bodies[1::2]):
+                self._unite(target, tool)
+            bodies = bodies[::2]
+        return bodies[0]
+
+    def _box(self, size_x : float, size_y : float, top : float, bottom : float) -> adsk.fusion.BRepBody:
+        '''Returns the box of the given size centered on the z axis between the heights top and bottom.'''
+        box = adsk.core.OrientedBoundingBox3D.create(
+            adsk.core.Point3D.create(0, 0, (top+bottom)/2), adsk.core.Vector3D.create(1, 0, 0),
+            adsk.core.Vector3D.create(0, 1, 0), size_x, size_y, top-bottom)
+        return self._manager.createBox(box)
+
+    def _half_space(self, point : adsk.core.Point3D, normal : adsk.core.Vector3D, size : float, length : float) -> adsk.fusion.BRepBody:
+        '''Returns a box on the side of the plane through point that the normal points to. The normal must
+        be perpendicular to the y axis, the box spans size across the plane and twice the length along y.
+        '''
+        along_y = adsk.core.Vector3D.create(0, 1, 0)
+        in_plane = along_y.crossProduct(normal)
+        center = adsk.core.Point3D.create(point.x+normal.x*size/2, point.y, point.z+normal.z*size/2)
+        box = adsk.core.OrientedBoundingBox3D.create(center, in_plane, along_y, size, 2*length, size)
+        return self._manager.createBox(box)
+
+    def _unite(self, target : adsk.fusion.BRepBody, tool : adsk.fusion.BRepBody):
+        self._manager.booleanOperation(target, tool, adsk.fusion.BooleanTypes.UnionBooleanType)
+        self.boolean_count += 1
+
+    def _intersect(self, target : adsk.fusion.BRepBody, tool : adsk.fusion.BRepBody):
+        self._manager.booleanOperation(target, tool, adsk.fusion.BooleanTypes.IntersectionBooleanType)
+        self.boolean_count += 1
@@ -0,0 +1,1387 @@
+import adsk.core
+import os
+
+import adsk.fusion
+from ...lib import fusion360utils as futil
+from ...lib.surfacetexture import batch_table, groove_profile, pattern_plan, uv_layout
+from ...lib.surfacetexture.cell_cache import CellCache
+from ...lib.surfacetexture.feasible_region import project_parameters
+from ...lib.surfacetexture.lattice import LATTICE_TYPES, Lattice, make_lattice, lattice_center, lattice_placements, nearest_land_width
+from ...lib.surfacetexture.metrics import texture_metrics
+from ...lib.surfacetexture.overlap_check import check_overlaps
+from ... import config
+from .entry import CMD_ID, CMD_NAME, ICON_FOLDER
+from .session import TextureSession
+from .texture_settings import DEFAULT_SETTINGS, TextureSettings
+from .preview_throttle import PreviewThrottle
+from .brep_texture import BRepTextureBuilder
+from .mesh_preview import MeshPreview
+import math
+import time
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# Custom event used to request a preview that was postponed by the preview throttle.
+PREVIEW_EVENT_ID = f'{CMD_ID}_deferred_preview'
+
+# Inputs whose changes are coalesced before a preview is built.
+VALUE_INPUT_IDS = ('texture_period_input', 'texture_period_y_input', 'texture_depth_input', 'texture_width_input',
+                   'texture_flank_angle_input', 'texture_count_x_input', 'texture_count_y_input')
+
+# Parameters kept by the projection onto the feasible region when their input was changed last.
+FIXED_BY_INPUT = {'texture_depth_input': 'depth', 'texture_width_input': 'width'}
+
+# Largest number of instances in each direction offered by the dialog.
+MAX_PATTERN_COUNT = 10000
+
+# Inputs of the texture user parameters.
+PARAMETER_INPUT_IDS = {'Texture_depth': 'texture_depth_input', 'Texture_width': 'texture_width_input',
+                       'Texture_flank_angle': 'texture_flank_angle_input', 'Texture_period': 'texture_period_input'}
+
+# Units the texture user parameters are created with.
+PARAMETER_UNITS = {'Texture_depth': 'mm', 'Texture_width': 'mm', 'Texture_flank_angle': 'degree', 'Texture_period': 'mm'}
+
+# Local list of event handlers used to maintain a reference so
+# they are not released and garbage collected.
+local_handlers = []
+_selected_ok = False
+_texture_selector_changed = False
+_input_changed_id = ""
+# Texture type, instance counts and build engine of the features kept from the last preview, None if there are none.
+_built_texture_type = None
+_built_pattern_counts = None
+_built_engine = None
+# Lattice the texture of the last preview was built on.
+_built_lattice : Lattice = None
+# Dimensions the base feature of the last preview was built with, its bodies do not follow the user parameters.
+_built_dimensions = None
+# True once the feature sketch of this command exists, it is only created for parametric features.
+_sketch_created = False
+# Custom graphics shown by the mesh preview mode.
+_mesh_preview : MeshPreview = None
+# Session holding the references to the parameters and features of the active design.
+_session : TextureSession = None
+_command : adsk.core.Command = None
+_preview_throttle : PreviewThrottle = None
+# Cache of the unit cells modelled by the base feature engine, shared by all commands of the add-in.
+_cell_cache : CellCache = None
+# Margins of the parameter limits derived from the unit precision, read once per command.
+_distance_margin = 0.0
+_angle_margin = 0.0
+# Table of texture variants that is built on OK instead of the texture of the dialog, None if there is none.
+_batch_table_path : str = None
+# Timeline positions taken by timeline_mark before the first feature of this command and before the features of
+# the last texture build. None if nothing was built yet or the design has no history.
+_command_timeline : tuple = None
+_texture_timeline : tuple = None
+# Names of the user parameters created by this command, they are deleted again on cancel.
+_created_parameters = []
+# Design the jobs of run_batch_table are built into, None while the texture is built into the active design.
+_batch_design : adsk.fusion.Design = None
+
+# Called by entry.command_created when a user clicks the corresponding button in the UI.
+# This defines the contents of the command dialog and connects to the command related events.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    # General logging for debug.
+    futil.log('%s Command Created Event', args=(CMD_NAME,))
+
+    design : adsk.fusion.Design = app.activeProduct
+    userParams = design.userParameters
+    
+    global _selected_ok, _built_texture_type, _built_pattern_counts, _built_engine, _built_lattice, _built_dimensions, _session
+    global _sketch_created, _mesh_preview, _batch_table_path, _command_timeline, _texture_timeline, _created_parameters
+    _selected_ok = False
+    _batch_table_path = None
+    _command_timeline = None
+    _texture_timeline = None
+    _sketch_created = False
+    _mesh_preview = MeshPreview(config.PREVIEW_MESH_MAX_INSTANCES)
+    _built_texture_type = None
+    _built_pattern_counts = None
+    _built_engine = None
+    _built_lattice = None
+    _built_dimensions = None
+    _session = TextureSession(design)
+    cache_unit_precision()
+
+    # https://help.autodesk.com/view/fusion360/ENU/?contextId=CommandInputs
+    inputs : adsk.core.CommandInputs = args.command.commandInputs
+
+    # TODO Define the dialog for your command by adding different inputs to the command.
+    
+    # Create user parameters with standard input values or take over existing ones.
+    _created_parameters = [name for name in PARAMETER_INPUT_IDS if not userParams.itemByName(name)]
+    if not userParams.itemByName("Texture_period"):
+        default_period_value = adsk.core.ValueInput.createByString("3 mm")
+        userParams.add("Texture_period", default_period_value, "mm", "")
+    else:
+        default_period_value = adsk.core.ValueInput.createByString(userParams.itemByName("Texture_period").expression)
+
+    if not userParams.itemByName("Texture_depth"):
+        default_depth = adsk.core.ValueInput.createByString("1 mm")
+        userParams.add("Texture_depth", default_depth, "mm", "")
+    else:
+        default_depth = adsk.core.ValueInput.createByString(userParams.itemByName("Texture_depth").expression)
+
+    if not userParams.itemByName("Texture_width"):
+        default_width = adsk.core.ValueInput.createByString("1 mm")
+        userParams.add("Texture_width", default_width, "mm", "")
+    else:
+        default_width = adsk.core.ValueInput.createByString(userParams.itemByName("Texture_width").expression)
+
+    if not userParams.itemByName("Texture_flank_angle"):
+        default_angle_value = adsk.core.ValueInput.createByString("20 degree")
+        userParams.add("Texture_flank_angle", default_angle_value, "degree", "")
+    else:
+        default_angle_value = adsk.core.ValueInput.createByString(userParams.itemByName("Texture_flank_angle").expression)
+
+    # Create dropdown menu for texture type
+    texture_selector = inputs.addDropDownCommandInput('texture_type_input', 'Texture type', adsk.core.DropDownStyles.LabeledIconDropDownStyle)
+    texture_types = texture_selector.listItems
+    texture_types.add('Dots', True, '')
+    texture_types.add('Lines', False, '')
+    texture_types.add('Hatch', False, '')
+
+    # Create dropdown menu for the build engine. The base feature engine builds the bodies outside of the
+    # timeline and inserts them as a single feature without parametric history.
+    engine_selector = inputs.addDropDownCommandInput('texture_engine_input', 'Build engine', adsk.core.DropDownStyles.TextListDropDownStyle)
+    engine_selector.listItems.add('Parametric', True, '')
+    engine_selector.listItems.add('Base feature', False, '')
+
+    # Create dropdown menu for the lattice of the instances, see lib/surfacetexture/lattice.py. Pattern
+    # features only repeat along two directions, so all lattices but Square use the base feature engine.
+    lattice_selector = inputs.addDropDownCommandInput('texture_lattice_input', 'Lattice', adsk.core.DropDownStyles.TextListDropDownStyle)
+    for lattice_type in LATTICE_TYPES:
+        lattice_selector.listItems.add(lattice_type, lattice_type == 'Square', '')
+
+    # Create image to label texture-specific parameters
+    imagefile = os.path.join(ICON_FOLDER, 'ExamplePicture.png')
+    inputs.addImageCommandInput('texture_image', '', imagefile)
+
+    # Create a value input field for the texture period and set the default using 1 unit of the default length unit.
+    period_input = inputs.addDistanceValueCommandInput('texture_period_input', 'Texture period', default_period_value)
+    period_input.minimumValue = 0.0
+    period_input.isMinimumValueInclusive = False
+    period_input.setManipulator(adsk.core.Point3D.create(0,0,0), adsk.core.Vector3D.create(0,1,0))
+
+    # Create a value input field for the distance of the rows, only used by the Rectangular and Staggered lattices.
+    period_y_input = inputs.addDistanceValueCommandInput('texture_period_y_input', 'Period in Y', adsk.core.ValueInput.createByReal(period_input.value))
+    period_y_input.minimumValue = 0.0
+    period_y_input.isMinimumValueInclusive = False
+    period_y_input.isVisible = False
+
+    # Create a distance input field for the texture depth and set the default to 1 mm. Set the 3D manipulator in depth direction.
+    depth_input = inputs.addDistanceValueCommandInput('texture_depth_input', 'Texture depth', default_depth)
+    depth_input.isMinimumValueInclusive = False
+    depth_input.isMaximumValueInclusive = False
+    depth_input.setManipulator(adsk.core.Point3D.create(0,0,0), adsk.core.Vector3D.create(0,0,-1))
+    
+    # Create a distance input field for the flank width and set the default to 2 mm. Set the 3D manipulator in width direction.
+    width_input = inputs.addDistanceValueCommandInput('texture_width_input', 'Texture width', default_width)
+    width_input.isMinimumValueInclusive = False
+    width_input.isMaximumValueInclusive = False
+    width = width_input.value
+    width_input.setManipulator(adsk.core.Point3D.create(-width/2,0,0), adsk.core.Vector3D.create(1,0,0))
+
+    # Create an angle input field for the flank angle and set the default to 1 mm. Set the 3D manipulator on the X-Z-plane.
+    flank_angle_input = inputs.addAngleValueCommandInput('texture_flank_angle_input', 'Flank angle', default_angle_value)
+    flank_angle_input.isMaximumValueInclusive = False
+    flank_angle_input.isMinimumValueInclusive = True
+    flank_angle_input.setManipulator(adsk.core.Point3D.create(width/2,0,0), adsk.core.Vector3D.create(0,0,-1), adsk.core.Vector3D.create(-1,0,0))
+
+    # Create a selection input for the face the texture is cut into on OK. Without a face the
+    # tool bodies are kept at the origin of the active component.
+    face_input = inputs.addSelectionInput('texture_face_input', 'Target face', 'Select the face to texture')
+    face_input.addSelectionFilter('PlanarFaces')
+    face_input.setSelectionLimits(0, 1)
+
+    # Create dropdown menu for the mapping onto the face. Face UV lays the lattice out in the parameter
+    # space of any face, see lib/surfacetexture/uv_layout.py, and fills the face instead of using the counts.
+    mapping_selector = inputs.addDropDownCommandInput('texture_mapping_input', 'Mapping', adsk.core.DropDownStyles.TextListDropDownStyle)
+    mapping_selector.listItems.add('Planar', True, '')
+    mapping_selector.listItems.add('Face UV', False, '')
+
+    # Create dropdown menus for the preview mode and the fidelity of the mesh preview. The mesh preview
+    # draws custom graphics only, the features are created on OK.
+    preview_selector = inputs.addDropDownCommandInput('texture_preview_input', 'Preview', adsk.core.DropDownStyles.TextListDropDownStyle)
+    preview_selector.listItems.add('Features', True, '')
+    preview_selector.listItems.add('Mesh', False, '')
+    fidelity_selector = inputs.addDropDownCommandInput('texture_fidelity_input', 'Preview fidelity', adsk.core.DropDownStyles.TextListDropDownStyle)
+    for fidelity in config.PREVIEW_MESH_TOLERANCES:
+        fidelity_selector.listItems.add(fidelity, fidelity == 'Coarse', '')
+    fidelity_selector.isVisible = False
+
+    # Create integer inputs for the number of texture instances in both directions.
+    inputs.addIntegerSpinnerCommandInput('texture_count_x_input', 'Instances in X', 1, MAX_PATTERN_COUNT, 1, 2)
+    inputs.addIntegerSpinnerCommandInput('texture_count_y_input', 'Instances in Y', 1, MAX_PATTERN_COUNT, 1, 2)
+
+    # Create a text box for the result of the overlap check, which runs before any geometry is built.
+    inputs.addTextBoxCommandInput('texture_check_output', 'Land width', '', 1, True)
+
+    # Create a text box for the surface metrics of the texture, computed from the profile without geometry.
+    inputs.addTextBoxCommandInput('texture_metrics_output', 'Metrics', '', 2, True)
+
+    # Create a button to pick a table of texture variants, see lib/surfacetexture/batch_table.py. With a
+    # table, OK builds every row of it one after the other instead of the texture of the dialog.
+    inputs.addBoolValueInput('texture_batch_input', 'Batch table', False, '', False)
+    inputs.addTextBoxCommandInput('texture_batch_file_input', '', 'No table selected', 1, True)
+
+    region = get_feasible_region(inputs)
+    set_depth_boundaries(inputs, region)
+    set_width_boundaries(inputs, region)
+    set_flank_angle_boundaries(inputs, region)
+
+    # TODO Connect to the events that are needed by this command.
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
+    futil.add_handler(args.command.executePreview, command_preview, local_handlers=local_handlers)
+    # futil.add_handler(args.command.validateInputs, command_validate_input, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+    # Register the custom event the preview throttle fires from its timer thread.
+    global _command, _preview_throttle
+    _command = args.command
+    app.unregisterCustomEvent(PREVIEW_EVENT_ID)
+    preview_event = app.registerCustomEvent(PREVIEW_EVENT_ID)
+    futil.add_handler(preview_event, command_deferred_preview, local_handlers=local_handlers)
+    _preview_throttle = PreviewThrottle(config.PREVIEW_DEBOUNCE, config.PREVIEW_MAX_RATE, lambda: app.fireCustomEvent(PREVIEW_EVENT_ID))
+
+
+# This event handler is called when the user clicks the OK button in the command dialog or 
+# is immediately called after the created event not command inputs were created for the dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log('%s Command Execute Event', args=(CMD_NAME,))
+
+    # TODO ******************************** Your code here ********************************
+
+    # Get a reference to your command's inputs.
+    inputs = args.command.commandInputs
+
+    global _selected_ok
+    _selected_ok = True
+
+    _mesh_preview.clear()
+    if _batch_table_path is not None:
+        # Values a job leaves empty are taken from the dialog.
+        run_batch_table(_batch_table_path, get_design(), get_texture_settings(inputs))
+        return
+
+    if not project_inputs(inputs):
+        args.executeFailed = True
+        args.executeFailedMessage = 'The texture parameters do not describe a valid groove profile.'
+        return
+    set_texture_dimensions(inputs)
+    check_land_width(inputs)
+
+    # The features of the last preview follow the user parameters. Only parametric Hatch needs to be
+    # rebuilt, because its bodies are combined on execution.
+    settings = get_texture_settings(inputs)
+    if (settings.texture_type == "Hatch" and settings.build_engine == "Parametric") or not is_texture_built(settings):
+        rebuild_texture(settings)
+
+    face_input : adsk.core.SelectionCommandInput = inputs.itemById("texture_face_input")
+    if face_input.selectionCount > 0:
+        if get_mapping(inputs) == "Face UV":
+            map_texture_onto_face(inputs, face_input.selection(0).entity)
+        else:
+            cut_texture_into_face(inputs, face_input.selection(0).entity)
+
+
+# This event handler is called when the command needs to compute a new preview in the graphics window.
+def command_preview(args: adsk.core.CommandEventArgs):
+    # Drop the preview while the inputs are still changing, the throttle requests a new one later.
+    global _input_changed_id
+    if _input_changed_id and not _preview_throttle.should_build():
+        return
+    fixed = FIXED_BY_INPUT.get(_input_changed_id)
+    _input_changed_id = ""
+
+    # General logging for debug.
+    futil.log('%s Command Preview Event', args=(CMD_NAME,))
+    inputs = args.command.commandInputs
+
+    # TODO Optimisation suggestion: Use different configurations and model parameters to change the dimensions and texture type. Delete unnecessary configurations on command execution.
+    # TODO Put all the geometry changes from inputs here
+    # No geometry is built for parameters without a groove profile, they are moved to the nearest valid ones first.
+    if not project_inputs(inputs, fixed):
+        return
+    set_texture_dimensions(inputs)
+    check_land_width(inputs)
+    show_texture_metrics(inputs)
+
+    if inputs.itemById("texture_preview_input").selectedItem.name == "Mesh":
+        discard_texture()
+        show_mesh_preview(inputs)
+        return
+    _mesh_preview.clear()
+
+    # The sketch dimensions and pattern distances are driven by the user parameters set above,
+    # so the features of the last preview are kept and only rebuilt for a new texture type or instance count.
+    settings = get_texture_settings(inputs)
+    if not is_texture_built(settings):
+        rebuild_texture(settings)
+
+
+# This event handler is called when the user changes anything in the command dialog
+# allowing you to modify values of other inputs based on that change.
+def command_input_changed(args: adsk.core.InputChangedEventArgs):
+    changed_input : adsk.core.CommandInput = args.input
+    changed_input_id = changed_input.id
+
+    # General logging for debug.
+    futil.log('%s Input Changed Event fired from a change to %s', args=(CMD_NAME, changed_input.id))
+
+    inputs = args.inputs
+    previous_input = inputs.itemById(changed_input_id)
+    
+    global _input_changed_id
+    _input_changed_id = changed_input_id
+    if changed_input_id in VALUE_INPUT_IDS:
+        _preview_throttle.input_changed()
+
+    match changed_input_id:
+        case "texture_type_input":
+            # TODO Get new value of selector
+            # Change image according to new value
+            # Change parameters according to new value
+            global _texture_selector_changed
+            _texture_selector_changed = True
+
+        case "texture_preview_input":
+            inputs.itemById("texture_fidelity_input").isVisible = changed_input.selectedItem.name == "Mesh"
+
+        case "texture_lattice_input":
+            lattice_type = changed_input.selectedItem.name
+            inputs.itemById("texture_period_y_input").isVisible = lattice_type in ('Rectangular', 'Staggered')
+            # The engine dropdown only offers a choice for the square lattice.
+            engine_selector : adsk.core.DropDownCommandInput = inputs.itemById("texture_engine_input")
+            if lattice_type != 'Square':
+                select_list_item(engine_selector, "Base feature")
+            engine_selector.isEnabled = lattice_type == 'Square'
+
+        case "texture_batch_input":
+            select_batch_table(inputs)
+
+        case "texture_mapping_input":
+            # Face UV accepts curved faces, the planar mapping only planar ones.
+            face_input : adsk.core.SelectionCommandInput = inputs.itemById("texture_face_input")
+            face_input.clearSelectionFilter()
+            face_input.addSelectionFilter('Faces' if changed_input.selectedItem.name == "Face UV" else 'PlanarFaces')
+        
+        case "texture_depth_input":
+            region = get_feasible_region(inputs)
+            set_width_boundaries(inputs, region)
+            set_flank_angle_boundaries(inputs, region)
+
+        case "texture_width_input":
+            width = changed_input.value
+            flank_angle_input : adsk.core.AngleValueCommandInput = inputs.itemById("texture_flank_angle_input")
+            flank_angle_input.setManipulator(adsk.core.Point3D.create(width/2,0,0), adsk.core.Vector3D.create(0,0,-1), adsk.core.Vector3D.create(-1,0,0))
+            changed_input.setManipulator(adsk.core.Point3D.create(-width/2,0,0), adsk.core.Vector3D.create(1,0,0))
+            region = get_feasible_region(inputs)
+            set_depth_boundaries(inputs, region)
+            set_flank_angle_boundaries(inputs, region)
+
+        case "texture_flank_angle_input":
+            region = get_feasible_region(inputs)
+            set_depth_boundaries(inputs, region)
+            set_width_boundaries(inputs, region)
+
+
+# This event handler is called on the main thread when the preview throttle requests a postponed preview.
+def command_deferred_preview(args: adsk.core.CustomEventArgs):
+    if _command is not None:
+        _command.doExecutePreview()
+
+
+# This event handler is called when the user interacts with any of the inputs in the dialog
+# which allows you to verify that all of the inputs are valid and enables the OK button.
+def command_validate_input(args: adsk.core.ValidateInputsEventArgs):
+    # General logging for debug.
+    futil.log('%s Validate Input Event', args=(CMD_NAME,))
+
+    inputs = args.inputs
+    
+    # Verify the validity of the input values. This controls if the OK button is enabled or not.
+        
+
+# This event handler is called when the command terminates.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log('%s Command Destroy Event', args=(CMD_NAME,))
+
+    global _selected_ok, _built_texture_type, _built_pattern_counts, _built_engine, _built_lattice, _built_dimensions, _command
+    global _command_timeline, _texture_timeline
+    # Only the entities of this command are deleted on cancel, the names may also belong to earlier textures.
+    texture_built = _built_texture_type is not None
+    _built_texture_type = None
+    _built_pattern_counts = None
+    _built_engine = None
+    _built_lattice = None
+    _built_dimensions = None
+    _command = None
+    _preview_throttle.cancel()
+    app.unregisterCustomEvent(PREVIEW_EVENT_ID)
+    _mesh_preview.clear()
+    if not _selected_ok:
+        # Everything this command added to the timeline is deleted as one group, including the Hatch combine.
+        names = texture_feature_names() + ["Feature_Sketch"]
+        if delete_timeline_range(_command_timeline):
+            get_session().forget(names)
+        else:
+            if texture_built:
+                delete_texture_features()
+            if _sketch_created:
+                delete_sketch()
+        for name in _created_parameters:
+            parameter = get_session().parameter(name)
+            if parameter is not None:
+                parameter.deleteMe()
+    _command_timeline = None
+    _texture_timeline = None
+
+    #ui.messageBox("Destroyed")
+    global local_handlers
+    local_handlers = []
+
+
+def create_sketch(settings : TextureSettings):
+    '''This function creates the universal sketch for all the different texture types.
+    The "settings" argument describes the texture, read from the dialog or a batch job.
+    The sketch depth, width and flank angle dimension are assigned to and set by the according user parameters.
+    '''
+    
+    # Get the design
+    design : adsk.fusion.Design = get_design()
+
+    # Get the active component of the active design
+    component : adsk.fusion.Component = design.activeComponent
+
+    # Create a sketch on the yz plane
+    sketches = component.sketches
+    sketchPlane = component.xZConstructionPlane
+    sketch = sketches.add(sketchPlane)
+
+    # Get required shapes collections
+    points = adsk.core.Point3D
+    lines = sketch.sketchCurves.sketchLines
+    arcs = sketch.sketchCurves.sketchArcs
+
+    # Calculate point positions
+    flank_angle = settings.flank_angle
+    depth = settings.depth
+    width = settings.width
+
+    radius = calculate_radius(settings)
+    point_arc_X, point_arc_Y = (float(value) for value in groove_profile.tangent_points(depth, width, flank_angle))
+
+    point_0 = points.create(0, 0, 0)
+    point_width_right = points.create(width/2, 0, 0)
+    point_width_left = points.create(-width/2, 0, 0)
+    point_arc_right = points.create(point_arc_X, point_arc_Y, 0)
+    point_arc_left = points.create(-point_arc_X, point_arc_Y, 0)
+    point_arc_center = points.create(0, depth-radius, 0)
+    point_depth = points.create(0, depth, 0)
+
+    # Draw top lines
+    line_top_right = lines.addByTwoPoints(point_width_right, point_0)
+    line_top_left = lines.addByTwoPoints(point_width_left, line_top_right.endSketchPoint)
+
+    # Draw middle line
+    lineMiddle = lines.addByTwoPoints(line_top_right.endSketchPoint, point_depth)
+
+    # Draw flank lines
+    line_right = lines.addByTwoPoints(point_arc_right, line_top_right.startSketchPoint)
+    line_left = lines.addByTwoPoints(point_arc_left, line_top_left.startSketchPoint)
+
+    # Draw bottom arcs
+    arc_right = arcs.addByCenterStartEnd(point_arc_center, line_right.startSketchPoint, lineMiddle.endSketchPoint)
+    arc_left = arcs.addByCenterStartEnd(point_arc_center, lineMiddle.endSketchPoint, line_left.startSketchPoint)
+
+    midline = sketch.project(component.zConstructionAxis).item(0)
+    midline.isCenterLine = True
+
+    topRef = sketch.project(component.xConstructionAxis).item(0)
+    topRef.isConstruction = True
+
+    # Get geometric constraints collection
+    geomConstraints = sketch.geometricConstraints
+
+    # Tangent constraints of arc
+    geomConstraints.addTangent(arc_right, line_right)
+
+    # Coincident constraints
+    geomConstraints.addCoincident(line_top_right.endSketchPoint, topRef)
+    geomConstraints.addCoincident(line_top_right.startSketchPoint, topRef)
+    geomConstraints.addCoincident(line_top_left.startSketchPoint, topRef)
+
+    # Coincident constraint arc center on middle line
+    geomConstraints.addCoincident(arc_right.centerSketchPoint, midline)
+    geomConstraints.addCoincident(arc_left.centerSketchPoint, arc_right.centerSketchPoint)
+
+    # Collinear constraints
+    geomConstraints.addCollinear(lineMiddle, midline)
+
+    # Equal constraint
+    geomConstraints.addEqual(line_top_right, line_top_left)
+
+    # Horizontal constraint
+    geomConstraints.addHorizontalPoints(line_left.startSketchPoint, line_right.startSketchPoint)
+
+    # Add sketch dimensions
+    dimensions = sketch.sketchDimensions
+    flankAngleDimension = dimensions.addAngularDimension(line_top_right, line_right, points.create(width/4,depth/2,0))
+    widthDimension = dimensions.addDistanceDimension(line_top_right.startSketchPoint, line_top_left.startSketchPoint, 1, points.create(0,-0.02,0))
+    depthDimension = dimensions.addDistanceDimension(lineMiddle.endSketchPoint, lineMiddle.startSketchPoint, 2, points.create(0.02,0.02,0))
+    
+    # Add attribute to retrieve the sketch later
+    get_session().register("Feature_Sketch", sketch)
+
+    # Connect the sketch dimesions to the user parameters
+    flankAngleDimension.parameter.expression = "90 - Texture_flank_angle"
+    depthDimension.parameter.expression = "Texture_depth"
+    widthDimension.parameter.expression = "Texture_width"
+
+    # futil.log(f'{CMD_NAME} Sketch created')
+
+def calculate_radius(settings : TextureSettings) -> float:
+    return float(groove_profile.calculate_radius(settings.depth, settings.width, settings.flank_angle))
+
+def create_texture(settings : TextureSettings):
+    texture_type = settings.texture_type
+
+    if settings.build_engine == "Base feature":
+        make_base_feature(settings)
+        return
+
+    match texture_type:
+        case "Dots":
+            make_dots(settings)
+            create_rectangular_pattern(settings)
+        case "Lines":
+            make_line(settings)
+            create_rectangular_pattern(settings)
+        case "Hatch":
+            make_line(settings)
+            create_circular_pattern(settings)
+            create_rectangular_pattern(settings)
+
+def is_texture_built(settings : TextureSettings) -> bool:
+    '''Returns True if the features of the last preview exist and match the texture type and instance counts.'''
+    texture_type = settings.texture_type
+    engine = settings.build_engine
+    if _built_texture_type != texture_type or _built_pattern_counts != settings.pattern_counts or _built_engine != engine:
+        return False
+
+    if engine == "Base feature":
+        base_feature = get_base_feature()
+        if _built_lattice != settings.lattice or _built_dimensions != settings.dimensions:
+            return False
+        return base_feature is not None and base_feature.isValid
+
+    match texture_type:
+        case "Dots":
+            features = [get_revolve_feature()]
+        case "Lines":
+            features = [get_extrude_feature()]
+        case "Hatch":
+            features = [get_extrude_feature(), get_circular_pattern_feature()]
+        case _:
+            return False
+    patterns = get_rectangular_patterns()
+    if len(patterns) != len(get_pattern_steps(settings)):
+        return False
+    return all(feature is not None and feature.isValid for feature in features + patterns)
+
+@futil.traced
+def rebuild_texture(settings : TextureSettings):
+    '''Deletes the texture features of the last preview and creates them for the selected texture type.
+    The feature sketch is kept, it is the same for all texture types.
+    '''
+    global _built_texture_type, _built_pattern_counts, _built_engine, _built_lattice, _built_dimensions, _sketch_created
+    global _command_timeline, _texture_timeline
+    # Texture features found in the design before this command built any belong to earlier commands.
+    if _built_texture_type is not None:
+        delete_texture_features()
+    if _command_timeline is None:
+        _command_timeline = timeline_mark()
+    if settings.build_engine == "Parametric" and not _sketch_created:
+        create_sketch(settings)
+        _sketch_created = True
+    _texture_timeline = timeline_mark()
+    create_texture(settings)
+    _built_texture_type = settings.texture_type
+    _built_pattern_counts = settings.pattern_counts
+    _built_engine = settings.build_engine
+    _built_lattice = settings.lattice
+    _built_dimensions = settings.dimensions
+
+@futil.traced
+def discard_texture():
+    '''Deletes the texture features of the last preview, if there are any.'''
+    global _built_texture_type, _built_pattern_counts, _built_engine, _built_lattice, _built_dimensions
+    if _built_texture_type is None:
+        return
+    delete_texture_features()
+    _built_texture_type = None
+    _built_pattern_counts = None
+    _built_engine = None
+    _built_lattice = None
+    _built_dimensions = None
+
+@futil.traced
+def show_mesh_preview(inputs : adsk.core.CommandInputs):
+    '''Draws the texture as custom graphics mesh with the fidelity selected in the dialog.'''
+    design : adsk.fusion.Design = app.activeProduct
+    fidelity = inputs.itemById("texture_fidelity_input").selectedItem.name
+    texture_type = inputs.itemById("texture_type_input").selectedItem.name
+    count_x, count_y = get_pattern_counts(inputs)
+    shown_x, shown_y = _mesh_preview.show(design.activeComponent, texture_type,
+                                          inputs.itemById("texture_depth_input").value,
+                                          inputs.itemById("texture_width_input").value,
+                                          inputs.itemById("texture_flank_angle_input").value,
+                                          inputs.itemById("texture_period_input").value,
+                                          count_x, count_y, config.PREVIEW_MESH_TOLERANCES[fidelity],
+                                          get_lattice(inputs))
+    if (shown_x, shown_y) != (count_x, count_y):
+        futil.log(f'{CMD_NAME}: mesh preview limited to {shown_x} x {shown_y} of {count_x} x {count_y} instances')
+
+def get_design() -> adsk.fusion.Design:
+    '''Returns the design the texture is built into, the active one unless a batch table is run into another.'''
+    if _batch_design is not None:
+        return _batch_design
+    return app.activeProduct
+
+def get_session() -> TextureSession:
+    '''Returns the session of the design the texture is built into and starts a new one if that design changed.'''
+    global _session
+    design = _batch_design if _batch_design is not None else adsk.fusion.Design.cast(app.activeProduct)
+    if _session is None or _session.design != design:
+        _session = TextureSession(design)
+    return _session
+
+def feature_getter(attribute_name:str):
+    return get_session().get(attribute_name)
+
+def get_feature_sketch() -> adsk.fusion.Sketch:
+    return feature_getter("Feature_Sketch")
+
+def get_extrude_feature() -> (adsk.fusion.ExtrudeFeature | None):
+    return feature_getter("ExtrudeFeature")
+
+# General setter function for dimensions
+def dimension_setter(parameter_name : str, value : float):
+    to_set = get_session().parameter(parameter_name)
+    if to_set.value != value:
+        to_set.value = float(value)
+        # futil.log(f'{CMD_NAME}: {parameter_name} set to {value}')
+
+# Returns the values of the texture user parameters set by the inputs
+def get_texture_dimensions(inputs : adsk.core.CommandInputs) -> dict:
+    return {
+        "Texture_depth": inputs.itemById("texture_depth_input").value,
+        "Texture_flank_angle": inputs.itemById("texture_flank_angle_input").value,
+        "Texture_width": inputs.itemById("texture_width_input").value,
+        "Texture_period": inputs.itemById("texture_period_input").value,
+    }
+
+# Sets all texture user parameters from the inputs with a single recompute
+@futil.traced
+def set_texture_dimensions(inputs : adsk.core.CommandInputs):
+    session = get_session()
+    avoided = session.set_parameters(get_texture_dimensions(inputs))
+    if avoided:
+        futil.log('%s: %d recomputes avoided, %d in this command', args=(CMD_NAME, avoided, session.recomputes_avoided))
+
+# Specific setter function for individual dimensions
+def set_flank_angle_dimension(angle : float):
+    dimension_setter("Texture_flank_angle", angle)
+
+def set_width_dimension(width : float):
+    dimension_setter("Texture_width", width)
+
+def set_depth_dimension(depth : float):
+    dimension_setter("Texture_depth", depth)
+
+def set_period_dimension(period : float):
+    dimension_setter("Texture_period", period)
+
+def make_line(settings : TextureSettings):
+    design : adsk.fusion.Design = get_design()
+
+    # Get the active component of the active design
+    component : adsk.fusion.Component = design.activeComponent
+    extrudes = component.features.extrudeFeatures
+
+    texture_type = settings.texture_type
+
+    sketch = get_feature_sketch()
+    profiles = [sketch.profiles.item(0), sketch.profiles.item(1)]
+    profiles = adsk.core.ObjectCollection.createWithArray(profiles)
+    default_value = adsk.core.ValueInput.createByString("Texture_period")
+
+    extrude_input = extrudes.createInput(profiles, 3)
+    if texture_type == "Lines":
+        extent = adsk.fusion.DistanceExtentDefinition.create(default_value)
+        extrude_input.setOneSideExtent(extent, 0)
+    else:
+        extrude_input.setSymmetricExtent(default_value, True)
+    
+    extrude = extrudes.add(extrude_input)
+
+    get_session().register("ExtrudeFeature", extrude)
+
+def make_dots(settings : TextureSettings):
+    
+    design : adsk.fusion.Design = get_design()
+    
+    # Get the active component
+    component : adsk.fusion.Component = design.activeComponent
+    revolves = component.features.revolveFeatures
+
+    sketch = get_feature_sketch()
+    profile = sketch.profiles.item(0)
+
+    revolve_axis = component.zConstructionAxis
+
+    revolve_input = revolves.createInput(profile, revolve_axis, 3)
+    revolve_angle = adsk.core.ValueInput.createByString("360degree")
+    revolve_input.setAngleExtent(isSymmetric=True, angle=revolve_angle)
+
+    revolve = revolves.add(revolve_input)
+
+    get_session().register("RevolveFeature", revolve)
+
+def get_revolve_feature() -> (adsk.fusion.RevolveFeature | None):
+    return feature_getter("RevolveFeature")
+
+def make_base_feature(settings : TextureSettings):
+    '''Builds all texture bodies off the timeline and inserts them as one base feature. Designs without
+    history get the body directly.
+    '''
+    texture_type = settings.texture_type
+    lattice = settings.lattice
+    builder = BRepTextureBuilder(settings.depth,
+                                 settings.width,
+                                 settings.flank_angle,
+                                 lattice.period_x,
+                                 get_cell_cache(),
+                                 lattice.period_y)
+    if lattice.is_square:
+        body = builder.build(texture_type, *settings.pattern_counts)
+    else:
+        body = builder.build_placed(texture_type, lattice_placements(lattice, *settings.pattern_counts))
+    futil.log(f'{CMD_NAME}: {texture_type} body built with {builder.boolean_count} boolean operations')
+    if builder.cache is not None:
+        stats = builder.cache.stats()
+        futil.log(f'{CMD_NAME}: cell cache {stats.hits} hits, {stats.misses} misses, {stats.entries} cells, {stats.bytes/1e6:.1f} MB')
+
+    insert_base_feature(body)
+
+def insert_base_feature(body : adsk.fusion.BRepBody):
+    '''Inserts a transient body as base feature of the active component and registers it as the base
+    feature of the texture. Designs without history get the body directly.
+    '''
+    design : adsk.fusion.Design = get_design()
+    component : adsk.fusion.Component = design.activeComponent
+    if design.designType == adsk.fusion.DesignTypes.DirectDesignType:
+        get_session().register("BaseFeature", component.bRepBodies.add(body))
+        return
+
+    base_feature = component.features.baseFeatures.add()
+    base_feature.startEdit()
+    try:
+        component.bRepBodies.add(body, base_feature)
+    finally:
+        base_feature.finishEdit()
+    get_session().register("BaseFeature", base_feature)
+
+def get_base_feature() -> (adsk.fusion.BaseFeature | adsk.fusion.BRepBody | None):
+    return feature_getter("BaseFeature")
+
+def get_cell_cache() -> (CellCache | None):
+    '''Returns the unit cell cache, None if it is disabled or its folder cannot be created.'''
+    global _cell_cache
+    if _cell_cache is None and config.CELL_CACHE_DIRECTORY:
+        try:
+            _cell_cache = CellCache(config.CELL_CACHE_DIRECTORY, config.CELL_CACHE_MAX_BYTES)
+        except OSError as error:
+            futil.log(f'{CMD_NAME}: cell cache disabled, {error}', adsk.core.LogLevels.WarningLogLevel)
+    return _cell_cache
+
+def get_mapping(inputs : adsk.core.CommandInputs) -> str:
+    return inputs.itemById("texture_mapping_input").selectedItem.name
+
+def get_build_engine(inputs : adsk.core.CommandInputs) -> str:
+    '''Returns the engine selected in the dialog, the base feature engine for all lattices but Square.'''
+    if not get_lattice(inputs).is_square:
+        return "Base feature"
+    return inputs.itemById("texture_engine_input").selectedItem.name
+
+def get_texture_settings(inputs : adsk.core.CommandInputs) -> TextureSettings:
+    '''Returns the texture described by the dialog.'''
+    return TextureSettings(inputs.itemById("texture_type_input").selectedItem.name,
+                           inputs.itemById("texture_engine_input").selectedItem.name,
+                           inputs.itemById("texture_lattice_input").selectedItem.name,
+                           inputs.itemById("texture_depth_input").value,
+                           inputs.itemById("texture_width_input").value,
+                           inputs.itemById("texture_flank_angle_input").value,
+                           inputs.itemById("texture_period_input").value,
+                           inputs.itemById("texture_period_y_input").value,
+                           *get_pattern_counts(inputs))
+
+def get_lattice(inputs : adsk.core.CommandInputs) -> Lattice:
+    return make_lattice(inputs.itemById("texture_lattice_input").selectedItem.name,
+                        inputs.itemById("texture_period_input").value,
+                        inputs.itemById("texture_period_y_input").value)
+
+def check_land_width(inputs : adsk.core.CommandInputs) -> bool:
+    '''Shows the land between neighbouring instances of the dialog texture and warns if it is below
+    config.MIN_LAND_WIDTH. The instances are uniform, so the nearest neighbours of one site decide.
+    Returns True if the check passes.
+    '''
+    texture_type = inputs.itemById("texture_type_input").selectedItem.name
+    land = float(nearest_land_width(texture_type, get_lattice(inputs), inputs.itemById("texture_width_input").value))
+    return show_land_width(inputs, land, 1 if land < 0 else 0)
+
+def show_texture_metrics(inputs : adsk.core.CommandInputs):
+    '''Writes the removed volume, land ratio and height parameters of the dialog texture into the dialog,
+    see lib/surfacetexture/metrics.py. They are not defined for overlapping grooves.
+    '''
+    metrics = texture_metrics(inputs.itemById("texture_type_input").selectedItem.name,
+                              inputs.itemById("texture_depth_input").value,
+                              inputs.itemById("texture_width_input").value,
+                              inputs.itemById("texture_flank_angle_input").value,
+                              get_lattice(inputs))
+    output : adsk.core.TextBoxCommandInput = inputs.itemById("texture_metrics_output")
+    if math.isnan(metrics.sa):
+        output.formattedText = 'Not available for overlapping grooves'
+        return
+    # Lengths are shown in mm, the removed volume per area is a length as well.
+    output.formattedText = (f'Removed {float(metrics.volume_per_area)*10:.4f} mm³/mm², land {float(metrics.land_ratio)*100:.1f} %<br>'
+                            f'Sa {float(metrics.sa)*10:.4f} mm, Sq {float(metrics.sq)*10:.4f} mm, Sk {float(metrics.sk)*10:.4f} mm')
+
+def show_land_width(inputs : adsk.core.CommandInputs, land : float, overlaps : int) -> bool:
+    '''Writes the smallest land width into the dialog and logs a warning if the check fails.'''
+    ok = land >= config.MIN_LAND_WIDTH
+    # Lengths are shown in mm like the defaults of the dialog.
+    text = f'{land*10:.3f} mm'
+    if overlaps:
+        text += ', grooves overlap'
+    elif not ok:
+        text += f', below {config.MIN_LAND_WIDTH*10:.3f} mm'
+    inputs.itemById("texture_check_output").formattedText = text
+    if not ok:
+        futil.log(f'{CMD_NAME}: land width {land*10:.3f} mm below the minimum of {config.MIN_LAND_WIDTH*10:.3f} mm',
+                  adsk.core.LogLevels.WarningLogLevel)
+    return ok
+
+def collect_bodies(features : list) -> list:
+    '''Returns the valid bodies of the features, every body once in the order they are found.'''
+    bodies = {}
+    for feature in features:
+        if feature is None:
+            continue
+        for i in range(feature.bodies.count):
+            body = feature.bodies.item(i)
+            if body.isValid:
+                bodies.setdefault(body.entityToken, body)
+    return list(bodies.values())
+
+def get_texture_bodies() -> list:
+    '''Returns the tool bodies of the texture built by either engine.'''
+    design : adsk.fusion.Design = get_design()
+    base_feature = get_base_feature()
+    if base_feature is not None and design.designType == adsk.fusion.DesignTypes.DirectDesignType:
+        # Designs without history keep the body itself.
+        return [base_feature]
+    features = [base_feature, get_revolve_feature(), get_extrude_feature(), get_circular_pattern_feature(), get_combine_feature()]
+    return collect_bodies(features + get_rectangular_patterns())
+
+@futil.traced
+def cut_texture_into_face(inputs : adsk.core.CommandInputs, face : adsk.fusion.BRepFace):
+    '''Moves all tool bodies onto the face with one move feature and subtracts them from the body of the
+    face with one combine feature. The texture is centered on the centroid of the face, its x direction
+    follows the u direction of the face and the grooves point into the body.
+    '''
+    design : adsk.fusion.Design = app.activeProduct
+    component : adsk.fusion.Component = design.activeComponent
+
+    tools = get_texture_bodies()
+    if not tools:
+        return
+
+    plane : adsk.core.Plane = face.geometry
+    centroid = face.centroid
+    _, normal = face.evaluator.getNormalAtPoint(centroid)
+    x_direction = plane.uDirection.copy()
+    y_direction = normal.crossProduct(x_direction)
+    x_direction.normalize()
+    y_direction.normalize()
+
+    # The texture is built with its first cell centered on the origin.
+    center_x, center_y = lattice_center(get_lattice(inputs), *get_pattern_counts(inputs))
+    origin = centroid.copy()
+    offset_x = x_direction.copy()
+    offset_x.scaleBy(-center_x)
+    offset_y = y_direction.copy()
+    offset_y.scaleBy(-center_y)
+    origin.translateBy(offset_x)
+    origin.translateBy(offset_y)
+    transform = adsk.core.Matrix3D.create()
+    transform.setWithCoordinateSystem(origin, x_direction, y_direction, normal)
+
+    move_features = component.features.moveFeatures
+    move_input = move_features.createInput2(adsk.core.ObjectCollection.createWithArray(tools))
+    move_input.defineAsFreeMove(transform)
+    move_features.add(move_input)
+    cut_tools_from_body(face.body, tools)
+
+def cut_tools_from_body(body : adsk.fusion.BRepBody, tools : list):
+    '''Subtracts the tool bodies from the body with one combine feature.'''
+    design : adsk.fusion.Design = app.activeProduct
+    combine_features = design.activeComponent.features.combineFeatures
+    combine_input = combine_features.createInput(body, adsk.core.ObjectCollection.createWithArray(tools))
+    combine_input.operation = adsk.fusion.FeatureOperations.CutFeatureOperation
+    combine_input.isKeepToolBodies = False
+    start = time.perf_counter()
+    combine_features.add(combine_input)
+    seconds = time.perf_counter()-start
+    futil.log(f'{CMD_NAME}: {len(tools)} tool bodies cut into {body.name} in {seconds:.2f} s', force_console=True)
+
+@futil.traced
+def map_texture_onto_face(inputs : adsk.core.CommandInputs, face : adsk.fusion.BRepFace):
+    '''Replaces the planar texture of the preview by cells laid out in the parameter space of the face
+    and cuts them into the body of the face. The cells are built by the base feature engine, one per
+    site, with x along the u direction of the face and the grooves pointing into the body.
+    '''
+    placements = get_face_placements(face, inputs.itemById("texture_period_input").value)
+    if placements is None:
+        futil.log(f'{CMD_NAME}: the face is too small for a single texture cell', adsk.core.LogLevels.WarningLogLevel, force_console=True)
+        return
+    # Neighbouring sites on a curved face are not uniform, so every pair within reach is checked.
+    report = check_overlaps(placements.origin, inputs.itemById("texture_width_input").value/2, config.MIN_LAND_WIDTH)
+    show_land_width(inputs, report.min_land_width, report.overlaps)
+    if not report.ok:
+        futil.log(f'{CMD_NAME}: {report.violations} pairs of cells on the face are closer than the minimum land width, '
+                  f'{report.overlaps} of them overlap', adsk.core.LogLevels.WarningLogLevel, force_console=True)
+
+    discard_texture()
+    texture_type = inputs.itemById("texture_type_input").selectedItem.name
+    builder = BRepTextureBuilder(inputs.itemById("texture_depth_input").value,
+                                 inputs.itemById("texture_width_input").value,
+                                 inputs.itemById("texture_flank_angle_input").value,
+                                 inputs.itemById("texture_period_input").value,
+                                 get_cell_cache())
+    body = builder.build_placed(texture_type, placements)
+    futil.log(f'{CMD_NAME}: {len(placements.origin)} {texture_type} cells mapped onto the face with {builder.boolean_count} boolean operations')
+    insert_base_feature(body)
+    tools = get_texture_bodies()
+    if tools:
+        cut_tools_from_body(face.body, tools)
+
+def get_face_placements(face : adsk.fusion.BRepFace, period : float) -> (uv_layout.Placements | None):
+    '''Returns the frames of the texture cells on the face. The surface is evaluated with one batched
+    evaluator call for the sample grid and one call each for the points, normals and derivatives of
+    all sites, never once per site. The lattice covers the parameter range of the face, trimmed
+    regions of the surface are not excluded. None if not a single site fits onto the face.
+    '''
+    evaluator : adsk.core.SurfaceEvaluator = face.evaluator
+    parametric_range = evaluator.parametricRange()
+    low, high = parametric_range.minPoint, parametric_range.maxPoint
+    u, v, grid = uv_layout.parameter_grid((low.x, high.x), (low.y, high.y), config.UV_LAYOUT_SAMPLES)
+    _, grid_points = evaluator.getPointsAtParameters(points_2d(grid.tolist()))
+    lattice = uv_layout.uv_lattice(u, v, uv_layout.grid_points(point_list(grid_points), len(u), len(v)), period)
+    if lattice.count == 0:
+        return None
+
+    sites = points_2d(zip(lattice.u.tolist(), lattice.v.tolist()))
+    _, points = evaluator.getPointsAtParameters(sites)
+    _, normals = evaluator.getNormalsAtParameters(sites)
+    _, derivatives_u, _ = evaluator.getFirstDerivatives(sites)
+    return uv_layout.placement_frames(point_list(points), point_list(normals), point_list(derivatives_u))
+
+# Converts between parameter pairs or coordinate triples and the point and vector lists of the evaluator.
+def points_2d(parameters) -> list:
+    return [adsk.core.Point2D.create(u, v) for u, v in parameters]
+
+def point_list(points : list) -> list:
+    return [point.asArray() for point in points]
+
+def select_batch_table(inputs : adsk.core.CommandInputs):
+    '''Lets the user pick the batch table that is built on OK. Cancelling the file dialog removes the table.'''
+    global _batch_table_path
+    file_dialog = ui.createFileDialog()
+    file_dialog.title = 'Select a batch table'
+    file_dialog.filter = 'Batch tables (*.csv;*.json)'
+    file_dialog.isMultiSelectEnabled = False
+    if file_dialog.showOpen() == adsk.core.DialogResults.DialogOK:
+        _batch_table_path = file_dialog.filename
+    else:
+        _batch_table_path = None
+    file_input : adsk.core.TextBoxCommandInput = inputs.itemById("texture_batch_file_input")
+    file_input.text = os.path.basename(_batch_table_path) if _batch_table_path else 'No table selected'
+
+def run_batch_table(path : str, design : adsk.fusion.Design, settings : TextureSettings = None) -> list:
+    '''Builds the jobs of a batch table into the design one after the other and writes the report next to the table.
+
+    Needs no command dialog, so scripts can call it as well as OK in the dialog. Every job goes through the same
+    steps as OK: the user parameters are updated in a single pass and the features are only rebuilt if the texture
+    type, the instance counts or the engine differ from the job before. The features of the last job are kept. A
+    job that fails is reported and the run continues. Jobs are not cut into a face, because every cut would change
+    the body the next job is cut into. Returns the results of the jobs.
+
+    Arguments:
+    path -- Path of the CSV or JSON table, see lib/surfacetexture/batch_table.py.
+    design -- Design the textures are built into.
+    settings -- Texture the values a job leaves empty are taken from, the defaults of the dialog if None.
+    '''
+    global _batch_design, _selected_ok, _sketch_created, _command_timeline, _texture_timeline
+    global _built_texture_type, _built_pattern_counts, _built_engine, _built_lattice, _built_dimensions
+    previous = settings or DEFAULT_SETTINGS
+    selected_ok = _selected_ok
+    _batch_design = design
+    # The jobs are built like on OK, with the Hatch combine.
+    _selected_ok = True
+    results = []
+    try:
+        cache_unit_precision()
+        add_texture_parameters(previous)
+        for job in batch_table.read_batch_table(path):
+            start = time.perf_counter()
+            rebuilt = False
+            try:
+                with futil.span(job.name, 'batch'):
+                    if job.error:
+                        raise ValueError(job.error)
+                    job_texture = job_settings(job, previous, design)
+                    get_session().set_parameters(job_texture.dimensions)
+                    # The Hatch combine of the preview features is only created on OK.
+                    combine_feature = get_combine_feature()
+                    needs_combine = job_texture.texture_type == "Hatch" and job_texture.build_engine == "Parametric" and \
+                        not (combine_feature is not None and combine_feature.isValid)
+                    if needs_combine or not is_texture_built(job_texture):
+                        rebuild_texture(job_texture)
+                        rebuilt = True
+                    previous = job_texture
+                    if job.export:
+                        export_design(job.export)
+            except Exception as error:
+                futil.log('%s: batch job %s failed: %s', adsk.core.LogLevels.WarningLogLevel, args=(CMD_NAME, job.name, error))
+                results.append(batch_table.BatchResult(job.name, job.texture_type, 'failed', rebuilt, time.perf_counter()-start, str(error)))
+            else:
+                results.append(batch_table.BatchResult(job.name, job.texture_type, 'ok', rebuilt, time.perf_counter()-start, ''))
+    finally:
+        # The features of the last job belong to the design now, a later build must not replace them.
+        _batch_design = None
+        _selected_ok = selected_ok
+        _sketch_created = False
+        _command_timeline = None
+        _texture_timeline = None
+        _built_texture_type = None
+        _built_pattern_counts = None
+        _built_engine = None
+        _built_lattice = None
+        _built_dimensions = None
+
+    report = batch_table.report_path(path)
+    batch_table.write_batch_report(report, results)
+    failed = sum(result.status != 'ok' for result in results)
+    futil.log(f'{CMD_NAME}: {len(results)} batch jobs run, {failed} failed, report written to {report}', force_console=True)
+    return results
+
+def job_settings(job : batch_table.BatchJob, previous : TextureSettings, design : adsk.fusion.Design) -> TextureSettings:
+    '''Returns the texture of a batch job. The engine and the counts a job leaves empty keep the ones of the job
+    before. Plain numbers in the expressions are in the default length unit of the design and in degrees, like in
+    the dialog.
+    '''
+    units_manager = design.unitsManager
+    length_units = units_manager.defaultLengthUnits
+    values = {}
+    for parameter, expression in job.parameters.items():
+        units = "deg" if parameter == "Texture_flank_angle" else length_units
+        if not units_manager.isValidExpression(expression, units):
+            raise ValueError(f'{parameter}: invalid expression {expression!r}')
+        values[parameter] = units_manager.evaluateExpression(expression, units)
+    for count in (job.count_x, job.count_y):
+        if count is not None and count > MAX_PATTERN_COUNT:
+            raise ValueError(f'At most {MAX_PATTERN_COUNT} instances are supported in each direction.')
+    settings = previous._replace(
+        texture_type=job.texture_type,
+        engine=job.engine or previous.engine,
+        depth=values["Texture_depth"],
+        width=values["Texture_width"],
+        flank_angle=values["Texture_flank_angle"],
+        period=values["Texture_period"],
+        count_x=job.count_x or previous.count_x,
+        count_y=job.count_y or previous.count_y)
+    # Unlike the dialog, a batch job is not moved to the nearest valid parameters.
+    region = groove_profile.compute_profile(settings.depth, settings.width, settings.flank_angle, settings.period,
+                                            _distance_margin, _angle_margin)
+    if not region.feasible:
+        raise ValueError('The texture parameters do not describe a valid groove profile.')
+    return settings
+
+def add_texture_parameters(settings : TextureSettings):
+    '''Creates the texture user parameters that are missing in the design the texture is built into.'''
+    session = get_session()
+    for name, value in settings.dimensions.items():
+        if session.parameter(name) is None:
+            session.design.userParameters.add(name, adsk.core.ValueInput.createByReal(value), PARAMETER_UNITS[name], "")
+
+def select_list_item(dropdown : adsk.core.DropDownCommandInput, name : str):
+    for index in range(dropdown.listItems.count):
+        item = dropdown.listItems.item(index)
+        if item.name == name:
+            item.isSelected = True
+            return
+    raise ValueError(f'{dropdown.name} has no item {name!r}')
+
+def export_design(path : str):
+    '''Exports the active design to a file in the format of its extension.'''
+    design : adsk.fusion.Design = get_design()
+    export_manager = design.exportManager
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    match os.path.splitext(path)[1].lower():
+        case ".f3d":
+            options = export_manager.createFusionArchiveExportOptions(path)
+        case ".step" | ".stp":
+            options = export_manager.createSTEPExportOptions(path)
+        case ".smt":
+            options = export_manager.createSMTExportOptions(path)
+        case ".stl":
+            options = export_manager.createSTLExportOptions(design.rootComponent, path)
+        case extension:
+            raise ValueError(f'Unknown export format: {extension}')
+    if not export_manager.execute(options):
+        raise OSError(f'The design could not be exported to {path}.')
+
+def create_rectangular_pattern(settings : TextureSettings):
+    '''Repeats the texture by the pattern features planned by get_pattern_steps. Every feature patterns
+    the seed features of the texture type together with a group of the pattern features before it.
+    '''
+    design : adsk.fusion.Design = get_design()
+    component : adsk.fusion.Component = design.activeComponent
+
+    global _selected_ok
+
+    rectangular_patterns = component.features.rectangularPatternFeatures
+
+    texture_type = settings.texture_type
+
+    x_axis = component.xConstructionAxis
+    y_axis = component.yConstructionAxis
+
+    match texture_type:
+        case "Dots":
+            seed_features = [get_revolve_feature()]
+        case "Lines":
+            seed_features = [get_extrude_feature()]
+        case "Hatch":
+            seed_features = [get_extrude_feature(), get_circular_pattern_feature()]
+            if _selected_ok:
+                seed_features.append(get_combine_feature())
+
+    patterns = []
+    for level, step in enumerate(get_pattern_steps(settings)):
+        input_entities = adsk.core.ObjectCollection.createWithArray(seed_features + patterns[:step.sources])
+        rectangular_pattern_input = rectangular_patterns.createInput(
+            input_entities, x_axis, adsk.core.ValueInput.createByReal(step.quantity_one), period_distance(step.spacing_one), 1)
+        rectangular_pattern_input.setDirectionTwo(
+            y_axis, adsk.core.ValueInput.createByReal(step.quantity_two), period_distance(step.spacing_two))
+        # All instances are translated copies of new bodies, so they need not be computed one by one.
+        rectangular_pattern_input.patternComputeOption = adsk.fusion.PatternComputeOptions.IdenticalPatternCompute
+        rectangular_pattern = rectangular_patterns.add(rectangular_pattern_input)
+        get_session().register(rectangular_pattern_name(level), rectangular_pattern)
+        patterns.append(rectangular_pattern)
+
+    if _selected_ok and texture_type == "Hatch" and patterns:
+        combine_features = component.features.combineFeatures
+        target_body, *tools = collect_bodies(seed_features + patterns)
+        tool_body = adsk.core.ObjectCollection.createWithArray(tools)
+        combine_feature_input = combine_features.createInput(target_body, tool_body)
+        combine_features.add(combine_feature_input)
+
+def period_distance(spacing : int) -> adsk.core.ValueInput:
+    if spacing == 1:
+        return adsk.core.ValueInput.createByString("Texture_period")
+    return adsk.core.ValueInput.createByString(f"Texture_period * {spacing}")
+
+def get_pattern_counts(inputs : adsk.core.CommandInputs) -> tuple:
+    return inputs.itemById("texture_count_x_input").value, inputs.itemById("texture_count_y_input").value
+
+def get_pattern_steps(settings : TextureSettings) -> list:
+    count_x, count_y = settings.pattern_counts
+    return pattern_plan.plan_pattern(count_x, count_y, config.PATTERN_SINGLE_MAX_INSTANCES)
+
+def rectangular_pattern_name(level : int) -> str:
+    # The first pattern keeps the attribute name of the single pattern of earlier versions.
+    return "RectangularPattern" if level == 0 else f"RectangularPattern_{level}"
+
+def get_rectangular_pattern() -> (adsk.fusion.RectangularPatternFeature | None):
+    return feature_getter("RectangularPattern")
+
+def get_rectangular_patterns() -> list:
+    '''Returns the rectangular pattern features of the texture in the order they were created.'''
+    patterns = []
+    while (pattern := feature_getter(rectangular_pattern_name(len(patterns)))) is not None:
+        patterns.append(pattern)
+    return patterns
+
+def create_circular_pattern(settings : TextureSettings):
+    design : adsk.fusion.Design = get_design()
+    component : adsk.fusion.Component = design.activeComponent
+
+    circular_patterns = component.features.circularPatternFeatures
+    extrude = get_extrude_feature()
+    input_entities = adsk.core.ObjectCollection.create()
+    input_entities.add(extrude)
+    z_axis = component.zConstructionAxis
+    circular_pattern_input = circular_patterns.createInput(input_entities, z_axis)
+    quantity = adsk.core.ValueInput.createByReal(2)
+    total_angle = adsk.core.ValueInput.createByString("90 degree")
+    circular_pattern_input.quantity = quantity
+    circular_pattern_input.totalAngle = total_angle
+
+    circular_pattern = circular_patterns.add(circular_pattern_input)
+    get_session().register("CircularPattern", circular_pattern)
+
+    global _selected_ok
+    if _selected_ok:
+        combine_features = component.features.combineFeatures
+        target_body = extrude.bodies.item(0)
+        tool_body = adsk.core.ObjectCollection.create()
+        tool_body.add(circular_pattern.bodies.item(0))
+        combine_feature_input = combine_features.createInput(target_body, tool_body)
+        combine_feature = combine_features.add(combine_feature_input)
+        get_session().register("CombineFeature", combine_feature)
+
+def get_combine_feature():
+    return feature_getter("CombineFeature")
+
+def get_circular_pattern_feature() -> (adsk.fusion.CombineFeature | None):
+    return feature_getter("CircularPattern")
+
+# Returns the limits of all texture parameters with the other ones held at their input values
+def get_feasible_region(inputs : adsk.core.CommandInputs) -> groove_profile.GrooveProfile:
+    return groove_profile.compute_profile(
+        inputs.itemById("texture_depth_input").value, inputs.itemById("texture_width_input").value,
+        inputs.itemById("texture_flank_angle_input").value, inputs.itemById("texture_period_input").value,
+        _distance_margin, _angle_margin)
+
+# Moves the inputs to the nearest parameters with a groove profile, returns False if there are none
+def project_inputs(inputs : adsk.core.CommandInputs, fixed : str = None) -> bool:
+    dimensions = get_texture_dimensions(inputs)
+    projected = project_parameters(dimensions["Texture_depth"], dimensions["Texture_width"], dimensions["Texture_flank_angle"],
+                                   dimensions["Texture_period"], _distance_margin, _angle_margin, fixed)
+    if projected.changed:
+        inputs.itemById("texture_depth_input").value = projected.depth
+        inputs.itemById("texture_width_input").value = projected.width
+        inputs.itemById("texture_flank_angle_input").value = projected.flank_angle
+        inputs.itemById("texture_period_input").value = projected.period
+        futil.log(f'{CMD_NAME}: Texture parameters moved to the nearest valid groove profile')
+    return projected.feasible
+
+def set_depth_boundaries(inputs : adsk.core.CommandInputs, region : groove_profile.GrooveProfile):
+    depth_input : adsk.core.DistanceValueCommandInput = inputs.itemById("texture_depth_input")
+    depth_input.minimumValue = float(region.depth_min)
+    if inputs.itemById("texture_flank_angle_input").value > 0:
+        depth_input.maximumValue = float(region.depth_max)
+    else:
+        depth_input.hasMaximumValue = False
+
+def set_width_boundaries(inputs : adsk.core.CommandInputs, region : groove_profile.GrooveProfile):
+    width_input : adsk.core.DistanceValueCommandInput = inputs.itemById("texture_width_input")
+    width_input.minimumValue = float(region.width_min)
+    width_input.maximumValue = float(region.width_max)
+
+def set_flank_angle_boundaries(inputs : adsk.core.CommandInputs, region : groove_profile.GrooveProfile):
+    flank_angle_input : adsk.core.AngleValueCommandInput = inputs.itemById("texture_flank_angle_input")
+    flank_angle_input.minimumValue = float(region.flank_angle_min)
+    flank_angle_input.maximumValue = float(region.flank_angle_max)
+
+# Reads the unit precision once, the limits are moved inwards by a tenth of the last displayed digit
+def cache_unit_precision():
+    global _distance_margin, _angle_margin
+    _distance_margin = math.pow(10, -get_distance_precision()-1)
+    _angle_margin = math.pow(10, -get_angle_precision()-1)
+
+def get_angle_precision() -> float:
+    preferences = app.preferences
+    precision = preferences.unitAndValuePreferences.angularPrecision
+    return precision
+
+def get_distance_precision() -> float:
+    preferences = app.preferences
+    precision = preferences.unitAndValuePreferences.generalPrecision
+    return precision
+
+def delete_sketch() -> bool:
+    return get_session().delete("Feature_Sketch")
+
+def delete_extrude() -> bool:
+    return get_session().delete("ExtrudeFeature")
+
+def delete_revolve() -> bool:
+    return get_session().delete("RevolveFeature")
+    
+def delete_pattern() -> bool:
+    return get_session().delete("CircularPattern")
+
+def texture_feature_names() -> list:
+    # Patterns and combines depend on the extrude or revolve and come first.
+    names = [rectangular_pattern_name(level) for level in reversed(range(len(get_rectangular_patterns())))]
+    return names + ["CombineFeature", "CircularPattern", "ExtrudeFeature", "RevolveFeature", "BaseFeature"]
+
+def delete_texture_features():
+    '''Deletes the texture features built by this command. The ones of the last build are deleted with a single
+    timeline group, otherwise the ones registered by this command one by one. Texture features committed by
+    earlier commands are kept, although they are registered under the same names.
+    '''
+    global _texture_timeline
+    session = get_session()
+    names = texture_feature_names()
+    if delete_timeline_range(_texture_timeline):
+        session.forget(names)
+    else:
+        for name in names:
+            if session.registered(name):
+                session.delete(name)
+    _texture_timeline = None
+
+def get_timeline() -> (adsk.fusion.Timeline | None):
+    design : adsk.fusion.Design = get_design()
+    if design.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+        return None
+    return design.timeline
+
+def timeline_mark() -> (tuple | None):
+    '''Returns the marker position and the number of items of the timeline, None for designs without history.'''
+    timeline = get_timeline()
+    if timeline is None:
+        return None
+    return timeline.markerPosition, timeline.count
+
+def delete_timeline_range(mark : tuple) -> bool:
+    '''Deletes the timeline items created since the mark was taken with one timeline group. New items are
+    inserted at the marker, so they are the ones from the marker position on. Returns False if there is no mark.
+    '''
+    timeline = get_timeline()
+    if mark is None or timeline is None:
+        return False
+    start, count = mark
+    created = timeline.count-count
+    if created == 1:
+        timeline.item(start).entity.deleteMe()
+    elif created > 1:
+        timeline.timelineGroups.add(start, start+created-1).deleteMe(True)
+    return True
+
+def delete_all():
+    delete_texture_features()
+    delete_sketch()
+
+
+    # TODO Check the texture selector input and use linear or circular pattern accordingly.
+    # TODO Use rectangularPatternFeatures and circularPatternFeatures.
\ No newline at end of file
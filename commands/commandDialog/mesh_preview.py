@@ -0,0 +1,55 @@
+import adsk.core
+import adsk.fusion
+
+import math
+
+from ...lib.surfacetexture.lattice import Lattice, lattice_mesh
+from ...lib.surfacetexture.mesh import capped_counts, patch_mesh, vertex_normals
+
+# Largest number of grid vertices of the mesh of a lattice other than Square.
+MAX_GRID_VERTICES = 500000
+
+
+class MeshPreview:
+    '''Shows the texture as a custom graphics mesh instead of features.
+
+    The mesh is the open patch of lib/surfacetexture/mesh.py: the top surface with the grooves, one
+    period per cell with the first cell centered on the origin like the features. It is tessellated
+    with a chord tolerance relative to the groove width and at most max_instances cells are drawn, so
+    the cost of a preview depends neither on the texture area nor on the number of features. Nothing
+    is added to the timeline. Lattices other than Square have no repeated cell, their mesh is sampled
+    on a grid whose spacing follows from the same tolerance, with fewer cells if the grid gets too large.
+    '''
+
+    def __init__(self, max_instances : int):
+        self.max_instances = max_instances
+        self._group : adsk.fusion.CustomGraphicsGroup = None
+
+    def show(self, component : adsk.fusion.Component, texture_type : str, depth : float, width : float,
+             flank_angle : float, period : float, count_x : int, count_y : int, relative_tolerance : float,
+             lattice : Lattice = None) -> tuple:
+        '''Replaces the mesh shown before. Returns the number of cells drawn in x and y.'''
+        self.clear()
+        if lattice is None or lattice.is_square:
+            count_x, count_y = capped_counts(count_x, count_y, self.max_instances)
+            patch = patch_mesh(texture_type, depth, width, flank_angle, period, count_x, count_y, relative_tolerance*width)
+        else:
+            # A grid spacing of width*sqrt(tolerance) keeps the chords of the groove arcs close to the tolerance.
+            spacing = width*math.sqrt(relative_tolerance)
+            cell_vertices = math.ceil(lattice.period_x/spacing+1)*math.ceil(lattice.period_y/spacing+1)
+            max_instances = max(1, min(self.max_instances, MAX_GRID_VERTICES//cell_vertices))
+            count_x, count_y = capped_counts(count_x, count_y, max_instances)
+            patch = lattice_mesh(texture_type, lattice, count_x, count_y, depth, width, flank_angle, spacing)
+        vertices, triangles = patch.arrays()
+        normals = vertex_normals(vertices, triangles)
+        indices = triangles.ravel().tolist()
+
+        self._group = component.customGraphicsGroups.add()
+        coordinates = adsk.fusion.CustomGraphicsCoordinates.create(vertices.ravel().tolist())
+        self._group.addMesh(coordinates, indices, normals.ravel().tolist(), indices)
+        return count_x, count_y
+
+    def clear(self):
+        if self._group is not None and self._group.isValid:
+            self._group.deleteMe()
+        self._group = None
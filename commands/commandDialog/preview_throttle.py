@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Callable
+
+
+class PreviewThrottle:
+    '''Decides which preview requests are built while the user is still changing inputs.
+
+    A preview is only built once the inputs have been quiet for the debounce time and at most
+    max_rate times per second. Requests in between are dropped and a single deferred preview is
+    scheduled for the moment the latest parameter state may be built. The deferred preview is
+    requested by calling request_preview from a timer thread, so it must be thread safe
+    (app.fireCustomEvent is).
+    '''
+
+    def __init__(self, debounce : float, max_rate : float, request_preview : Callable[[], None]):
+        self.debounce = max(debounce, 0.0)
+        self.min_interval = 1.0/max_rate if max_rate > 0 else 0.0
+        self.request_preview = request_preview
+        self.dropped = 0
+        self._last_change = None
+        self._last_build = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def input_changed(self, now : float = None):
+        '''Records a change of a value input. Should be called from the inputChanged handler.'''
+        self._last_change = time.monotonic() if now is None else now
+
+    def delay(self, now : float = None) -> float:
+        '''Returns the time in seconds until a preview may be built, 0 if it may be built now.'''
+        now = time.monotonic() if now is None else now
+        waits = [0.0]
+        if self._last_change is not None:
+            waits.append(self._last_change+self.debounce-now)
+        if self._last_build is not None:
+            waits.append(self._last_build+self.min_interval-now)
+        return max(waits)
+
+    def should_build(self, now : float = None) -> bool:
+        '''Returns True if the preview should be built now. Otherwise the request is dropped
+        and a deferred preview is scheduled.
+        '''
+        now = time.monotonic() if now is None else now
+        delay = self.delay(now)
+        if delay <= 0:
+            self.cancel()
+            self._last_build = now
+            return True
+
+        self.dropped += 1
+        self._schedule(delay)
+        return False
+
+    def cancel(self):
+        '''Cancels a scheduled deferred preview.'''
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule(self, delay : float):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+        self.request_preview()
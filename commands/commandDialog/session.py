@@ -0,0 +1,159 @@
+import json
+
+import adsk.core
+import adsk.fusion
+
+ATTRIBUTE_GROUP = "Surface-Texture-Creator"
+TOKENS_ATTRIBUTE = "Entity_Tokens"
+
+
+class TextureSession:
+    '''Keeps references to the user parameters and the entities created by the command in one design.
+
+    Entities are registered under the attribute names the add-in has always used ("Feature_Sketch",
+    "ExtrudeFeature", ...), so designs created by earlier versions are still found. Their entity tokens
+    are stored in an attribute of the design, which lets a new session find them again after the
+    document was closed and reopened. design.findAttributes is only used when neither the cached
+    reference nor the stored token lead to a valid entity.
+    '''
+
+    def __init__(self, design : adsk.fusion.Design):
+        self.design = design
+        self._entities = {}
+        self._parameters = {}
+        self._tokens = self._load_tokens()
+        # Names registered by this session. Entities found under the other names belong to earlier commands.
+        self._registered = set()
+        # Number of timeline recomputes saved by set_parameters compared to setting one parameter at a time.
+        self.recomputes_avoided = 0
+
+    def get(self, name : str):
+        '''Returns the entity registered under the given name or None.'''
+        if name in self._entities:
+            entity = self._entities[name]
+            if entity is None or entity.isValid:
+                return entity
+
+        entity = self._find_by_token(name)
+        if entity is None:
+            entity = self._find_by_attribute(name)
+
+        # Entities that are not found are cached as None, so the design is searched only once per name.
+        self._entities[name] = entity
+        return entity
+
+    def register(self, name : str, entity, value : str = ""):
+        '''Marks the entity with the attribute of the given name and keeps a reference to it.
+        The attribute is removed from the entity that was registered under this name before.
+        '''
+        previous = self.get(name)
+        if previous is not None and previous != entity:
+            attribute = previous.attributes.itemByName(ATTRIBUTE_GROUP, name)
+            if attribute:
+                attribute.deleteMe()
+
+        if not entity.attributes.itemByName(ATTRIBUTE_GROUP, name):
+            entity.attributes.add(ATTRIBUTE_GROUP, name, str(value))
+
+        self._entities[name] = entity
+        self._registered.add(name)
+        self._tokens[name] = entity.entityToken
+        self._save_tokens()
+
+    def registered(self, name : str) -> bool:
+        '''Returns True if this session registered an entity under the given name that was not deleted since.'''
+        return name in self._registered
+
+    def delete(self, name : str) -> bool:
+        '''Deletes the entity registered under the given name. Returns False if there is none.'''
+        entity = self.get(name)
+        self._entities[name] = None
+        self._registered.discard(name)
+        if self._tokens.pop(name, None) is not None:
+            self._save_tokens()
+        if entity is None:
+            return False
+        entity.deleteMe()
+        return True
+
+    def forget(self, names : list):
+        '''Drops the references to entities that were deleted by other means, e.g. with their timeline group,
+        so they are not searched for again.
+        '''
+        for name in names:
+            self._entities[name] = None
+            self._registered.discard(name)
+        if any([self._tokens.pop(name, None) is not None for name in names]):
+            self._save_tokens()
+
+    def parameter(self, name : str) -> adsk.fusion.UserParameter:
+        '''Returns the user parameter with the given name or None.'''
+        parameter = self._parameters.get(name)
+        if parameter is None or not parameter.isValid:
+            parameter = self.design.userParameters.itemByName(name)
+            self._parameters[name] = parameter
+        return parameter
+
+    def set_parameters(self, values : dict) -> int:
+        '''Sets the user parameters to the given values in internal units with a single recompute.
+        Parameters that already have the value are left alone. Computing the feature sketch is
+        deferred while the values are applied. Returns the number of recomputes avoided.
+        '''
+        parameters = []
+        value_inputs = []
+        for name, value in values.items():
+            parameter = self.parameter(name)
+            if parameter is not None and parameter.value != value:
+                parameters.append(parameter)
+                value_inputs.append(adsk.core.ValueInput.createByReal(float(value)))
+        if not parameters:
+            return 0
+
+        sketch = self.get("Feature_Sketch")
+        if sketch is not None:
+            sketch.isComputeDeferred = True
+        try:
+            # Design.modifyParameters is missing in older versions of the API.
+            if len(parameters) > 1 and hasattr(self.design, "modifyParameters"):
+                self.design.modifyParameters(parameters, value_inputs)
+                avoided = len(parameters)-1
+            else:
+                for parameter, value_input in zip(parameters, value_inputs):
+                    parameter.value = value_input.realValue
+                avoided = 0
+        finally:
+            if sketch is not None:
+                sketch.isComputeDeferred = False
+
+        self.recomputes_avoided += avoided
+        return avoided
+
+    def _find_by_token(self, name : str):
+        token = self._tokens.get(name)
+        if not token:
+            return None
+        for entity in self.design.findEntityByToken(token):
+            if entity.isValid and entity.attributes.itemByName(ATTRIBUTE_GROUP, name):
+                return entity
+        return None
+
+    def _find_by_attribute(self, name : str):
+        attributes = self.design.findAttributes(ATTRIBUTE_GROUP, name)
+        if len(attributes) > 0:
+            entity = attributes[0].parent
+            self._tokens[name] = entity.entityToken
+            self._save_tokens()
+            return entity
+        return None
+
+    def _load_tokens(self) -> dict:
+        attribute = self.design.attributes.itemByName(ATTRIBUTE_GROUP, TOKENS_ATTRIBUTE)
+        if not attribute:
+            return {}
+        try:
+            return dict(json.loads(attribute.value))
+        except ValueError:
+            return {}
+
+    def _save_tokens(self):
+        self.design.attributes.add(ATTRIBUTE_GROUP, TOKENS_ATTRIBUTE, json.dumps(self._tokens))
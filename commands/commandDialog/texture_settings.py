@@ -0,0 +1,50 @@
+import math
+from typing import NamedTuple
+
+from ...lib.surfacetexture.lattice import Lattice, make_lattice
+
+
+class TextureSettings(NamedTuple):
+    '''Everything the build functions of the dialog module need to know about a texture. It is read from the
+    dialog or from a job of a batch table, so textures can be built without CommandInputs. Lengths are in cm and
+    angles in radians, the internal units of the API.
+    '''
+    texture_type : str
+    engine : str
+    lattice_type : str
+    depth : float
+    width : float
+    flank_angle : float
+    period : float
+    period_y : float
+    count_x : int
+    count_y : int
+
+    @property
+    def lattice(self) -> Lattice:
+        return make_lattice(self.lattice_type, self.period, self.period_y)
+
+    @property
+    def build_engine(self) -> str:
+        '''Returns the selected engine, the base feature engine for all lattices but Square.'''
+        if not self.lattice.is_square:
+            return "Base feature"
+        return self.engine
+
+    @property
+    def pattern_counts(self) -> tuple:
+        return self.count_x, self.count_y
+
+    @property
+    def dimensions(self) -> dict:
+        '''Returns the values of the texture user parameters.'''
+        return {
+            "Texture_depth": self.depth,
+            "Texture_flank_angle": self.flank_angle,
+            "Texture_width": self.width,
+            "Texture_period": self.period,
+        }
+
+
+# The defaults of the dialog, used by batch runs that do not start from the dialog.
+DEFAULT_SETTINGS = TextureSettings("Dots", "Parametric", "Square", 0.1, 0.1, math.radians(20), 0.3, 0.3, 2, 2)
@@ -18,4 +18,71 @@ ADDIN_NAME = os.path.basename(os.path.dirname(__file__))
 COMPANY_NAME = 'Inspire AG'
 
 # Palettes
-sample_palette_id = f'{COMPANY_NAME}_{ADDIN_NAME}_palette_id'
\ No newline at end of file
+sample_palette_id = f'{COMPANY_NAME}_{ADDIN_NAME}_palette_id'
+
+# Preview throttling
+# While an input is being changed, e.g. by dragging a manipulator, a preview is only
+# built once the inputs have been quiet for PREVIEW_DEBOUNCE seconds and at most
+# PREVIEW_MAX_RATE times per second. Intermediate states are dropped.
+PREVIEW_DEBOUNCE = 0.15
+PREVIEW_MAX_RATE = 4.0
+
+# Texture patterns
+# Up to PATTERN_SINGLE_MAX_INSTANCES instances the texture is repeated by a single rectangular
+# pattern feature. Larger areas are built by hierarchical doubling patterns, see
+# lib/surfacetexture/pattern_plan.py.
+PATTERN_SINGLE_MAX_INSTANCES = 64
+
+# Unit cell cache
+# The base feature engine keeps the B-rep of every unit cell it models in this folder and
+# imports it the next time the same texture is built. The least recently used cells are
+# deleted when the folder grows beyond CELL_CACHE_MAX_BYTES. None disables the cache.
+CELL_CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.SurfaceTextureCreator', 'cell_cache')
+CELL_CACHE_MAX_BYTES = 256*1024*1024
+
+# Mesh preview
+# The mesh preview draws at most PREVIEW_MESH_MAX_INSTANCES cells of the texture. The arcs of
+# the groove profile are tessellated with a chord tolerance of the given fraction of the width.
+PREVIEW_MESH_MAX_INSTANCES = 2500
+PREVIEW_MESH_TOLERANCES = {'Coarse': 0.05, 'Medium': 0.01, 'Fine': 0.002}
+
+# Tracing
+# Tracing is off unless it is turned on here to analyse slow dialogs. With TRACE_ENABLED every
+# event handler invocation is recorded with its wall time and nested spans in a ring buffer of
+# the last TRACE_CAPACITY spans, see lib/fusion360utils/trace_utils.py. With TRACE_API_CALLS
+# the calls into the Fusion API are counted per span, which slows every call down. To keep the
+# trace, set TRACE_EXPORT_PATH to a file, e.g.
+#     os.path.join(os.path.expanduser('~'), '.SurfaceTextureCreator', 'trace.json')
+# When the add-in stops, the trace is written there in the Chrome trace format, open it in
+# chrome://tracing or https://ui.perfetto.dev. None disables the export.
+TRACE_ENABLED = False
+TRACE_CAPACITY = 4096
+TRACE_API_CALLS = False
+TRACE_EXPORT_PATH = None
+
+# Logging
+# Messages below LOG_LEVEL ('Info', 'Warning' or 'Error') are dropped before they are formatted.
+# The others are written every LOG_FLUSH_INTERVAL seconds in one batch, errors at once. To keep
+# the messages in a file, set LOG_FILE_PATH, e.g. to
+#     os.path.join(os.path.expanduser('~'), '.SurfaceTextureCreator', 'addin.log')
+# The file is rotated at LOG_FILE_MAX_BYTES keeping LOG_FILE_BACKUPS old files. None disables
+# the file. LOG_SAMPLING keeps only the given fraction of the Info messages logged by the named
+# event handlers, e.g. while a manipulator is dragged. Warnings and errors are never sampled.
+LOG_LEVEL = 'Info' if DEBUG else 'Warning'
+LOG_FLUSH_INTERVAL = 0.25
+LOG_FILE_PATH = None
+LOG_FILE_MAX_BYTES = 1024*1024
+LOG_FILE_BACKUPS = 3
+LOG_SAMPLING = {'command_input_changed': 0.2, 'command_preview': 0.5}
+
+# Face UV mapping
+# Curved faces are sampled on a grid of UV_LAYOUT_SAMPLES by UV_LAYOUT_SAMPLES parameters to lay
+# out the texture by arc length, see lib/surfacetexture/uv_layout.py. Finer grids follow strongly
+# curved faces more closely and cost one larger evaluator call.
+UV_LAYOUT_SAMPLES = 65
+
+# Overlap check
+# The land between neighbouring texture instances, in cm, is checked before the texture is built,
+# see lib/surfacetexture/overlap_check.py. Smaller land is reported as a warning, overlapping
+# grooves always are.
+MIN_LAND_WIDTH = 0.0
@@ -14,6 +14,8 @@ from typing import Callable
 
 import adsk.core
 from .general_utils import handle_error
+from .log_utils import handler_scope
+from .trace_utils import span
 
 
 # Global Variable to hold Event Handlers
@@ -74,15 +76,21 @@ def _create_handler(
 
 def _define_handler(handler_type, callback, name: str = None):
     name = name or handler_type.__name__
+    # Every invocation is recorded as span named after the callback, e.g. command_preview.
+    span_name = getattr(callback, '__name__', name)
+    span_category = getattr(callback, '__module__', '')
 
     class Handler(handler_type):
         def __init__(self):
             super().__init__()
 
         def notify(self, args):
-            try:
-                callback(args)
-            except:
-                handle_error(name)
+            with handler_scope(span_name):
+                # The span is closed by the exception, so it is recorded as failed before the error is handled.
+                try:
+                    with span(span_name, span_category):
+                        callback(args)
+                except:
+                    handle_error(name)
 
     return Handler
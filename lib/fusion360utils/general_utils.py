@@ -12,6 +12,7 @@
 import os
 import traceback
 import adsk.core
+from .log_utils import LEVELS, LogBackend, RotatingFileSink
 
 app = adsk.core.Application.get()
 ui = app.userInterface
@@ -21,29 +22,70 @@ try:
     from ... import config
     DEBUG = config.DEBUG
 except:
+    config = None
     DEBUG = False
 
+# Attempt to read the logging settings from parent config. A setting that cannot be used falls back
+# to its default on its own, so the console output keeps its flush event whatever fails.
+_log_setup_errors = []
+try:
+    _log_level = LEVELS[config.LOG_LEVEL]
+except Exception as error:
+    _log_level = adsk.core.LogLevels.InfoLogLevel
+    _log_setup_errors.append(f'LOG_LEVEL unusable, logging from Info on: {error!r}')
+try:
+    _log_path = getattr(config, 'LOG_FILE_PATH', None)
+    _file_sink = RotatingFileSink(_log_path, config.LOG_FILE_MAX_BYTES, config.LOG_FILE_BACKUPS) if _log_path else None
+except Exception as error:
+    _file_sink = None
+    _log_setup_errors.append(f'Log file disabled: {error!r}')
+_backend = LogBackend(
+    _log_level, getattr(config, 'LOG_FLUSH_INTERVAL', 0.25), _file_sink, getattr(config, 'LOG_SAMPLING', None),
+    f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_log_flush' if config is not None else f'{__package__}_log_flush')
+for _message in _log_setup_errors:
+    _backend.write_now(_message, adsk.core.LogLevels.WarningLogLevel, True)
+
 
-def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel, force_console: bool = False):
+def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel, force_console: bool = False, args: tuple = ()):
     """Utility function to easily handle logging in your app.
 
+    Messages below the configured level or dropped by the sampling rate of the running event
+    handler return before they are formatted. Errors are written at once, all other messages
+    are written in batches by a worker thread.
+
     Arguments:
     message -- The message to log.
     level -- The logging severity level.
     force_console -- Forces the message to be written to the Text Command window. 
+    args -- Values the message is %-formatted with, only if it is logged.
     """    
-    # Always print to console, only seen through IDE.
-    print(message)  
+    if not force_console and not _backend.accepts(level):
+        return
+    if args:
+        message = message % args
+
+    # If config.DEBUG is True write all log messages to the console.
+    console = DEBUG or force_console
 
-    # Log all errors to Fusion log file.
+    # Errors are also written to the Fusion log file.
     if level == adsk.core.LogLevels.ErrorLogLevel:
-        log_type = adsk.core.LogTypes.FileLogType
-        app.log(message, level, log_type)
+        _backend.write_now(message, level, console)
+    else:
+        _backend.submit(message, level, console)
 
-    # If config.DEBUG is True write all log messages to the console.
-    if DEBUG or force_console:
-        log_type = adsk.core.LogTypes.ConsoleLogType
-        app.log(message, level, log_type)
+
+def start_logging():
+    """Connects the console output of the log backend, call it when the add-in starts."""
+    _backend.start()
+
+
+def stop_logging():
+    """Writes the queued log messages and stops the worker, call it when the add-in stops."""
+    _backend.stop()
+
+
+def get_log_backend() -> LogBackend:
+    return _backend
 
 
 def handle_error(name: str, show_message_box: bool = False):
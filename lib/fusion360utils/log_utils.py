@@ -0,0 +1,218 @@
+import contextvars
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import NamedTuple
+
+import adsk.core
+
+app = adsk.core.Application.get()
+
+LEVEL_NAMES = {
+    adsk.core.LogLevels.InfoLogLevel: 'Info',
+    adsk.core.LogLevels.WarningLogLevel: 'Warning',
+    adsk.core.LogLevels.ErrorLogLevel: 'Error',
+}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+# Name of the event handler that is running, used for sampling.
+_handler_name = contextvars.ContextVar('handler_name', default=None)
+
+
+class LogRecord(NamedTuple):
+    time: float
+    level: int
+    message: str
+    console: bool
+
+
+class RotatingFileSink:
+    """Appends lines to a file. When the file would grow beyond max_bytes it is renamed to
+    path.1, the older files to path.2 and so on, and only backup_count of them are kept.
+
+    Arguments:
+    path -- Path of the log file, its folder is created if missing.
+    max_bytes -- Size at which the file is rotated.
+    backup_count -- Number of rotated files that are kept.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def write(self, lines: list):
+        text = ''.join(line+'\n' for line in lines)
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size and size+len(text) > self.max_bytes:
+            self.rotate()
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(text)
+
+    def rotate(self):
+        for index in range(self.backup_count-1, 0, -1):
+            if os.path.exists(f'{self.path}.{index}'):
+                os.replace(f'{self.path}.{index}', f'{self.path}.{index+1}')
+        if self.backup_count > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+
+
+class LogBackend:
+    """Filters, queues and writes log messages in batches.
+
+    Messages below level, and the ones dropped by the sampling rate of the running event
+    handler, are rejected by accepts before they are formatted. Accepted messages are put
+    into a queue that a worker thread drains every flush_interval seconds. It prints them,
+    appends them to the file sink and hands the ones for the Text Command window to the
+    main thread with a custom event, because the API must only be called from there. Each
+    batch is written to the console with a single app.log call. write_now bypasses the
+    queue for errors.
+
+    Arguments:
+    level -- Lowest level that is logged.
+    flush_interval -- Seconds between two batches.
+    file_sink -- Sink every message is appended to, or None.
+    sampling -- Fraction of the Info messages logged while an event handler runs, by handler name.
+    event_id -- Id of the custom event the console batches are delivered with.
+    """
+
+    def __init__(self, level: int = adsk.core.LogLevels.InfoLogLevel, flush_interval: float = 0.25,
+                 file_sink: RotatingFileSink = None, sampling: dict = None, event_id: str = None):
+        self.level = level
+        self.flush_interval = flush_interval
+        self.file_sink = file_sink
+        self.sampling = dict(sampling or {})
+        self.event_id = event_id
+        self._queue = deque()
+        self._console = deque()
+        self._sample_counts = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        self._event = None
+        self._event_handler = None
+
+    def start(self):
+        """Registers the custom event of the console batches. Must be called on the main thread."""
+        if self.event_id is None or self._event is not None:
+            return
+        app.unregisterCustomEvent(self.event_id)
+        self._event = app.registerCustomEvent(self.event_id)
+        self._event_handler = _ConsoleFlushHandler(self)
+        self._event.add(self._event_handler)
+
+    def stop(self):
+        """Writes all queued messages and stops the worker. Must be called on the main thread."""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self.flush()
+        if self._event is not None:
+            self._event.remove(self._event_handler)
+            app.unregisterCustomEvent(self.event_id)
+            self._event = None
+            self._event_handler = None
+        self._stop.clear()
+
+    def accepts(self, level: int) -> bool:
+        """Returns whether a message of the given level is logged. Warnings and errors are never sampled."""
+        if level < self.level:
+            return False
+        if level >= adsk.core.LogLevels.WarningLogLevel:
+            return True
+        name = _handler_name.get()
+        rate = self.sampling.get(name)
+        if rate is None or rate >= 1:
+            return True
+        # Every message is counted and kept when the count passes the next multiple of 1/rate,
+        # which spreads the kept messages evenly.
+        count = self._sample_counts.get(name, 0)+1
+        self._sample_counts[name] = count
+        return int(count*rate) > int((count-1)*rate)
+
+    def submit(self, message: str, level: int, console: bool):
+        """Queues a message, it is written with the next batch."""
+        self._queue.append(LogRecord(time.time(), level, message, console))
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='log flush', daemon=True)
+            self._worker.start()
+
+    def write_now(self, message: str, level: int, console: bool):
+        """Writes the queued messages and then the message itself before it returns. Must be called
+        on the main thread.
+        """
+        self._drain()
+        with self._lock:
+            self._write([LogRecord(time.time(), level, message, console)])
+        self._deliver_console()
+        app.log(message, level, adsk.core.LogTypes.FileLogType)
+
+    def flush(self):
+        """Writes all queued messages. Must be called on the main thread."""
+        self._drain()
+        self._deliver_console()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            if self._drain() and self._event is not None:
+                app.fireCustomEvent(self.event_id)
+
+    def _drain(self) -> bool:
+        """Writes the queued messages to stdout and the file sink. Returns whether there are
+        messages for the console.
+        """
+        with self._lock:
+            records = []
+            while self._queue:
+                records.append(self._queue.popleft())
+            self._write(records)
+            return bool(self._console)
+
+    def _write(self, records: list):
+        if not records:
+            return
+        lines = [record.message for record in records]
+        print('\n'.join(lines))
+        if self.file_sink is not None:
+            stamped = [f'{time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.time))} '
+                       f'{LEVEL_NAMES.get(record.level, record.level)}: {record.message}' for record in records]
+            try:
+                self.file_sink.write(stamped)
+            except OSError as error:
+                print(f'Log file not written: {error}', file=sys.stderr)
+        self._console.extend(record for record in records if record.console)
+
+    def _deliver_console(self):
+        records = []
+        while self._console:
+            records.append(self._console.popleft())
+        # One call per run of messages of the same level.
+        for level, run in itertools.groupby(records, key=lambda record: record.level):
+            app.log('\n'.join(record.message for record in run), level, adsk.core.LogTypes.ConsoleLogType)
+
+
+class _ConsoleFlushHandler(adsk.core.CustomEventHandler):
+    def __init__(self, backend: LogBackend):
+        super().__init__()
+        self.backend = backend
+
+    def notify(self, args):
+        self.backend.flush()
+
+
+@contextmanager
+def handler_scope(name: str):
+    """Marks the body of a with statement as run by the named event handler, e.g. for sampling."""
+    token = _handler_name.set(name)
+    try:
+        yield
+    finally:
+        _handler_name.reset(token)
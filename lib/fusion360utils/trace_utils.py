@@ -0,0 +1,312 @@
+import functools
+import json
+import sys
+import threading
+import time
+import types
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, NamedTuple
+
+# Attempt to read the tracing settings from parent config.
+try:
+    from ... import config
+    TRACE_ENABLED = config.TRACE_ENABLED
+    TRACE_CAPACITY = config.TRACE_CAPACITY
+    TRACE_API_CALLS = config.TRACE_API_CALLS
+except:
+    TRACE_ENABLED = False
+    TRACE_CAPACITY = 4096
+    TRACE_API_CALLS = False
+
+# Methods of the API objects that implement attribute access in Python instead of with
+# properties, such as the API objects of benchmarks/fake_adsk.
+_ATTRIBUTE_HOOKS = ('__getattribute__', '__getattr__', '__setattr__')
+
+
+class Span(NamedTuple):
+    """A finished span. Times are in seconds since the recorder was created."""
+    name: str
+    category: str
+    start: float
+    duration: float
+    depth: int
+    thread_id: int
+    api_calls: dict
+    failed: bool
+
+
+class TraceRecorder:
+    """Records nested spans into a ring buffer that keeps the last capacity spans.
+
+    Spans are recorded when they end, so the children of a span come before it. With
+    count_api_calls the calls into the adsk modules made while a span of the thread is open
+    are counted. A profile function counts the method calls. Property reads and writes send
+    it no event, their getters and setters are builtins of the extension modules, so the
+    properties of the adsk classes are wrapped to count them as calls too. The adsk modules
+    are shared by all add-ins, so the original properties and the profile function that was
+    set before, e.g. by a debugger, are restored when the outermost span closes. Only the
+    outermost adsk call is counted, the calls an API wrapper makes into its extension module
+    are not. Counting slows every Python call down, so it is off by default.
+    benchmarks/trace_counts.py checks the counts against the fake adsk modules.
+
+    Arguments:
+    capacity -- Number of spans kept, the oldest ones are dropped first.
+    enabled -- Whether spans are recorded at all.
+    count_api_calls -- Whether calls into adsk are counted per span.
+    """
+
+    def __init__(self, capacity: int = 4096, enabled: bool = True, count_api_calls: bool = False):
+        self.enabled = enabled
+        self.count_api_calls = count_api_calls
+        self.origin = time.perf_counter()
+        self.dropped = 0
+        self._spans = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def span(self, name: str, category: str = ''):
+        """Context manager that records the time spent in its body as a span."""
+        if not self.enabled:
+            yield
+            return
+
+        stack = self._stack()
+        calls = {}
+        stack.append(calls)
+        # A span opened by a handler the API calls back into starts outside of the API again.
+        api_depth = getattr(self._local, 'api_depth', 0)
+        self._local.api_depth = 0
+        counting = self.count_api_calls and len(stack) == 1
+        if counting:
+            _wrap_properties()
+            _counting.recorder = self
+            profile = sys.getprofile()
+            sys.setprofile(self._profile)
+        failed = False
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            duration = time.perf_counter()-start
+            stack.pop()
+            self._local.api_depth = api_depth
+            if counting:
+                sys.setprofile(profile)
+                _counting.recorder = None
+                _unwrap_properties()
+            if stack:
+                # The calls of a child span also count for its parents.
+                for call, count in calls.items():
+                    stack[-1][call] = stack[-1].get(call, 0)+count
+            self._add(Span(name, category, start-self.origin, duration, len(stack),
+                           threading.get_ident(), calls, failed))
+
+    def spans(self) -> list:
+        """Returns the recorded spans, oldest first."""
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self.dropped = 0
+
+    def to_json(self) -> str:
+        """Returns the spans as JSON list of objects with the fields of Span."""
+        return json.dumps([span._asdict() for span in self.spans()], indent=1)
+
+    def to_chrome_trace(self) -> str:
+        """Returns the spans in the Chrome trace event format, e.g. for chrome://tracing or Perfetto."""
+        events = [{
+            'name': span.name,
+            'cat': span.category,
+            'ph': 'X',
+            'ts': span.start*1e6,
+            'dur': span.duration*1e6,
+            'pid': 0,
+            'tid': span.thread_id,
+            'args': {'api_calls': span.api_calls, 'failed': span.failed},
+        } for span in self.spans()]
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'})
+
+    def export(self, path: str, format: str = 'chrome'):
+        """Writes the spans to a file.
+
+        Arguments:
+        path -- Path of the file.
+        format -- 'chrome' for the Chrome trace event format or 'json' for a plain list of spans.
+        """
+        match format:
+            case 'chrome':
+                text = self.to_chrome_trace()
+            case 'json':
+                text = self.to_json()
+            case _:
+                raise ValueError(f'Unknown trace format: {format}')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+
+    def _add(self, span: Span):
+        with self._lock:
+            if len(self._spans) == self._spans.maxlen:
+                self.dropped += 1
+            self._spans.append(span)
+
+    def _stack(self) -> list:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _profile(self, frame, event: str, arg):
+        local = self._local
+        match event:
+            case 'call':
+                if local.api_depth:
+                    local.api_depth += 1
+                elif frame.f_globals.get('__name__', '').startswith('adsk'):
+                    local.api_depth = 1
+                    self._count_frame(frame)
+            case 'return':
+                if local.api_depth:
+                    local.api_depth -= 1
+            case 'c_call':
+                # Functions of the extension modules that are called directly. Property reads
+                # send no event and are counted by the wrapped properties instead.
+                if not local.api_depth and (getattr(arg, '__module__', None) or '').startswith('adsk'):
+                    self._count(getattr(arg, '__qualname__', arg.__name__))
+
+    def _count_frame(self, frame):
+        code = frame.f_code
+        if code.co_name not in _ATTRIBUTE_HOOKS:
+            self._count(getattr(code, 'co_qualname', code.co_name))
+            return
+        # Attribute access is counted as access of the member. Methods are counted when
+        # they are called, not when they are looked up.
+        instance, name = (frame.f_locals[variable] for variable in code.co_varnames[:2])
+        if name.startswith('_') or (code.co_name != '__setattr__' and callable(getattr(type(instance), name, None))):
+            return
+        self._count(f'{type(instance).__name__}.{name}')
+
+    def _call_api(self, call: str, function: Callable, args: tuple):
+        """Calls the getter or setter of a wrapped property and counts it unless it is called by the API itself."""
+        local = self._local
+        if local.api_depth:
+            return function(*args)
+        self._count(call)
+        # The builtin would otherwise be counted again by its c_call event.
+        local.api_depth = 1
+        try:
+            return function(*args)
+        finally:
+            local.api_depth = 0
+
+    def _count(self, call: str):
+        calls = self._local.stack[-1]
+        calls[call] = calls.get(call, 0)+1
+
+
+# The recorder that counts the API calls of the thread, set while its outermost span is open.
+_counting = threading.local()
+# Class, name, original and counting property of every property of the adsk classes that can be wrapped,
+# collected once per module. The counting properties are installed while any thread counts API calls.
+_properties = []
+_scanned_modules = set()
+_wrapping_lock = threading.Lock()
+_wrapping_threads = 0
+
+
+def _wrap_properties():
+    """Installs the counting properties, see TraceRecorder."""
+    global _wrapping_threads
+    with _wrapping_lock:
+        _wrapping_threads += 1
+        if _wrapping_threads > 1:
+            return
+        _scan_properties()
+        for entry in list(_properties):
+            cls, name, _, counted = entry
+            try:
+                setattr(cls, name, counted)
+            except (AttributeError, TypeError):
+                # Classes of extension modules that are not heap types cannot be changed.
+                _properties.remove(entry)
+
+
+def _unwrap_properties():
+    """Puts the original properties back once no thread counts API calls anymore."""
+    global _wrapping_threads
+    with _wrapping_lock:
+        _wrapping_threads -= 1
+        if _wrapping_threads > 0:
+            return
+        for cls, name, original, _ in _properties:
+            setattr(cls, name, original)
+
+
+def _scan_properties():
+    """Collects the properties of the classes in the adsk modules loaded since the last scan."""
+    for module_name, module in list(sys.modules.items()):
+        if not module_name.startswith('adsk') or module_name in _scanned_modules:
+            continue
+        _scanned_modules.add(module_name)
+        for cls in list(vars(module).values()):
+            if not isinstance(cls, type) or cls.__module__ != module_name:
+                continue
+            for name, value in list(vars(cls).items()):
+                # Accessors written in Python are already counted by the profile function.
+                if type(value) is not property or any(map(_is_api_function, (value.fget, value.fset, value.fdel))):
+                    continue
+                call = f'{cls.__qualname__}.{name}'
+                counted = property(_counted(value.fget, call), _counted(value.fset, call),
+                                   _counted(value.fdel, call), value.__doc__)
+                _properties.append((cls, name, value, counted))
+
+
+def _counted(accessor: Callable, call: str) -> Callable:
+    if accessor is None:
+        return None
+
+    def counted(*args):
+        recorder = getattr(_counting, 'recorder', None)
+        if recorder is None:
+            return accessor(*args)
+        return recorder._call_api(call, accessor, args)
+    return counted
+
+
+def _is_api_function(function) -> bool:
+    return isinstance(function, types.FunctionType) and (function.__module__ or '').startswith('adsk')
+
+
+_recorder = TraceRecorder(TRACE_CAPACITY, TRACE_ENABLED, TRACE_API_CALLS)
+
+
+def get_recorder() -> TraceRecorder:
+    """Returns the recorder the event handlers of fusion360utils record their spans to."""
+    return _recorder
+
+
+def span(name: str, category: str = ''):
+    """Records the body of a with statement as span of the global recorder.
+
+    Arguments:
+    name -- Name of the span, e.g. the function that is timed.
+    category -- Group of the span, e.g. the module of the function.
+    """
+    return _recorder.span(name, category)
+
+
+def traced(function: Callable) -> Callable:
+    """Decorator that records every call of the function as span of the global recorder."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with _recorder.span(function.__name__, function.__module__):
+            return function(*args, **kwargs)
+    return wrapper
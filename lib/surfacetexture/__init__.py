@@ -0,0 +1,13 @@
+from .groove_profile import *
+from .heightmap import *
+from .tiled_export import *
+from .mesh import *
+from .slicing import *
+from .cell_cache import *
+from .feasible_region import *
+from .batch_table import *
+from .parameter_field import *
+from .uv_layout import *
+from .lattice import *
+from .overlap_check import *
+from .metrics import *
@@ -0,0 +1,138 @@
+"""Tables of texture variants for batch runs and the reports of the runs.
+
+A table is a CSV file with a header row or a JSON file holding a list of objects,
+one row or object per job:
+
+    name                -- Label of the job in the report, optional.
+    texture_type        -- 'Dots', 'Lines' or 'Hatch'.
+    Texture_depth, Texture_width, Texture_flank_angle, Texture_period
+                        -- Expressions as typed into the dialog, e.g. '0.2 mm' or '30 deg'.
+                           Plain numbers are in the default units of the design.
+    count_x, count_y    -- Instances of the texture in x and y, optional.
+    engine              -- 'Parametric' or 'Base feature', optional.
+    export              -- File the design is exported to after the job, optional. The
+                           extension selects the format, relative paths start at the table.
+
+Optional fields that are missing or empty keep the value of the job before. Rows that
+cannot be read are returned as jobs with an error, so a run reports them instead of
+stopping. The report has one row per job in the format of the table.
+"""
+
+import csv
+import json
+import os
+from typing import NamedTuple
+
+from .heightmap import TEXTURE_TYPES
+
+PARAMETER_NAMES = ('Texture_depth', 'Texture_width', 'Texture_flank_angle', 'Texture_period')
+ENGINES = ('Parametric', 'Base feature')
+EXPORT_FORMATS = ('.f3d', '.step', '.stp', '.smt', '.stl')
+TABLE_FORMATS = ('.csv', '.json')
+
+
+class BatchJob(NamedTuple):
+    name: str
+    texture_type: str
+    parameters: dict
+    count_x: int
+    count_y: int
+    engine: str
+    export: str
+    error: str
+
+
+class BatchResult(NamedTuple):
+    name: str
+    texture_type: str
+    status: str
+    rebuilt: bool
+    seconds: float
+    error: str
+
+
+def read_batch_table(path: str) -> list:
+    """Returns the jobs of a CSV or JSON table in the order of the table.
+
+    Arguments:
+    path -- Path of the table, its extension selects the format.
+    """
+    match os.path.splitext(path)[1].lower():
+        case '.csv':
+            with open(path, newline='', encoding='utf-8-sig') as file:
+                rows = list(csv.DictReader(file))
+        case '.json':
+            with open(path, encoding='utf-8') as file:
+                rows = json.load(file)
+            if not isinstance(rows, list):
+                raise ValueError('A JSON batch table must hold a list of jobs.')
+        case extension:
+            raise ValueError(f'Unknown batch table format: {extension}')
+    folder = os.path.dirname(os.path.abspath(path))
+    return [_parse_job(row, index+1, folder) for index, row in enumerate(rows)]
+
+
+def report_path(table_path: str) -> str:
+    """Returns the path of the report of a table, next to it and in the same format."""
+    root, extension = os.path.splitext(table_path)
+    return f'{root}_report{extension}'
+
+
+def write_batch_report(path: str, results: list):
+    """Writes one row per result to a CSV or JSON file, selected by the extension of path."""
+    rows = [result._asdict() for result in results]
+    match os.path.splitext(path)[1].lower():
+        case '.csv':
+            with open(path, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=BatchResult._fields)
+                writer.writeheader()
+                writer.writerows(rows)
+        case '.json':
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(rows, file, indent=2)
+        case extension:
+            raise ValueError(f'Unknown batch report format: {extension}')
+
+
+def _parse_job(row, number: int, folder: str) -> BatchJob:
+    if not isinstance(row, dict):
+        return BatchJob(f'Row {number}', '', {}, None, None, None, None, 'The row is not an object.')
+    fields = {key.strip(): _text(value) for key, value in row.items() if key is not None}
+    name = fields.get('name') or f'Row {number}'
+    texture_type = fields.get('texture_type', '')
+    errors = []
+
+    if texture_type not in TEXTURE_TYPES:
+        errors.append(f'unknown texture type {texture_type!r}')
+    parameters = {}
+    for parameter in PARAMETER_NAMES:
+        if fields.get(parameter):
+            parameters[parameter] = fields[parameter]
+        else:
+            errors.append(f'{parameter} missing')
+
+    counts = []
+    for key in ('count_x', 'count_y'):
+        try:
+            count = int(fields[key]) if fields.get(key) else None
+        except ValueError:
+            count = 0
+        if count is not None and count < 1:
+            errors.append(f'{key} must be a positive integer')
+        counts.append(count)
+
+    engine = fields.get('engine') or None
+    if engine is not None and engine not in ENGINES:
+        errors.append(f'unknown engine {engine!r}')
+
+    export = fields.get('export') or None
+    if export is not None:
+        export = os.path.join(folder, export)
+        if os.path.splitext(export)[1].lower() not in EXPORT_FORMATS:
+            errors.append(f'unknown export format of {export!r}')
+
+    return BatchJob(name, texture_type, parameters, *counts, engine, export, ', '.join(errors) or None)
+
+
+def _text(value) -> str:
+    return '' if value is None else str(value).strip()
@@ -0,0 +1,193 @@
+"""Content addressed on-disk cache of unit cell geometry and derived depth maps.
+
+Entries are files named by the SHA-256 of the texture type, the kind of the entry
+and the texture parameters quantized to a fixed grid, e.g. a B-rep export of a cell
+('cell.smt') or its depth map ('heightmap.npy'). Parameters that differ by less
+than the quantum share an entry, so values that went through the unit conversions
+of the dialog still hit.
+
+The cache is bounded in size. Every hit updates the modification time of the entry,
+and when a new entry pushes the total above max_bytes, the entries used least
+recently are deleted. Entries are written to a temporary file first and renamed,
+so several processes can share one cache folder. The module does not import adsk,
+the B-rep files are written and read by the caller.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from .groove_profile import compute_profile
+from .heightmap import TEXTURE_TYPES, rasterize
+
+# Quanta of the cache key. Lengths are in cm, 1e-6 cm is a hundredth of a micrometre.
+LENGTH_QUANTUM = 1e-6
+ANGLE_QUANTUM = 1e-6
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    stores: int
+    evictions: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits+self.misses
+        return self.hits/lookups if lookups else 0.0
+
+
+def cell_key(texture_type: str, kind: str, depth: float, width: float, flank_angle: float, period: float, **extra) -> str:
+    """Returns the cache key of an entry as hexadecimal SHA-256.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    kind -- What the entry holds, e.g. 'cell.smt'. The extension becomes the one of the file.
+    depth, width, flank_angle, period -- Texture parameters in cm and radians.
+    extra -- Further lengths the entry depends on, e.g. the pixel size of a depth map.
+    """
+    if texture_type not in TEXTURE_TYPES:
+        raise ValueError(f'Unknown texture type: {texture_type}')
+    fields = {
+        'texture_type': texture_type,
+        'kind': kind,
+        'depth': _quantize(depth, LENGTH_QUANTUM),
+        'width': _quantize(width, LENGTH_QUANTUM),
+        'flank_angle': _quantize(flank_angle, ANGLE_QUANTUM),
+        'period': _quantize(period, LENGTH_QUANTUM),
+    }
+    fields.update({name: _quantize(value, LENGTH_QUANTUM) for name, value in extra.items()})
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class CellCache:
+    """Size bounded, least recently used file cache.
+
+    Arguments:
+    directory -- Folder of the cache, created if missing.
+    max_bytes -- Total size of the entries above which the least recently used ones are evicted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str, kind: str) -> str:
+        """Returns the path of the entry, whether it exists or not."""
+        return os.path.join(self.directory, key+os.path.splitext(kind)[1])
+
+    def get(self, key: str, kind: str):
+        """Returns the path of the entry and marks it as used, or None if it is not cached."""
+        path = self.path(key, kind)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return path
+
+    def store(self, key: str, kind: str, write: Callable[[str], object]) -> str:
+        """Adds an entry and returns its path. write is called with a temporary path in the cache
+        folder that has the extension of the entry and must create the file there.
+        """
+        path = self.path(key, kind)
+        handle, temporary = tempfile.mkstemp(suffix=os.path.splitext(kind)[1], dir=self.directory, prefix='.tmp-')
+        os.close(handle)
+        try:
+            write(temporary)
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        self._stores += 1
+        self.evict(keep=path)
+        return path
+
+    def get_or_create(self, key: str, kind: str, write: Callable[[str], object]) -> str:
+        """Returns the path of the entry, created by write if it is not cached yet."""
+        return self.get(key, kind) or self.store(key, kind, write)
+
+    def evict(self, keep: str = None) -> int:
+        """Deletes least recently used entries until the cache fits into max_bytes. The entry keep is
+        never deleted. Returns the number of deleted entries.
+        """
+        entries = self._entries()
+        total = sum(entry.st_size for entry in entries)
+        evicted = 0
+        for entry in sorted(entries, key=lambda entry: entry.st_mtime):
+            if total <= self.max_bytes:
+                break
+            if entry.path == keep:
+                continue
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            total -= entry.st_size
+            evicted += 1
+        self._evictions += evicted
+        return evicted
+
+    def clear(self):
+        for entry in self._entries():
+            os.remove(entry.path)
+
+    def stats(self) -> CacheStats:
+        """Returns the counters of this instance and the current size of the cache."""
+        entries = self._entries()
+        return CacheStats(self._hits, self._misses, self._stores, self._evictions,
+                          len(entries), sum(entry.st_size for entry in entries))
+
+    def _entries(self) -> list:
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.is_file() and not entry.name.startswith('.tmp-'):
+                    stat = entry.stat()
+                    entries.append(_Entry(entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+
+class _Entry(NamedTuple):
+    path: str
+    st_size: int
+    st_mtime: float
+
+
+def cell_heightmap(cache: CellCache, texture_type: str, depth: float, width: float, flank_angle: float,
+                   period: float, pixel_size: float) -> np.ndarray:
+    """Returns the depth map of one cell centered on a site, rendered by heightmap.rasterize or loaded
+    from the cache. Cells are small, so the map is read into memory and the entry can be evicted at any time.
+
+    Arguments:
+    cache -- Cache to look the map up in and to store it to.
+    texture_type, depth, width, flank_angle, period -- Texture parameters in cm and radians.
+    pixel_size -- Edge length of a pixel.
+    """
+    if not compute_profile(depth, width, flank_angle, period).feasible:
+        raise ValueError('The texture parameters do not describe a valid groove profile.')
+    kind = 'heightmap.npy'
+    key = cell_key(texture_type, kind, depth, width, flank_angle, period, pixel_size=pixel_size)
+
+    def write(path: str):
+        image = rasterize(texture_type, depth, width, flank_angle, period, (period, period), pixel_size,
+                          origin=(-period/2, -period/2))
+        np.save(path, image)
+
+    return np.load(cache.get_or_create(key, kind, write))
+
+
+def _quantize(value: float, quantum: float) -> int:
+    return int(round(float(value)/quantum))
@@ -0,0 +1,86 @@
+"""Projection of texture parameters onto the region in which the groove profile exists.
+
+compute_profile gives the limits of every parameter with the other ones held fixed, which
+is enough to clamp the input that is being changed. A combination reached otherwise, e.g.
+by typing a value or by a unit conversion, may still violate the limits of the other
+inputs. For a fixed flank angle a the profile exists iff the ratio of depth and width lies
+in the open interval
+
+    (1-sin a)/(2*cos a) < depth/width < 1/(2*tan a),
+
+the region is a wedge through the origin of the (width, depth) plane. project_parameters
+moves a point onto the nearest point of that wedge in closed form, so parameters can be
+repaired before any geometry is built instead of letting a sketch fail.
+"""
+
+import math
+from typing import NamedTuple
+
+from .groove_profile import compute_profile, depth_limits, width_limits
+
+# Smallest length a parameter is raised to, in cm.
+MIN_LENGTH = 1e-6
+# Limits are moved inwards by at least this fraction of the width, so they hold strictly.
+RELATIVE_MARGIN = 1e-9
+
+
+class ProjectedParameters(NamedTuple):
+    depth: float
+    width: float
+    flank_angle: float
+    period: float
+    changed: bool
+    feasible: bool
+
+
+def project_parameters(depth: float, width: float, flank_angle: float, period: float,
+                       distance_margin: float = 0.0, angle_margin: float = 0.0, fixed: str = None) -> ProjectedParameters:
+    """Returns the nearest parameters for which the groove profile exists.
+
+    The flank angle is only clamped to [0, pi/2), because angles and lengths cannot be compared.
+    Depth and width are then moved to the nearest point of the wedge of feasible ratios, unless one
+    of them is fixed, in which case only the other one is clamped to its limits.
+
+    Arguments:
+    depth, width, flank_angle, period -- Texture parameters in cm and radians.
+    distance_margin, angle_margin -- Distances the limits are moved inwards, as in compute_profile.
+    fixed -- 'depth' or 'width' to keep that parameter, e.g. the input the user is changing.
+    """
+    given = (depth, width, flank_angle, period)
+    width = max(width, MIN_LENGTH)
+    depth = max(depth, MIN_LENGTH)
+    period = max(period, distance_margin, MIN_LENGTH)
+    flank_angle = min(max(flank_angle, 0.0), math.pi/2-max(angle_margin, RELATIVE_MARGIN))
+    margin = max(distance_margin, RELATIVE_MARGIN*width)
+
+    width_min, width_max = (float(limit) for limit in width_limits(depth, flank_angle, margin))
+    depth_min, depth_max = (float(limit) for limit in depth_limits(width, flank_angle, margin))
+    if fixed == 'depth' and width_min < width_max:
+        width = min(max(width, width_min), width_max)
+    elif fixed == 'width' and depth_min < depth_max:
+        depth = min(max(depth, depth_min), depth_max)
+    else:
+        # Nothing is fixed or the margins leave no room for the fixed parameter.
+        sin, cos = math.sin(flank_angle), math.cos(flank_angle)
+        ratio_min = (1-sin)/(2*cos)
+        ratio_max = cos/(2*sin) if sin > 0 else math.inf
+        ratio = depth/width
+        if not ratio_min < ratio < ratio_max:
+            # Orthogonal projection onto the boundary ray depth = ratio*width of the wedge.
+            ratio = ratio_min if ratio <= ratio_min else ratio_max
+            width = max((width+ratio*depth)/(1+ratio*ratio), MIN_LENGTH)
+            depth = ratio*width
+        # The margins move the point from the boundary into the wedge.
+        depth = _clamp_depth(depth, width, flank_angle, margin)
+
+    feasible = bool(compute_profile(depth, width, flank_angle, period).feasible)
+    projected = (depth, width, flank_angle, period)
+    return ProjectedParameters(*projected, changed=projected != given, feasible=feasible)
+
+
+def _clamp_depth(depth: float, width: float, flank_angle: float, margin: float) -> float:
+    depth_min, depth_max = (float(limit) for limit in depth_limits(width, flank_angle, margin))
+    if depth_min > depth_max:
+        # The margins leave no room, the middle of the open interval is the best there is.
+        depth_min = depth_max = float(sum(depth_limits(width, flank_angle)))/2
+    return min(max(depth, depth_min), depth_max)
@@ -0,0 +1,212 @@
+"""Groove profile geometry of the surface texture, independent of the Fusion API.
+
+The profile is the one drawn by create_sketch in commands/commandDialog/dialog.py:
+a flat top of the given width, two straight flanks inclined by the flank angle
+against the vertical and a bottom arc that is tangent to both flanks and touches
+the given depth on the middle line. Dots revolve this profile around the middle
+line, Lines and Hatch extrude it.
+
+Coordinates follow the sketch: x is measured from the middle line, z is measured
+downwards from the top surface. Lengths may be given in any unit (Fusion uses cm
+internally), angles are in radians. Every function accepts scalars or NumPy
+arrays and broadcasts its arguments against each other, so tens of thousands of
+parameter combinations can be screened in one call. The module does not import
+adsk. Outside of Fusion add the lib folder of the add-in to sys.path and import
+surfacetexture.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+
+class GrooveProfile(NamedTuple):
+    """Result of compute_profile. Every field is an array of the broadcast input shape."""
+    radius: np.ndarray
+    arc_center_z: np.ndarray
+    tangent_x: np.ndarray
+    tangent_z: np.ndarray
+    depth_min: np.ndarray
+    depth_max: np.ndarray
+    width_min: np.ndarray
+    width_max: np.ndarray
+    flank_angle_min: np.ndarray
+    flank_angle_max: np.ndarray
+    period_min: np.ndarray
+    feasible: np.ndarray
+
+
+def calculate_radius(depth, width, flank_angle) -> np.ndarray:
+    """Returns the radius of the bottom arc. Non-positive values mark profiles that cannot be drawn.
+
+    Arguments:
+    depth -- Depth of the groove.
+    width -- Width of the groove at the top surface.
+    flank_angle -- Angle of the flanks against the vertical in radians.
+    """
+    depth, width, flank_angle = np.broadcast_arrays(*_as_float(depth, width, flank_angle))
+    sin = np.sin(flank_angle)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (width*np.cos(flank_angle)/2-depth*sin)/(1-sin)
+
+
+def tangent_points(depth, width, flank_angle):
+    """Returns the x and z coordinates of the point where the right flank meets the bottom arc.
+
+    The left tangent point is the mirror image at x = 0.
+    """
+    depth, width, flank_angle = _as_float(depth, width, flank_angle)
+    radius = calculate_radius(depth, width, flank_angle)
+    tangent_x = radius*np.cos(flank_angle)
+    tangent_z = depth-radius+radius*np.sin(flank_angle)
+    return tangent_x, tangent_z
+
+
+def profile_depth(x, depth, width, flank_angle) -> np.ndarray:
+    """Returns the depth of the groove below the top surface at the distance x from the middle line.
+
+    This is the profile of create_sketch evaluated analytically: the bottom arc up to the tangent
+    points, the flanks up to half the width and zero outside of the groove. For Dots x is the
+    distance from the axis of revolution.
+
+    Arguments:
+    x -- Distance from the middle line, the sign is ignored.
+    depth -- Depth of the groove.
+    width -- Width of the groove at the top surface.
+    flank_angle -- Angle of the flanks against the vertical in radians.
+    """
+    x = np.abs(np.asarray(x))
+    if x.dtype.kind != 'f':
+        x = x.astype(float)
+    # The parameters are cast to the precision of x, so float32 coordinates are evaluated in float32.
+    radius = calculate_radius(depth, width, flank_angle).astype(x.dtype)
+    tangent_x, tangent_z = (value.astype(x.dtype) for value in tangent_points(depth, width, flank_angle))
+    depth = np.asarray(depth, dtype=x.dtype)
+    half_width = np.asarray(width, dtype=x.dtype)/2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        flank = tangent_z*(half_width-x)/(half_width-tangent_x)
+        arc = depth-radius+np.sqrt(np.maximum(radius*radius-x*x, 0))
+    return np.where(x <= tangent_x, arc, np.where(x < half_width, flank, 0))
+
+
+def profile_half_width(z, depth, width, flank_angle) -> np.ndarray:
+    """Returns the distance from the middle line at which the profile reaches the depth z, the inverse
+    of profile_depth. Half the width for z <= 0 and zero for z >= depth.
+
+    Arguments:
+    z -- Depth below the top surface.
+    depth, width, flank_angle -- Profile parameters.
+    """
+    z, depth, width, flank_angle = np.broadcast_arrays(*_as_float(z, depth, width, flank_angle))
+    radius = calculate_radius(depth, width, flank_angle)
+    tangent_x, tangent_z = tangent_points(depth, width, flank_angle)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        flank = width/2-z*(width/2-tangent_x)/tangent_z
+        arc = np.sqrt(np.maximum(radius*radius-(z-depth+radius)**2, 0))
+    half_width = np.where(z < tangent_z, flank, arc)
+    return np.where(z <= 0, width/2, np.where(z >= depth, 0.0, half_width))
+
+
+def profile_samples(depth: float, width: float, flank_angle: float, tolerance: float):
+    """Returns the polyline (x, z) approximating one half of the profile from the middle line to half the width.
+
+    The bottom arc is split into equal angles so that no chord deviates more than the tolerance
+    from the arc, the flank is a single segment. Unlike the other functions this one only takes
+    scalars, x is ascending and starts at 0, z is the depth at x.
+
+    Arguments:
+    depth, width, flank_angle -- Profile parameters.
+    tolerance -- Maximum distance between the arc and its chords.
+    """
+    radius = float(calculate_radius(depth, width, flank_angle))
+    if not radius > 0:
+        raise ValueError('The profile parameters do not describe a valid groove profile.')
+    # The arc runs from the middle line to the tangent point, which lies at the angle pi/2-flank_angle.
+    arc_angle = np.pi/2-flank_angle
+    max_step = 2*np.arccos(max(1-tolerance/radius, -1.0))
+    steps = max(1, int(np.ceil(arc_angle/max_step-1e-9)))
+    x = radius*np.sin(np.linspace(0, arc_angle, steps+1))
+    if width/2-x[-1] > 1e-9*width:
+        x = np.append(x, width/2)
+    return x, profile_depth(x, depth, width, flank_angle)
+
+
+def depth_limits(width, flank_angle, margin=0.0):
+    """Returns the open interval (minimum, maximum) of depths for which the profile exists.
+
+    The maximum is infinite for vertical flanks.
+
+    Arguments:
+    width -- Width of the groove at the top surface.
+    flank_angle -- Angle of the flanks against the vertical in radians.
+    margin -- Distance the limits are moved inwards, e.g. to respect the display precision.
+    """
+    width, flank_angle = _as_float(width, flank_angle)
+    depth_min = 0.5*width*(1-np.sin(flank_angle))/np.cos(flank_angle)+margin
+    with np.errstate(divide='ignore'):
+        depth_max = np.where(flank_angle > 0, 0.5*width/np.tan(flank_angle), np.inf)-margin
+    return depth_min, depth_max
+
+
+def width_limits(depth, flank_angle, margin=0.0):
+    """Returns the open interval (minimum, maximum) of widths for which the profile exists."""
+    depth, flank_angle = _as_float(depth, flank_angle)
+    width_min = 2*depth*np.tan(flank_angle)+margin
+    with np.errstate(divide='ignore'):
+        width_max = 2*depth*np.cos(flank_angle)/(1-np.sin(flank_angle))-margin
+    return width_min, width_max
+
+
+def flank_angle_limits(depth, width, margin=0.0):
+    """Returns the interval (minimum, maximum) of flank angles for which the profile exists.
+
+    The minimum is never below zero, i.e. the flanks never lean outwards.
+    """
+    depth, width = _as_float(depth, width)
+    with np.errstate(divide='ignore'):
+        flank_angle_min = np.maximum(np.pi/2-2*np.arctan(2*depth/width)+margin, 0.0)
+        flank_angle_max = np.arctan(width/(2*depth))-margin
+    return flank_angle_min, flank_angle_max
+
+
+def compute_profile(depth, width, flank_angle, period, distance_margin=0.0, angle_margin=0.0) -> GrooveProfile:
+    """Computes the complete profile geometry and its feasibility limits in one call.
+
+    Each limit is computed with the other two profile parameters held fixed, which is how the
+    command dialog clamps a single input. A profile is feasible if its depth lies inside the
+    depth limits and the period is positive. period_min is the period at which neighbouring
+    grooves touch, a smaller period lets them overlap.
+
+    Arguments:
+    depth -- Depth of the groove.
+    width -- Width of the groove at the top surface.
+    flank_angle -- Angle of the flanks against the vertical in radians.
+    period -- Distance between neighbouring grooves.
+    distance_margin -- Distance the depth and width limits are moved inwards.
+    angle_margin -- Angle the flank angle limits are moved inwards.
+    """
+    depth, width, flank_angle, period = np.broadcast_arrays(*_as_float(depth, width, flank_angle, period))
+    radius = calculate_radius(depth, width, flank_angle)
+    tangent_x, tangent_z = tangent_points(depth, width, flank_angle)
+    depth_min, depth_max = depth_limits(width, flank_angle, distance_margin)
+    width_min, width_max = width_limits(depth, flank_angle, distance_margin)
+    flank_angle_min, flank_angle_max = flank_angle_limits(depth, width, angle_margin)
+    feasible = (depth > depth_min) & (depth < depth_max) & (flank_angle >= 0) & (period > 0)
+    return GrooveProfile(
+        radius=radius,
+        arc_center_z=depth-radius,
+        tangent_x=tangent_x,
+        tangent_z=tangent_z,
+        depth_min=depth_min,
+        depth_max=depth_max,
+        width_min=width_min,
+        width_max=width_max,
+        flank_angle_min=flank_angle_min,
+        flank_angle_max=flank_angle_max,
+        period_min=width.copy(),
+        feasible=feasible,
+    )
+
+
+def _as_float(*values):
+    return tuple(np.asarray(value, dtype=float) for value in values)
@@ -0,0 +1,202 @@
+"""Depth map rasterizer for Dots, Lines and Hatch textures, independent of the Fusion API.
+
+The depth of every pixel is evaluated analytically from the groove profile of
+groove_profile.profile_depth, the same geometry create_sketch draws:
+
+    Dots  -- the profile revolved around every lattice site (i*period, j*period).
+    Lines -- the profile extruded along y, repeated along x at x = i*period.
+    Hatch -- Lines along x and along y, the deeper of both grooves wins.
+
+No solid geometry is built. Pixel (row, column) samples the point
+origin + ((column+0.5)*pixel_size, (row+0.5)*pixel_size), i.e. rows run along +y.
+Depths are stored as unsigned 16 bit integers, gray value = depth/depth_scale.
+"""
+
+import functools
+import math
+import struct
+import zlib
+
+import numpy as np
+
+from .groove_profile import compute_profile, profile_depth
+
+TEXTURE_TYPES = ('Dots', 'Lines', 'Hatch')
+MAX_GRAY = np.iinfo(np.uint16).max
+
+
+def fold(coordinate, period) -> np.ndarray:
+    """Returns the distance from the coordinate to the nearest multiple of the period."""
+    coordinate = np.asarray(coordinate)
+    return np.abs(coordinate-period*np.round(coordinate/period))
+
+
+def texture_depth(texture_type: str, x, y, depth: float, width: float, flank_angle: float, period: float) -> np.ndarray:
+    """Returns the depth of the texture below the top surface at the points (x, y).
+
+    The depth decreases with the distance from the nearest groove, so overlapping grooves
+    (period < width) are handled by only looking at the nearest one.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    x, y -- Coordinates of the points, broadcast against each other.
+    depth, width, flank_angle, period -- Texture parameters as in the command dialog.
+    """
+    x, y = np.broadcast_arrays(np.asarray(x), np.asarray(y))
+    match texture_type:
+        case 'Dots':
+            return profile_depth(np.hypot(fold(x, period), fold(y, period)), depth, width, flank_angle)
+        case 'Lines':
+            return profile_depth(fold(x, period), depth, width, flank_angle)
+        case 'Hatch':
+            return np.maximum(profile_depth(fold(x, period), depth, width, flank_angle),
+                              profile_depth(fold(y, period), depth, width, flank_angle))
+    raise ValueError(f'Unknown texture type: {texture_type}')
+
+
+def image_shape(size, pixel_size: float) -> tuple:
+    """Returns the (rows, columns) of an image covering size = (size_x, size_y)."""
+    columns = math.ceil(size[0]/pixel_size-1e-9)
+    rows = math.ceil(size[1]/pixel_size-1e-9)
+    return rows, columns
+
+
+def rasterize(texture_type: str, depth: float, width: float, flank_angle: float, period: float,
+              size, pixel_size: float, origin=(0.0, 0.0), depth_scale: float = None,
+              out: np.ndarray = None, band_rows: int = 256) -> np.ndarray:
+    """Renders the depth map of a texture into a uint16 image.
+
+    Lines and Hatch are separable and only evaluate the profile once per row and column.
+    Dots look the depth up in a table indexed by the squared distance from the nearest
+    site. Rows are processed in bands, so the working memory beyond the image stays
+    bounded by band_rows times the image width.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    depth, width, flank_angle, period -- Texture parameters as in the command dialog.
+    size -- (size_x, size_y) of the rendered area.
+    pixel_size -- Edge length of a pixel, in the same unit as the texture parameters.
+    origin -- Position of the lower left corner of the area relative to the lattice.
+    depth_scale -- Depth of one gray level. Defaults to depth/65535.
+    out -- Optional uint16 array of the image shape to render into, e.g. a memory map.
+    band_rows -- Number of rows evaluated at once.
+    """
+    if texture_type not in TEXTURE_TYPES:
+        raise ValueError(f'Unknown texture type: {texture_type}')
+    if not compute_profile(depth, width, flank_angle, period).feasible:
+        raise ValueError('The texture parameters do not describe a valid groove profile.')
+
+    rows, columns = image_shape(size, pixel_size)
+    if out is None:
+        out = np.empty((rows, columns), dtype=np.uint16)
+    elif out.shape != (rows, columns):
+        raise ValueError(f'out has shape {out.shape}, expected {(rows, columns)}.')
+    scale = 1/(depth_scale or depth/MAX_GRAY)
+
+    x = origin[0]+(np.arange(columns)+0.5)*pixel_size
+    y = origin[1]+(np.arange(rows)+0.5)*pixel_size
+    fold_x = fold(x, period).astype(np.float32)
+    fold_y = fold(y, period).astype(np.float32)
+
+    match texture_type:
+        case 'Lines':
+            out[:] = _quantize(profile_depth(fold_x, depth, width, flank_angle), scale)
+        case 'Hatch':
+            # Quantization is monotonic, so the maximum can be taken on the gray values.
+            gray_x = _quantize(profile_depth(fold_x, depth, width, flank_angle), scale)
+            gray_y = _quantize(profile_depth(fold_y, depth, width, flank_angle), scale)
+            for start in range(0, rows, band_rows):
+                stop = min(start+band_rows, rows)
+                np.maximum(gray_y[start:stop, None], gray_x[None, :], out=out[start:stop])
+        case 'Dots':
+            # The depth is looked up by the squared distance from the nearest site, which is the
+            # sum of a row and a column term, so every pixel costs one addition and one lookup.
+            lookup_table, steps_per_area = _radial_lookup_table(depth, width, flank_angle, scale)
+            # Both terms are clipped to the zero entry at the end of the first half of the table,
+            # their sum indexes the zero padded second half at most.
+            outside = (lookup_table.size-1)//2
+            index_x = np.minimum(np.rint(fold_x.astype(np.float64)**2*steps_per_area), outside).astype(np.intp)
+            index_y = np.minimum(np.rint(fold_y.astype(np.float64)**2*steps_per_area), outside).astype(np.intp)
+            for start in range(0, rows, band_rows):
+                stop = min(start+band_rows, rows)
+                np.take(lookup_table, index_y[start:stop, None]+index_x[None, :], out=out[start:stop])
+    return out
+
+
+@functools.lru_cache(maxsize=8)
+def _radial_lookup_table(depth: float, width: float, flank_angle: float, scale: float, size: int = 1 << 20):
+    """Returns gray values of the profile sampled evenly in the squared distance up to half the width
+    and the number of table entries per unit of squared distance.
+
+    Entry size-1 stands for half the width and is zero, like all entries after it up to 2*(size-1),
+    the largest index rasterize can produce. With 2^20 samples the error of the lookup stays well
+    below one gray level except directly at vertical flanks. Tables are cached, because rendering
+    a field tile by tile asks for the same table over and over.
+    """
+    squared_half_width = (width/2)**2
+    squared_distance = np.linspace(0, squared_half_width, size)
+    lookup_table = np.zeros(2*size-1, dtype=np.uint16)
+    lookup_table[:size-1] = _quantize(profile_depth(np.sqrt(squared_distance[:-1]), depth, width, flank_angle), scale)
+    lookup_table.flags.writeable = False
+    return lookup_table, (size-1)/squared_half_width
+
+
+def _quantize(depth: np.ndarray, scale: float) -> np.ndarray:
+    gray = np.rint(depth*np.float32(scale))
+    return np.clip(gray, 0, MAX_GRAY, out=gray).astype(np.uint16)
+
+
+def write_png(path: str, image: np.ndarray, text: dict = None, compression: int = 3):
+    """Writes a uint16 image as 16 bit grayscale PNG, row by row without copying the image.
+
+    Arguments:
+    path -- File to write.
+    image -- Two dimensional uint16 array, e.g. the result of rasterize.
+    text -- Optional key/value pairs stored as tEXt chunks, e.g. pixel size and depth scale.
+    compression -- zlib compression level. Depth maps are large, so a fast level is the default.
+    """
+    if image.dtype != np.uint16 or image.ndim != 2:
+        raise ValueError('Only two dimensional uint16 images can be written.')
+    rows, columns = image.shape
+    with open(path, 'wb') as file:
+        file.write(b'\x89PNG\r\n\x1a\n')
+        _write_chunk(file, b'IHDR', struct.pack('>IIBBBBB', columns, rows, 16, 0, 0, 0, 0))
+        for key, value in (text or {}).items():
+            _write_chunk(file, b'tEXt', f'{key}\0{value}'.encode('latin-1'))
+
+        compressor = zlib.compressobj(compression)
+        pending = []
+        pending_size = 0
+        for row in image:
+            # Filter type 0 followed by the big endian samples of the row.
+            pending.append(compressor.compress(b'\x00'+row.astype('>u2').tobytes()))
+            pending_size += len(pending[-1])
+            if pending_size > 1 << 20:
+                _write_chunk(file, b'IDAT', b''.join(pending))
+                pending = []
+                pending_size = 0
+        pending.append(compressor.flush())
+        _write_chunk(file, b'IDAT', b''.join(pending))
+        _write_chunk(file, b'IEND', b'')
+
+
+def write_heightmap(path: str, image: np.ndarray, pixel_size: float, depth_scale: float):
+    """Writes a depth map as 16 bit PNG (.png), NumPy array (.npy) or raw little endian uint16 (.raw).
+
+    PNG files carry the pixel size and the depth of one gray level as text chunks.
+    """
+    if path.lower().endswith('.png'):
+        write_png(path, image, {'pixel_size': repr(pixel_size), 'depth_scale': repr(depth_scale)})
+    elif path.lower().endswith('.npy'):
+        np.save(path, image)
+    elif path.lower().endswith('.raw'):
+        image.astype('<u2', copy=False).tofile(path)
+    else:
+        raise ValueError(f'Unsupported heightmap file type: {path}')
+
+
+def _write_chunk(file, chunk_type: bytes, data: bytes):
+    file.write(struct.pack('>I', len(data)))
+    file.write(chunk_type)
+    file.write(data)
+    file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type)) & 0xffffffff))
@@ -0,0 +1,154 @@
+"""Lattices the texture instances are arranged on, independent of the Fusion API.
+
+    Square      -- Site (i, j) at (i*period, j*period), the lattice of the pattern features.
+    Rectangular -- Site (i, j) at (i*period_x, j*period_y).
+    Staggered   -- Like Rectangular with every odd row shifted by half a period along x.
+    Hexagonal   -- Staggered with period_y = period*sqrt(3)/2, so all six neighbours of a site
+                   are one period away and dimples of a given width pack densest.
+
+Rows run along x and are numbered by j, site (0, 0) lies on the origin. Pattern features
+only repeat along two directions, so the Fusion features of the lattices other than Square
+are built by placing one cell per site, see BRepTextureBuilder.build_placed.
+"""
+
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from .groove_profile import profile_depth
+from .heightmap import TEXTURE_TYPES
+from .mesh import HeightfieldMesh
+from .uv_layout import Placements
+
+LATTICE_TYPES = ('Square', 'Rectangular', 'Staggered', 'Hexagonal')
+
+
+class Lattice(NamedTuple):
+    """period_x and period_y are the distances of the sites along a row and of the rows, shift is the
+    offset of the odd rows along x in periods along x.
+    """
+    period_x: float
+    period_y: float
+    shift: float
+
+    @property
+    def is_square(self) -> bool:
+        return self.period_x == self.period_y and self.shift == 0
+
+
+def make_lattice(lattice_type: str, period: float, period_y: float = None) -> Lattice:
+    """Returns the lattice of the given type.
+
+    Arguments:
+    lattice_type -- One of LATTICE_TYPES.
+    period -- Distance of the sites along x, for Hexagonal the distance of all neighbours.
+    period_y -- Distance of the rows for Rectangular and Staggered. Defaults to period.
+    """
+    if not period > 0 or (period_y is not None and not period_y > 0):
+        raise ValueError('The periods must be positive.')
+    period_y = period if period_y is None else period_y
+    match lattice_type:
+        case 'Square':
+            return Lattice(period, period, 0.0)
+        case 'Rectangular':
+            return Lattice(period, period_y, 0.0)
+        case 'Staggered':
+            return Lattice(period, period_y, 0.5)
+        case 'Hexagonal':
+            return Lattice(period, period*math.sqrt(3)/2, 0.5)
+    raise ValueError(f'Unknown lattice type: {lattice_type}')
+
+
+def lattice_sites(lattice: Lattice, count_x: int, count_y: int):
+    """Returns the x and y coordinates of the count_x by count_y sites, row by row."""
+    j, i = np.divmod(np.arange(count_x*count_y), count_x)
+    return i*lattice.period_x+(j % 2)*lattice.shift*lattice.period_x, j*lattice.period_y
+
+
+def lattice_center(lattice: Lattice, count_x: int, count_y: int) -> tuple:
+    """Returns the center of the bounding box of the sites."""
+    shift = lattice.shift*lattice.period_x if count_y > 1 else 0.0
+    return ((count_x-1)*lattice.period_x+shift)/2, (count_y-1)*lattice.period_y/2
+
+
+def lattice_placements(lattice: Lattice, count_x: int, count_y: int) -> Placements:
+    """Returns the frames of the instances in the xy plane, for BRepTextureBuilder.build_placed."""
+    x, y = lattice_sites(lattice, count_x, count_y)
+    count = len(x)
+    return Placements(np.column_stack((x, y, np.zeros(count))), np.tile([1.0, 0.0, 0.0], (count, 1)),
+                      np.tile([0.0, 1.0, 0.0], (count, 1)), np.tile([0.0, 0.0, 1.0], (count, 1)))
+
+
+def nearest_land_width(texture_type: str, lattice: Lattice, width):
+    """Returns the land between neighbouring grooves of a uniform texture, negative if they overlap.
+
+    Dots are compared with the nearest other site, Lines with the neighbouring line of their row and
+    Hatch additionally with the neighbouring row. The fields of the lattice and the width may be
+    arrays, e.g. to screen candidate textures, they are broadcast against each other.
+    """
+    period_x, period_y, shift = (np.asarray(value, dtype=float) for value in lattice)
+    match texture_type:
+        case 'Dots':
+            # The sites of shifted neighbouring rows lie diagonally, the next site straight above is two rows up.
+            diagonal = np.hypot(shift*period_x, period_y)
+            nearest = np.where(shift == 0, np.minimum(period_x, period_y),
+                               np.minimum(np.minimum(period_x, diagonal), 2*period_y))
+        case 'Lines':
+            nearest = period_x
+        case 'Hatch':
+            nearest = np.minimum(period_x, period_y)
+        case _:
+            raise ValueError(f'Unknown texture type: {texture_type}')
+    return nearest-np.asarray(width, dtype=float)
+
+
+def lattice_texture_depth(texture_type: str, lattice: Lattice, count_x: int, count_y: int, x, y,
+                          depth: float, width: float, flank_angle: float) -> np.ndarray:
+    """Returns the depth of the texture below the top surface at the points (x, y).
+
+    Every point looks at the nearest site of its own row and of both neighbouring rows, which finds
+    the nearest site of every lattice. Like the cells of the features the grooves end at the last sites.
+    """
+    if texture_type not in TEXTURE_TYPES:
+        raise ValueError(f'Unknown texture type: {texture_type}')
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    nearest_row = np.rint(y/lattice.period_y)
+    result = np.zeros(x.shape)
+    for row_offset in (-1, 0, 1):
+        row = np.clip(nearest_row+row_offset, 0, count_y-1)
+        start = (row % 2)*lattice.shift*lattice.period_x
+        column = np.clip(np.rint((x-start)/lattice.period_x), 0, count_x-1)
+        distance_x = np.abs(x-start-column*lattice.period_x)
+        distance_y = np.abs(y-row*lattice.period_y)
+        match texture_type:
+            case 'Dots':
+                groove = profile_depth(np.hypot(distance_x, distance_y), depth, width, flank_angle)
+            case 'Lines':
+                # Lines run through their cell along y, half a row above and below the site.
+                groove = np.where(distance_y <= lattice.period_y/2,
+                                  profile_depth(distance_x, depth, width, flank_angle), 0.0)
+            case 'Hatch':
+                groove = np.where((distance_x <= lattice.period_x/2) & (distance_y <= lattice.period_y/2),
+                                  np.maximum(profile_depth(distance_x, depth, width, flank_angle),
+                                             profile_depth(distance_y, depth, width, flank_angle)), 0.0)
+        np.maximum(result, groove, out=result)
+    return result
+
+
+def lattice_mesh(texture_type: str, lattice: Lattice, count_x: int, count_y: int, depth: float, width: float,
+                 flank_angle: float, spacing: float, thickness: float = None) -> HeightfieldMesh:
+    """Returns the mesh of the cells of all sites, sampled on a grid, e.g. for the mesh preview.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    lattice -- Result of make_lattice.
+    count_x, count_y -- Number of sites along a row and number of rows.
+    depth, width, flank_angle -- Groove profile in cm and radians.
+    spacing -- Largest distance between grid vertices. It should resolve the groove.
+    thickness -- Close the surface into a slab reaching this far below the top surface.
+    """
+    shift = lattice.shift*lattice.period_x if count_y > 1 else 0.0
+    size = (count_x*lattice.period_x+shift, count_y*lattice.period_y)
+    return HeightfieldMesh(lambda x, y: lattice_texture_depth(texture_type, lattice, count_x, count_y, x, y, depth, width, flank_angle),
+                           size, spacing, depth, (-lattice.period_x/2, -lattice.period_y/2), thickness)
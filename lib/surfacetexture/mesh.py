@@ -0,0 +1,639 @@
+"""Indexed triangle meshes of textured patches, built without the Fusion API.
+
+One period of the texture is tessellated once into a cell mesh, from the profile of
+create_sketch polygonized with a chord tolerance:
+
+    Dots  -- A dimple of rings around the site, joined to the square cell boundary.
+    Lines -- A grid with the profile breakpoints along x and the cell edges along y.
+    Hatch -- A grid with the profile breakpoints along x and y. The surface is the deeper of
+             both grooves, whose crease runs along the cell diagonals |x| = |y|, so the grid
+             squares on the diagonals are split along the crease. No mesh boolean is needed.
+
+PatchMesh replicates the cell over count_x by count_y periods. Vertices on cell edges and
+corners are shared between neighbouring cells, so the patch is one connected indexed mesh,
+and the global index of every vertex is an affine function of the cell position. Vertices
+and triangles are produced in blocks by broadcasting, so writing a patch to binary STL or
+3MF never holds more than a block in memory. With a thickness the patch is closed into a
+watertight slab by side walls and a bottom face.
+
+HeightfieldMesh samples any depth function on a regular grid instead, for surfaces that do
+not repeat a single cell, such as graded textures. Both have the same block interface, so
+the writers accept either.
+
+Coordinates are in the unit of the texture parameters (cm in Fusion), z points up and the
+top surface lies at z = 0. Cell (i, j) is centered on the site (i*period, j*period), like
+the heightmap of the same parameters.
+"""
+
+import os
+import struct
+import zipfile
+from typing import NamedTuple
+
+import numpy as np
+
+from .groove_profile import compute_profile, profile_samples
+from .heightmap import TEXTURE_TYPES
+
+MESH_FORMATS = ('.stl', '.3mf')
+
+# Number of vertices or triangles PatchMesh produces per block.
+BLOCK_SIZE = 1 << 20
+
+_STL_FACET = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+
+class CellMesh(NamedTuple):
+    """Mesh of one period of the texture, centered on its site."""
+    vertices: np.ndarray
+    triangles: np.ndarray
+    period: float
+
+
+def cell_mesh(texture_type: str, depth: float, width: float, flank_angle: float, period: float,
+              tolerance: float = 1e-3) -> CellMesh:
+    """Tessellates one period of the texture.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    depth, width, flank_angle, period -- Texture parameters as in the command dialog.
+    tolerance -- Maximum distance between the arcs of the profile and the mesh.
+    """
+    if texture_type not in TEXTURE_TYPES:
+        raise ValueError(f'Unknown texture type: {texture_type}')
+    if not compute_profile(depth, width, flank_angle, period).feasible:
+        raise ValueError('The texture parameters do not describe a valid groove profile.')
+    # Overlapping grooves would need a boolean of the neighbouring instances.
+    if period < width or (texture_type == 'Dots' and period <= width):
+        raise ValueError('Meshes can only be built for textures whose grooves do not overlap.')
+
+    radius, z = profile_samples(depth, width, flank_angle, tolerance)
+    match texture_type:
+        case 'Dots':
+            return _dots_cell(radius, z, period, tolerance)
+        case 'Lines':
+            x, z = _breakpoints(radius, z, period)
+            return _grid_cell(x, np.array([-period/2, period/2]), z[:, None]+np.zeros((1, 2)), period, False)
+        case 'Hatch':
+            x, z = _breakpoints(radius, z, period)
+            return _grid_cell(x, x, np.maximum(z[:, None], z[None, :]), period, True)
+
+
+def _breakpoints(x: np.ndarray, z: np.ndarray, period: float):
+    """Mirrors the half profile to a full period from -period/2 to period/2."""
+    if period/2-x[-1] > 1e-9*period:
+        x = np.append(x, period/2)
+        z = np.append(z, 0.0)
+    return np.concatenate((-x[:0:-1], x)), np.concatenate((z[:0:-1], z))
+
+
+def _grid_cell(x: np.ndarray, y: np.ndarray, depth: np.ndarray, period: float, crease: bool) -> CellMesh:
+    """Tensor grid over x and y with the given depths, indexed [x, y]. With crease the squares on the
+    diagonals are split along them.
+    """
+    columns, rows = len(x), len(y)
+    grid_x, grid_y = np.meshgrid(x, y, indexing='ij')
+    vertices = np.stack((grid_x, grid_y, -depth), axis=-1).reshape(-1, 3)
+
+    index = np.arange(columns*rows).reshape(columns, rows)
+    v00, v10 = index[:-1, :-1].ravel(), index[1:, :-1].ravel()
+    v11, v01 = index[1:, 1:].ravel(), index[:-1, 1:].ravel()
+    a, b = (value.ravel() for value in np.meshgrid(np.arange(columns-1), np.arange(rows-1), indexing='ij'))
+    # x and y share their breakpoints for Hatch, so the crease |x| = |y| runs through grid corners.
+    anti_diagonal = (a+b == columns-2) if crease else np.zeros(len(a), dtype=bool)
+    main = ~anti_diagonal
+    triangles = np.concatenate((
+        np.stack((v00, v10, v11), axis=-1)[main],
+        np.stack((v00, v11, v01), axis=-1)[main],
+        np.stack((v00, v10, v01), axis=-1)[anti_diagonal],
+        np.stack((v10, v11, v01), axis=-1)[anti_diagonal],
+    ))
+    return CellMesh(vertices, triangles, period)
+
+
+def _dots_cell(radius: np.ndarray, z: np.ndarray, period: float, tolerance: float) -> CellMesh:
+    """Rings of the revolved profile around the site, joined to the cell boundary by radial quads."""
+    half_width = radius[-1]
+    sectors = int(np.ceil(np.pi/np.arccos(max(1-tolerance/half_width, -1.0))-1e-9))
+    # A multiple of 8 puts vertices on the cell corners and makes opposite cell edges match.
+    sectors = max(8, -(-sectors//8)*8)
+    angle = 2*np.pi*np.arange(sectors)/sectors
+    direction = np.stack((np.cos(angle), np.sin(angle)), axis=-1)
+    # The dimple is joined to the square cell boundary along the rays through its vertices.
+    boundary = direction*(period/2)/np.abs(direction).max(axis=1, keepdims=True)
+
+    rings = [np.column_stack((direction*r, np.full(sectors, -depth))) for r, depth in zip(radius[1:], z[1:])]
+    rings.append(np.column_stack((boundary, np.zeros(sectors))))
+    vertices = np.concatenate([[[0.0, 0.0, -z[0]]]]+rings)
+
+    q = np.arange(sectors)
+    q_next = (q+1) % sectors
+    triangles = [np.stack((np.zeros(sectors, dtype=int), 1+q, 1+q_next), axis=-1)]
+    for ring in range(len(rings)-1):
+        inner = 1+ring*sectors
+        outer = inner+sectors
+        triangles.append(np.stack((inner+q, outer+q, outer+q_next), axis=-1))
+        triangles.append(np.stack((inner+q, outer+q_next, inner+q_next), axis=-1))
+    return CellMesh(vertices, np.concatenate(triangles), period)
+
+
+class PatchMesh:
+    """A cell mesh repeated count_x by count_y times as one indexed mesh.
+
+    Global vertex order: lattice corners, vertices on cell edges parallel to y, vertices on
+    cell edges parallel to x, cell interiors and, for closed patches, the bottom copies of the
+    boundary followed by the center of the bottom face. Triangles come cell by cell, row by
+    row, followed by the side walls and the bottom face.
+    """
+
+    def __init__(self, cell: CellMesh, count_x: int, count_y: int, thickness: float = None):
+        if count_x < 1 or count_y < 1:
+            raise ValueError('The patch needs at least one cell in each direction.')
+        if thickness is not None and not thickness > -cell.vertices[:, 2].min():
+            raise ValueError('The thickness must be larger than the depth of the texture.')
+        self.cell = cell
+        self.count_x = count_x
+        self.count_y = count_y
+        self.thickness = thickness
+        self._classify()
+        self._boundary = self._boundary_loop() if thickness is not None else None
+
+    @property
+    def vertex_count(self) -> int:
+        count = self._interior_start+self.count_x*self.count_y*len(self._interior)
+        if self._boundary is not None:
+            count += len(self._boundary)+1
+        return count
+
+    @property
+    def triangle_count(self) -> int:
+        count = self.count_x*self.count_y*len(self.cell.triangles)
+        if self._boundary is not None:
+            count += 3*len(self._boundary)
+        return count
+
+    @property
+    def bounds(self) -> tuple:
+        """Returns the corners (minimum, maximum) of the bounding box."""
+        period = self.cell.period
+        z = self.cell.vertices[:, 2]
+        low_z = -self.thickness if self.thickness is not None else z.min()
+        return (np.array([-period/2, -period/2, low_z]),
+                np.array([(self.count_x-0.5)*period, (self.count_y-0.5)*period, z.max()]))
+
+    def vertex_blocks(self):
+        """Yields the vertex coordinates in global order as float arrays of shape (n, 3)."""
+        # Every item of a section is a fixed set of cell vertices translated to a lattice position.
+        for _, items_per_row, rows, local in self._sections():
+            yield from self._section_blocks(self.cell.vertices[local], items_per_row, rows)
+        if self._boundary is not None:
+            yield self._closure_vertices()[1]
+
+    def triangle_blocks(self):
+        """Yields the triangles as global vertex indices, int64 arrays of shape (n, 3)."""
+        triangles = self.cell.triangles
+        offset, step_x, step_y = (values[triangles] for values in (self._offset, self._step_x, self._step_y))
+        for start, stop in _ranges(self.count_x*self.count_y, len(triangles)):
+            cell_y, cell_x = np.divmod(np.arange(start, stop)[:, None, None], self.count_x)
+            yield (offset+cell_x*step_x+cell_y*step_y).reshape(-1, 3)
+        if self._boundary is not None:
+            top = self._boundary
+            bottom = self._interior_start+self.count_x*self.count_y*len(self._interior)+np.arange(len(top)+1)
+            yield self._closure(top, bottom)
+
+    def facet_blocks(self):
+        """Yields (normals, corners) of the triangles in the order of triangle_blocks, corners of shape
+        (n, 3, 3). Cells are translated from the cell mesh directly, which is cheaper than resolving
+        the indices of triangle_blocks.
+        """
+        corners = self.cell.vertices[self.cell.triangles]
+        normals = _normals(corners)
+        period = self.cell.period
+        for start, stop in _ranges(self.count_x*self.count_y, len(corners)):
+            cell_y, cell_x = np.divmod(np.arange(start, stop), self.count_x)
+            shift = np.stack((cell_x*period, cell_y*period, np.zeros(len(cell_x))), axis=-1)
+            yield np.tile(normals, (len(shift), 1)), (corners+shift[:, None, None, :]).reshape(-1, 3, 3)
+        if self._boundary is not None:
+            top, bottom = self._closure_vertices()
+            corners = self._closure(top, bottom)
+            yield _normals(corners), corners
+
+    def arrays(self):
+        """Returns (vertices, triangles) of the whole patch."""
+        return np.concatenate(list(self.vertex_blocks())), np.concatenate(list(self.triangle_blocks()))
+
+    def vertex_coordinates(self, indices) -> np.ndarray:
+        """Returns the coordinates of the top surface vertices with the given global indices."""
+        indices = np.asarray(indices)
+        period = self.cell.period
+        vertices = self.cell.vertices
+        result = np.full(indices.shape+(3,), np.nan)
+        for start, items_per_row, rows, local in self._sections():
+            inside = (indices >= start) & (indices < start+items_per_row*rows*len(local))
+            item, k = np.divmod(indices[inside]-start, len(local))
+            row, column = np.divmod(item, items_per_row)
+            result[inside] = vertices[local[k]]+np.stack((column*period, row*period, np.zeros(len(k))), axis=-1)
+        return result
+
+    def _sections(self):
+        """(first global index, items per lattice row, rows, local vertices per item) of the top surface sections."""
+        count_x, count_y = self.count_x, self.count_y
+        return (
+            (0, count_x+1, count_y+1, np.array(self._corners[:1])),
+            (self._vertical_start, count_x+1, count_y, self._left),
+            (self._horizontal_start, count_x, count_y+1, self._bottom),
+            (self._interior_start, count_x, count_y, self._interior),
+        )
+
+    def _section_blocks(self, local_vertices: np.ndarray, items_per_row: int, rows: int):
+        if len(local_vertices) == 0:
+            return
+        period = self.cell.period
+        for start, stop in _ranges(items_per_row*rows, len(local_vertices)):
+            row, column = np.divmod(np.arange(start, stop), items_per_row)
+            shift = np.stack((column*period, row*period, np.zeros(len(row))), axis=-1)
+            yield (shift[:, None, :]+local_vertices[None, :, :]).reshape(-1, 3)
+
+    def _classify(self):
+        """Sorts the cell vertices into corners, edges and interior and derives their global indices."""
+        vertices = self.cell.vertices
+        half = self.cell.period/2
+        tolerance = 1e-9*self.cell.period
+        left = np.abs(vertices[:, 0]+half) < tolerance
+        right = np.abs(vertices[:, 0]-half) < tolerance
+        bottom = np.abs(vertices[:, 1]+half) < tolerance
+        top = np.abs(vertices[:, 1]-half) < tolerance
+        corner = (left | right) & (bottom | top)
+
+        def edge(mask, axis):
+            indices = np.flatnonzero(mask & ~corner)
+            return indices[np.argsort(vertices[indices, axis])]
+
+        # Opposite edges must carry the same vertices, so that neighbouring cells can share them.
+        self._left, self._right = edge(left, 1), edge(right, 1)
+        self._bottom, self._top = edge(bottom, 0), edge(top, 0)
+        if (len(self._left) != len(self._right) or len(self._bottom) != len(self._top)
+                or not np.allclose(vertices[self._left, 1:], vertices[self._right, 1:], rtol=0, atol=tolerance)
+                or not np.allclose(vertices[self._bottom, ::2], vertices[self._top, ::2], rtol=0, atol=tolerance)):
+            raise ValueError('Opposite edges of the cell mesh do not match.')
+        self._interior = np.flatnonzero(~(left | right | bottom | top))
+        corners = [np.flatnonzero(mask) for mask in (left & bottom, right & bottom, left & top, right & top)]
+        if any(len(indices) != 1 for indices in corners):
+            raise ValueError('The cell mesh needs exactly one vertex in every corner.')
+        self._corners = [int(indices[0]) for indices in corners]
+
+        count_x, count_y = self.count_x, self.count_y
+        vertical, horizontal, interior = len(self._left), len(self._bottom), len(self._interior)
+        self._vertical_start = (count_x+1)*(count_y+1)
+        self._horizontal_start = self._vertical_start+(count_x+1)*count_y*vertical
+        self._interior_start = self._horizontal_start+count_x*(count_y+1)*horizontal
+
+        # Local vertex v of cell (i, j) has the global index offset[v]+i*step_x[v]+j*step_y[v].
+        offset = np.empty(len(vertices), dtype=np.int64)
+        step_x = np.empty(len(vertices), dtype=np.int64)
+        step_y = np.empty(len(vertices), dtype=np.int64)
+        for index, (di, dj) in zip(self._corners, ((0, 0), (1, 0), (0, 1), (1, 1))):
+            offset[index], step_x[index], step_y[index] = dj*(count_x+1)+di, 1, count_x+1
+        for indices, di in ((self._left, 0), (self._right, 1)):
+            offset[indices] = self._vertical_start+di*vertical+np.arange(vertical)
+            step_x[indices], step_y[indices] = vertical, (count_x+1)*vertical
+        for indices, dj in ((self._bottom, 0), (self._top, 1)):
+            offset[indices] = self._horizontal_start+dj*count_x*horizontal+np.arange(horizontal)
+            step_x[indices], step_y[indices] = horizontal, count_x*horizontal
+        offset[self._interior] = self._interior_start+np.arange(interior)
+        step_x[self._interior], step_y[self._interior] = interior, count_x*interior
+        self._offset, self._step_x, self._step_y = offset, step_x, step_y
+
+    def _boundary_loop(self) -> np.ndarray:
+        """Global indices of the top surface vertices on the patch boundary, counterclockwise seen from above."""
+        count_x, count_y = self.count_x, self.count_y
+        vertical, horizontal = len(self._left), len(self._bottom)
+        i = np.arange(count_x)[:, None]
+        j = np.arange(count_y)[:, None]
+        horizontal_edge = np.arange(horizontal)
+        vertical_edge = np.arange(vertical)
+        # Every side is a list of (corner, vertices of the following edge) rows.
+        sides = (
+            np.hstack((i, self._horizontal_start+i*horizontal+horizontal_edge)),
+            np.hstack((j*(count_x+1)+count_x, self._vertical_start+(j*(count_x+1)+count_x)*vertical+vertical_edge)),
+            np.hstack((count_y*(count_x+1)+i+1,
+                       self._horizontal_start+(count_y*count_x+i)*horizontal+horizontal_edge[::-1]))[::-1],
+            np.hstack(((j+1)*(count_x+1), self._vertical_start+j*(count_x+1)*vertical+vertical_edge[::-1]))[::-1],
+        )
+        return np.concatenate([side.ravel() for side in sides]).astype(np.int64)
+
+    def _closure_vertices(self):
+        """Returns the top boundary vertices and their bottom copies followed by the bottom center."""
+        top = self.vertex_coordinates(self._boundary)
+        low, high = self.bounds
+        bottom = np.column_stack((top[:, :2], np.full(len(top), low[2])))
+        center = [[(low[0]+high[0])/2, (low[1]+high[1])/2, low[2]]]
+        return top, np.concatenate((bottom, center))
+
+    @staticmethod
+    def _closure(top, bottom):
+        """Side walls and bottom face between the boundary loop top and bottom, which ends with the center.
+        Works on vertex indices as well as on coordinates.
+        """
+        bottom, center = bottom[:-1], bottom[-1:]
+        top_next, bottom_next = np.roll(top, -1, axis=0), np.roll(bottom, -1, axis=0)
+        center = np.repeat(center, len(top), axis=0)
+        return np.concatenate((
+            np.stack((top, bottom, bottom_next), axis=1),
+            np.stack((top, bottom_next, top_next), axis=1),
+            np.stack((center, bottom_next, bottom), axis=1),
+        ))
+
+
+def patch_mesh(texture_type: str, depth: float, width: float, flank_angle: float, period: float,
+               count_x: int, count_y: int, tolerance: float = 1e-3, thickness: float = None) -> PatchMesh:
+    """Returns the mesh of count_x by count_y periods of the texture.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    depth, width, flank_angle, period -- Texture parameters as in the command dialog.
+    count_x, count_y -- Number of periods in x and y.
+    tolerance -- Maximum distance between the arcs of the profile and the mesh.
+    thickness -- Close the patch into a slab reaching this far below the top surface. Slicers need
+                 closed meshes, an open patch is only the textured surface.
+    """
+    return PatchMesh(cell_mesh(texture_type, depth, width, flank_angle, period, tolerance), count_x, count_y, thickness)
+
+
+class HeightfieldMesh:
+    """A regular grid over a rectangle whose vertices sit at the depth of a function of (x, y).
+
+    Unlike PatchMesh this needs no repeated cell, so it also meshes textures whose instances
+    differ, e.g. graded ones, at the price of sampling the profile instead of following its
+    breakpoints. Vertices are ordered row by row along +x, rows along +y, followed by the
+    bottom copies of the boundary and the bottom center for closed meshes. Every grid square
+    is split into two triangles along its diagonal from (x, y) to (x+spacing, y+spacing).
+
+    Arguments:
+    depth -- Function returning the depth below the top surface at the points (x, y), called
+             with broadcastable arrays of x and y.
+    size -- (size_x, size_y) of the rectangle.
+    spacing -- Largest distance between neighbouring grid vertices.
+    max_depth -- Upper bound of the depth, used for the bounds and to check the thickness.
+    origin -- Lower left corner of the rectangle.
+    thickness -- Close the surface into a slab reaching this far below the top surface.
+    """
+
+    def __init__(self, depth, size, spacing: float, max_depth: float, origin=(0.0, 0.0), thickness: float = None):
+        if thickness is not None and not thickness > max_depth:
+            raise ValueError('The thickness must be larger than the depth of the texture.')
+        self.depth = depth
+        self.max_depth = max_depth
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.thickness = thickness
+        self.columns = max(1, int(np.ceil(size[0]/spacing-1e-9)))+1
+        self.rows = max(1, int(np.ceil(size[1]/spacing-1e-9)))+1
+        self.x = self.origin[0]+np.linspace(0, size[0], self.columns)
+        self.y = self.origin[1]+np.linspace(0, size[1], self.rows)
+        self._boundary = self._boundary_loop() if thickness is not None else None
+
+    @property
+    def vertex_count(self) -> int:
+        count = self.columns*self.rows
+        if self._boundary is not None:
+            count += len(self._boundary)+1
+        return count
+
+    @property
+    def triangle_count(self) -> int:
+        count = 2*(self.columns-1)*(self.rows-1)
+        if self._boundary is not None:
+            count += 3*len(self._boundary)
+        return count
+
+    @property
+    def bounds(self) -> tuple:
+        """Returns the corners (minimum, maximum) of the bounding box."""
+        low_z = -self.thickness if self.thickness is not None else -self.max_depth
+        return np.array([self.x[0], self.y[0], low_z]), np.array([self.x[-1], self.y[-1], 0.0])
+
+    def vertex_blocks(self):
+        """Yields the vertex coordinates in global order as float arrays of shape (n, 3)."""
+        for start, stop in _ranges(self.rows, self.columns):
+            yield self._grid_vertices(start, stop).reshape(-1, 3)
+        if self._boundary is not None:
+            yield self._closure_vertices()[1]
+
+    def triangle_blocks(self):
+        """Yields the triangles as global vertex indices, int64 arrays of shape (n, 3)."""
+        columns = self.columns
+        for start, stop in _ranges(self.rows-1, 2*(columns-1)):
+            v00 = (np.arange(start, stop)[:, None]*columns+np.arange(columns-1)[None, :]).ravel()
+            v10, v01, v11 = v00+1, v00+columns, v00+columns+1
+            yield np.stack((np.stack((v00, v10, v11), axis=-1), np.stack((v00, v11, v01), axis=-1)),
+                           axis=1).reshape(-1, 3)
+        if self._boundary is not None:
+            top = self._boundary
+            bottom = columns*self.rows+np.arange(len(top)+1)
+            yield PatchMesh._closure(top, bottom)
+
+    def facet_blocks(self):
+        """Yields (normals, corners) of the triangles in the order of triangle_blocks."""
+        for start, stop in _ranges(self.rows-1, 2*(self.columns-1)):
+            grid = self._grid_vertices(start, stop+1)
+            v00, v10 = grid[:-1, :-1], grid[:-1, 1:]
+            v01, v11 = grid[1:, :-1], grid[1:, 1:]
+            corners = np.stack((np.stack((v00, v10, v11), axis=-2), np.stack((v00, v11, v01), axis=-2)),
+                               axis=2).reshape(-1, 3, 3)
+            yield _normals(corners), corners
+        if self._boundary is not None:
+            top, bottom = self._closure_vertices()
+            corners = PatchMesh._closure(top, bottom)
+            yield _normals(corners), corners
+
+    def arrays(self):
+        """Returns (vertices, triangles) of the whole mesh."""
+        return np.concatenate(list(self.vertex_blocks())), np.concatenate(list(self.triangle_blocks()))
+
+    def _grid_vertices(self, start: int, stop: int) -> np.ndarray:
+        """Vertices of the grid rows start to stop, shape (stop-start, columns, 3)."""
+        x, y = np.meshgrid(self.x, self.y[start:stop])
+        return np.stack((x, y, -np.broadcast_to(self.depth(x, y), x.shape)), axis=-1)
+
+    def _boundary_loop(self) -> np.ndarray:
+        """Global indices of the grid vertices on the boundary, counterclockwise seen from above."""
+        columns, rows = self.columns, self.rows
+        return np.concatenate((
+            np.arange(columns-1),
+            np.arange(rows-1)*columns+columns-1,
+            (rows-1)*columns+np.arange(columns-1, 0, -1),
+            np.arange(rows-1, 0, -1)*columns,
+        )).astype(np.int64)
+
+    def _closure_vertices(self):
+        """Returns the top boundary vertices and their bottom copies followed by the bottom center."""
+        row, column = np.divmod(self._boundary, self.columns)
+        x, y = self.x[column], self.y[row]
+        top = np.column_stack((x, y, -np.broadcast_to(self.depth(x, y), x.shape)))
+        bottom = np.column_stack((x, y, np.full(len(x), -self.thickness)))
+        center = [[(self.x[0]+self.x[-1])/2, (self.y[0]+self.y[-1])/2, -self.thickness]]
+        return top, np.concatenate((bottom, center))
+
+
+def capped_counts(count_x: int, count_y: int, max_instances: int) -> tuple:
+    """Returns the counts of the largest patch with the aspect ratio of count_x by count_y that has at
+    most max_instances cells, e.g. for a preview whose cost must not grow with the texture area.
+    """
+    if count_x*count_y <= max_instances:
+        return count_x, count_y
+    scale = np.sqrt(max_instances/(count_x*count_y))
+    capped_x = int(min(count_x, max(1, np.floor(count_x*scale))))
+    capped_y = int(min(count_y, max(1, max_instances//capped_x)))
+    # A direction with few cells leaves room for more cells in the other one.
+    capped_x = int(min(count_x, max(1, max_instances//capped_y)))
+    return capped_x, capped_y
+
+
+def vertex_normals(vertices: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """Returns unit normals of the vertices, the area weighted mean of the normals of their triangles."""
+    corners = vertices[triangles]
+    # The cross product is twice the area times the unit normal, so the sum is area weighted.
+    face_normals = np.cross(corners[:, 1]-corners[:, 0], corners[:, 2]-corners[:, 0])
+    normals = np.zeros_like(vertices, dtype=float)
+    for k in range(3):
+        np.add.at(normals, triangles[:, k], face_normals)
+    length = np.linalg.norm(normals, axis=-1, keepdims=True)
+    return np.divide(normals, length, out=np.zeros_like(normals), where=length > 0)
+
+
+def write_stl(path: str, patch: PatchMesh, scale: float = 10.0):
+    """Writes the patch as binary STL.
+
+    Arguments:
+    path -- File to write.
+    patch -- The mesh.
+    scale -- Factor applied to all coordinates. The default converts cm to the mm slicers expect.
+    """
+    count = patch.triangle_count
+    if count >= 1 << 32:
+        raise ValueError(f'Binary STL files cannot hold {count} triangles.')
+    with open(path, 'wb') as file:
+        file.write(b'Surface Texture Creator patch'.ljust(80, b' '))
+        file.write(struct.pack('<I', count))
+        for normals, corners in patch.facet_blocks():
+            facets = np.zeros(len(normals), dtype=_STL_FACET)
+            facets['normal'] = normals
+            facets['vertices'] = corners*scale
+            file.write(facets.tobytes())
+
+
+def write_3mf(path: str, patch: PatchMesh, scale: float = 10.0, decimals: int = 4):
+    """Writes the patch as 3MF in millimeters.
+
+    The model XML is streamed into the archive. Numbers are written with a fixed number of digits,
+    which lets whole blocks of vertices and triangles be formatted by NumPy instead of one by one.
+
+    Arguments:
+    path -- File to write.
+    patch -- The mesh.
+    scale -- Factor from the unit of the patch to mm. The default converts cm.
+    decimals -- Digits after the decimal point of the coordinates, at least 1.
+    """
+    low, high = patch.bounds
+    integer_digits = len(str(int(np.abs(np.concatenate((low, high))).max()*scale)))
+    index_digits = len(str(max(patch.vertex_count-1, 0)))
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        archive.writestr('[Content_Types].xml', _3MF_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _3MF_RELATIONSHIPS)
+        with archive.open('3D/3dmodel.model', 'w', force_zip64=True) as model:
+            model.write(_3MF_MODEL_START)
+            for vertices in patch.vertex_blocks():
+                model.write(_xml_elements(b'vertex', (b'x', b'y', b'z'),
+                                          _decimal_text(vertices*scale, integer_digits, decimals)))
+            model.write(b'</vertices>\n<triangles>\n')
+            for triangles in patch.triangle_blocks():
+                model.write(_xml_elements(b'triangle', (b'v1', b'v2', b'v3'), _integer_text(triangles, index_digits)))
+            model.write(_3MF_MODEL_END)
+
+
+def write_mesh(path: str, patch: PatchMesh, scale: float = 10.0):
+    """Writes the patch as binary STL (.stl) or 3MF (.3mf)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in MESH_FORMATS:
+        raise ValueError(f'Unsupported mesh file type: {path}')
+    if extension == '.stl':
+        write_stl(path, patch, scale)
+    else:
+        write_3mf(path, patch, scale)
+
+
+_3MF_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    '</Types>\n'
+)
+_3MF_RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+    '</Relationships>\n'
+)
+_3MF_MODEL_START = (
+    b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    b'<model unit="millimeter" xml:lang="en-US" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">\n'
+    b'<resources>\n<object id="1" type="model">\n<mesh>\n<vertices>\n'
+)
+_3MF_MODEL_END = b'</triangles>\n</mesh>\n</object>\n</resources>\n<build>\n<item objectid="1"/>\n</build>\n</model>\n'
+
+
+def _xml_elements(tag: bytes, names: tuple, fields: np.ndarray) -> bytes:
+    """Formats one empty element per row of fields, an uint8 array of shape (n, attributes, characters)."""
+    pieces = [b'<'+tag+b' '+names[0]+b'="']
+    pieces += [b'" '+name+b'="' for name in names[1:]]
+    pieces.append(b'"/>\n')
+    rows, attributes, characters = fields.shape
+    line = np.empty((rows, sum(map(len, pieces))+attributes*characters), dtype=np.uint8)
+    position = 0
+    for attribute, piece in enumerate(pieces):
+        line[:, position:position+len(piece)] = np.frombuffer(piece, dtype=np.uint8)
+        position += len(piece)
+        if attribute < attributes:
+            line[:, position:position+characters] = fields[:, attribute]
+            position += characters
+    return line.tobytes()
+
+
+def _decimal_text(values: np.ndarray, integer_digits: int, decimals: int) -> np.ndarray:
+    """Formats values as a sign character ('-' or '0'), zero padded integer digits, a point and the decimals."""
+    scaled = np.rint(np.abs(values)*10**decimals).astype(np.int64)
+    text = np.empty(values.shape+(integer_digits+decimals+2,), dtype=np.uint8)
+    text[..., 0] = np.where((values < 0) & (scaled > 0), ord('-'), ord('0'))
+    point = integer_digits+1
+    text[..., point] = ord('.')
+    for position in [*range(text.shape[-1]-1, point, -1), *range(point-1, 0, -1)]:
+        text[..., position] = ord('0')+scaled % 10
+        scaled //= 10
+    if scaled.any():
+        raise ValueError('A value has more integer digits than reserved.')
+    return text
+
+
+def _integer_text(values: np.ndarray, digits: int) -> np.ndarray:
+    values = values.astype(np.int64, copy=True)
+    text = np.empty(values.shape+(digits,), dtype=np.uint8)
+    for position in range(digits-1, -1, -1):
+        text[..., position] = ord('0')+values % 10
+        values //= 10
+    return text
+
+
+def _ranges(items: int, size_per_item: int):
+    """Splits range(items) into consecutive ranges of about BLOCK_SIZE vertices or triangles."""
+    step = max(1, BLOCK_SIZE//max(size_per_item, 1))
+    for start in range(0, items, step):
+        yield start, min(start+step, items)
+
+
+def _normals(corners: np.ndarray) -> np.ndarray:
+    normals = np.cross(corners[:, 1]-corners[:, 0], corners[:, 2]-corners[:, 0])
+    length = np.linalg.norm(normals, axis=-1, keepdims=True)
+    return np.divide(normals, length, out=np.zeros_like(normals), where=length > 0)
@@ -0,0 +1,291 @@
+"""Surface metrology of a texture from its groove profile and lattice, without building geometry.
+
+The groove profile of groove_profile.py is made of a circular arc and straight flanks, so the
+volume it removes has a closed form: Lines remove the area of the profile per length,
+Dots the volume of its revolution and Hatch both lines of a cell less the square where they
+cross. Over that square the deeper of the two grooves counts, and integrating min(z(x), z(y))
+over it gives 8 times the integral of x*z(x), i.e. 4/pi times the volume of a dot.
+
+The other metrics only depend on the distribution of the depth over the surface. The fraction
+of the cell deeper than t is, with r(t) = profile_half_width(t) and the periods px and py,
+
+    Dots  -- pi*r^2/(px*py)
+    Lines -- 2*r/px
+    Hatch -- 1-(1-2*r/px)*(1-2*r/py)
+
+as long as neighbouring grooves do not overlap. Its complement is the material ratio of the
+bearing area (Abbott-Firestone) curve, its inverse the bearing curve. Moments of the depth are
+integrals of that fraction over t, evaluated by Gauss-Legendre quadrature on the flank and on
+the arc, where the substitution t = depth-s*u^2 removes the square root of the arc. The
+quadrature is exact for the flank and accurate to rounding for the arc. The core height Sk and
+its companions are read from the bearing curve in closed form once the secant of ISO 13565-2
+is found, which takes a few dozen evaluations of the curve per texture.
+
+Heights follow ISO 25178: they are measured upwards from the mean plane, so the top surface
+lies at Sp above it and the bottom of the grooves at Sv below it. All functions accept scalars
+or NumPy arrays and broadcast them against each other, so thousands of candidate textures are
+ranked in milliseconds. Lengths may be given in any unit, angles are in radians.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from .groove_profile import calculate_radius, depth_limits, profile_depth, profile_half_width, tangent_points
+from .heightmap import TEXTURE_TYPES
+from .lattice import Lattice, nearest_land_width
+
+# Nodes of the Gauss-Legendre quadrature of every part of the profile.
+QUADRATURE_NODES = 24
+# Material ratios the secant of the Sk family is searched at, first evenly over its range and then
+# SECANT_REFINEMENTS times around the best one with a five times smaller step.
+SECANT_SAMPLES = 21
+SECANT_REFINEMENTS = 3
+
+
+class TextureMetrics(NamedTuple):
+    """Result of texture_metrics. Every field is an array of the broadcast input shape, NaN where
+    the profile does not exist or neighbouring grooves overlap.
+
+    cell_area -- Area of one cell of the lattice.
+    volume_per_cell -- Volume removed by the grooves of one cell.
+    volume_per_area -- Volume removed per area, the mean depth below the top surface.
+    land_ratio -- Fraction of the top surface left untouched, the contact area ratio.
+    sa, sq -- Arithmetic and root mean square height Sa and Sq.
+    ssk, sku -- Skewness Ssk and kurtosis Sku of the heights.
+    sp, sv, sz -- Peak height Sp, valley depth Sv and maximum height Sz.
+    sk, spk, svk -- Core height Sk, reduced peak height Spk and reduced valley depth Svk.
+    smr1, smr2 -- Material ratios Smr1 and Smr2 at the upper and lower end of the core.
+    """
+    cell_area: np.ndarray
+    volume_per_cell: np.ndarray
+    volume_per_area: np.ndarray
+    land_ratio: np.ndarray
+    sa: np.ndarray
+    sq: np.ndarray
+    ssk: np.ndarray
+    sku: np.ndarray
+    sp: np.ndarray
+    sv: np.ndarray
+    sz: np.ndarray
+    sk: np.ndarray
+    spk: np.ndarray
+    svk: np.ndarray
+    smr1: np.ndarray
+    smr2: np.ndarray
+
+
+def groove_volume(depth, width, flank_angle) -> np.ndarray:
+    """Returns the volume of one dot, the profile revolved around its middle line."""
+    depth, width, flank_angle, radius, tangent_x, tangent_z = _profile(depth, width, flank_angle)
+    flank_length = width/2-tangent_x
+    arc = (depth-radius)*tangent_x**2/2+radius**3*(1-np.sin(flank_angle)**3)/3
+    flank = tangent_z*(width*flank_length/4-flank_length**2/3)
+    return 2*np.pi*(arc+flank)
+
+
+def groove_area(depth, width, flank_angle) -> np.ndarray:
+    """Returns the cross section area of the profile, the volume of a line per length."""
+    depth, width, flank_angle, radius, tangent_x, tangent_z = _profile(depth, width, flank_angle)
+    sin, cos = np.sin(flank_angle), np.cos(flank_angle)
+    arc = (depth-radius)*tangent_x+radius**2*(sin*cos+np.pi/2-flank_angle)/2
+    flank = tangent_z*(width/2-tangent_x)/2
+    return 2*(arc+flank)
+
+
+def cell_volume(texture_type: str, depth, width, flank_angle, lattice: Lattice) -> np.ndarray:
+    """Returns the volume the grooves of one cell remove, valid while neighbouring grooves do not overlap.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    depth, width, flank_angle -- Profile parameters.
+    lattice -- Lattice of the cells, its fields may be arrays.
+    """
+    period_x, period_y, _ = (np.asarray(value, dtype=float) for value in lattice)
+    match texture_type:
+        case 'Dots':
+            return groove_volume(depth, width, flank_angle)
+        case 'Lines':
+            return groove_area(depth, width, flank_angle)*period_y
+        case 'Hatch':
+            # The crossing square is counted by both lines, the deeper groove of the two is removed once.
+            area = groove_area(depth, width, flank_angle)
+            return area*(period_x+period_y)-4/np.pi*groove_volume(depth, width, flank_angle)
+    raise ValueError(f'Unknown texture type: {texture_type}')
+
+
+def material_ratio(texture_type: str, t, depth, width, flank_angle, lattice: Lattice) -> np.ndarray:
+    """Returns the fraction of the surface that is material at the depth t below the top surface,
+    the bearing area (Abbott-Firestone) curve. It is the land ratio at t = 0 and 1 at the full depth.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    t -- Depth below the top surface.
+    depth, width, flank_angle -- Profile parameters.
+    lattice -- Lattice of the cells, its fields may be arrays.
+    """
+    return 1-_groove_fraction(texture_type, profile_half_width(t, depth, width, flank_angle), lattice)
+
+
+def bearing_curve(texture_type: str, ratio, depth, width, flank_angle, lattice: Lattice) -> np.ndarray:
+    """Returns the depth below the top surface at which the given fraction of the surface is material,
+    the inverse of material_ratio. Zero for ratios up to the land ratio, the full depth at 1.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    ratio -- Material ratio between 0 and 1.
+    depth, width, flank_angle -- Profile parameters.
+    lattice -- Lattice of the cells, its fields may be arrays.
+    """
+    period_x, period_y, _ = (np.asarray(value, dtype=float) for value in lattice)
+    grooves = 1-np.clip(np.asarray(ratio, dtype=float), 0, 1)
+    match texture_type:
+        case 'Dots':
+            half_width = np.sqrt(grooves*period_x*period_y/np.pi)
+        case 'Lines':
+            half_width = grooves*period_x/2
+        case 'Hatch':
+            # Smaller root of (1-2*r/px)*(1-2*r/py) = 1-grooves.
+            total = period_x+period_y
+            half_width = (total-np.sqrt(np.maximum(total**2-4*grooves*period_x*period_y, 0)))/4
+        case _:
+            raise ValueError(f'Unknown texture type: {texture_type}')
+    # Half widths beyond the groove belong to the land, whose depth is zero.
+    return profile_depth(half_width, depth, width, flank_angle)
+
+
+def texture_metrics(texture_type: str, depth, width, flank_angle, lattice: Lattice) -> TextureMetrics:
+    """Computes the removed volume, the land ratio and the height parameters of a uniform texture.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    depth, width, flank_angle -- Profile parameters.
+    lattice -- Lattice of the cells, e.g. from lattice.make_lattice. Its fields may be arrays to
+               compare textures with different periods, Lattice(periods, periods, 0) is Square.
+    """
+    if texture_type not in TEXTURE_TYPES:
+        raise ValueError(f'Unknown texture type: {texture_type}')
+    depth, width, flank_angle, period_x, period_y, shift = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (depth, width, flank_angle, *lattice)))
+    depth_min, depth_max = depth_limits(width, flank_angle)
+    with np.errstate(invalid='ignore'):
+        valid = ((depth > depth_min) & (depth < depth_max) & (flank_angle >= 0) & (period_x > 0) & (period_y > 0)
+                 & (nearest_land_width(texture_type, Lattice(period_x, period_y, shift), width) >= 0))
+    # Invalid textures are evaluated with a harmless profile and masked at the end.
+    depth, width, flank_angle, period_x, period_y = (np.where(valid, value, fallback) for value, fallback in
+                                                     ((depth, 1.0), (width, 1.0), (flank_angle, 0.0), (period_x, 2.0), (period_y, 2.0)))
+    profile = (depth, width, flank_angle)
+    lattice = Lattice(period_x, period_y, shift)
+
+    cell_area = period_x*period_y
+    volume = cell_volume(texture_type, *profile, lattice)
+    mean = volume/cell_area
+    land_ratio = material_ratio(texture_type, 0.0, *profile, lattice)
+
+    # E[g(D)] = g(0)+integral of g'(t)*P(D > t) dt for the depth D >= 0 below the top surface.
+    t, weights = _bearing_quadrature(texture_type, 0.0, *profile, lattice)
+    deviation = t-mean[..., None]
+    moments = [(-mean)**k+k*np.sum(deviation**(k-1)*weights, axis=-1) for k in (2, 3, 4)]
+    sq = np.sqrt(moments[0])
+    # Heights point upwards, so their skewness is the negative one of the depth.
+    ssk = -moments[1]/sq**3
+    sku = moments[2]/sq**4
+    # Deviations above and below the mean cancel, so Sa is twice the integral of the part below it.
+    sa = 2*_bearing_integral(texture_type, mean, *profile, lattice)
+    sk, spk, svk, smr1, smr2 = _core_parameters(texture_type, *profile, lattice, mean)
+
+    fields = (cell_area, volume, mean, land_ratio, sa, sq, ssk, sku, mean, depth-mean, depth, sk, spk, svk, smr1, smr2)
+    return TextureMetrics(*(np.where(valid, field, np.nan) for field in fields))
+
+
+def _profile(depth, width, flank_angle):
+    depth, width, flank_angle = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (depth, width, flank_angle)))
+    radius = calculate_radius(depth, width, flank_angle)
+    tangent_x, tangent_z = tangent_points(depth, width, flank_angle)
+    return depth, width, flank_angle, radius, tangent_x, tangent_z
+
+
+def _groove_fraction(texture_type: str, half_width, lattice: Lattice) -> np.ndarray:
+    """Returns the fraction of a cell covered by grooves wider than twice the half width."""
+    period_x, period_y, _ = (np.asarray(value, dtype=float) for value in lattice)
+    match texture_type:
+        case 'Dots':
+            return np.pi*half_width**2/(period_x*period_y)
+        case 'Lines':
+            return 2*half_width/period_x
+        case 'Hatch':
+            return 1-(1-2*half_width/period_x)*(1-2*half_width/period_y)
+    raise ValueError(f'Unknown texture type: {texture_type}')
+
+
+def _bearing_quadrature(texture_type: str, lower, depth, width, flank_angle, lattice: Lattice):
+    """Returns nodes t and weights along a new last axis, so that the sum of f(t)*weights is the integral
+    of f(t) times the fraction of the surface deeper than t from lower to the full depth.
+    """
+    nodes, weights = np.polynomial.legendre.leggauss(QUADRATURE_NODES)
+    nodes, weights = (nodes+1)/2, weights/2
+    depth, width, flank_angle, radius, tangent_x, tangent_z = _profile(depth, width, flank_angle)
+    tangent_z = np.clip(tangent_z, 0, depth)
+    lower = np.asarray(lower, dtype=float)
+    # The flank, where the half width is linear in t.
+    start = np.clip(lower, 0, tangent_z)
+    flank_length = (tangent_z-start)[..., None]
+    flank_t = start[..., None]+flank_length*nodes
+    # The arc with t = depth-span*u^2, dt = 2*span*u*du.
+    span = (depth-np.clip(lower, tangent_z, depth))[..., None]
+    arc_t = depth[..., None]-span*nodes**2
+    t = np.concatenate(np.broadcast_arrays(flank_t, arc_t), axis=-1)
+    jacobian = np.concatenate(np.broadcast_arrays(flank_length*weights, 2*span*nodes*weights), axis=-1)
+    # profile_half_width with the coefficients of the profile computed once per texture instead of once per node.
+    depth, half_width, radius, tangent_x, tangent_z = (value[..., None] for value in (depth, width/2, radius, tangent_x, tangent_z))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        flank = half_width-t*(half_width-tangent_x)/tangent_z
+    arc = np.sqrt(np.maximum(radius*radius-(t-depth+radius)**2, 0))
+    fraction = _groove_fraction(texture_type, np.where(t < tangent_z, flank, arc),
+                                Lattice(*(np.asarray(value, dtype=float)[..., None] for value in lattice)))
+    return t, fraction*jacobian
+
+
+def _bearing_integral(texture_type: str, lower, depth, width, flank_angle, lattice: Lattice) -> np.ndarray:
+    """Returns the integral of the fraction of the surface deeper than t from lower to the full depth."""
+    _, weights = _bearing_quadrature(texture_type, lower, depth, width, flank_angle, lattice)
+    return np.sum(weights, axis=-1)
+
+
+def _core_parameters(texture_type: str, depth, width, flank_angle, lattice: Lattice, mean):
+    """Returns Sk, Spk, Svk, Smr1 and Smr2 as in ISO 13565-2: the secant of the bearing curve over 40 % of
+    the material ratio with the smallest height difference is extended to 0 and 100 %. The areas of the
+    peaks above and the valleys below it are integrals of the bearing curve in closed form.
+    """
+    window = 0.4
+    expanded = (depth[..., None], width[..., None], flank_angle[..., None],
+                Lattice(*(np.asarray(value, dtype=float)[..., None] for value in lattice)))
+
+    def drop(ratio):
+        return (bearing_curve(texture_type, ratio+window, *expanded)-bearing_curve(texture_type, ratio, *expanded))
+
+    ratio = np.broadcast_to(np.linspace(0, 1-window, SECANT_SAMPLES), depth.shape+(SECANT_SAMPLES,))
+    step = (1-window)/(SECANT_SAMPLES-1)
+    for refinement in range(SECANT_REFINEMENTS+1):
+        if refinement:
+            ratio = np.clip(start[..., None]+np.linspace(-step, step, 11), 0, 1-window)
+            step /= 5
+        drops = drop(ratio)
+        best = np.argmin(drops, axis=-1)[..., None]
+        start = np.take_along_axis(ratio, best, axis=-1)[..., 0]
+        sk = np.take_along_axis(drops, best, axis=-1)[..., 0]/window
+
+    # Depths below the top surface at which the secant reaches 0 and 100 % material ratio.
+    upper = bearing_curve(texture_type, start, depth, width, flank_angle, lattice)-sk*start
+    lower = upper+sk
+    smr1 = np.where(upper > 0, material_ratio(texture_type, upper, depth, width, flank_angle, lattice), 0.0)
+    smr2 = material_ratio(texture_type, lower, depth, width, flank_angle, lattice)
+    # The peaks are E[(upper-D)+] and the valleys E[(D-lower)+] for the depth D.
+    clipped_upper, clipped_lower = np.clip(upper, 0, depth), np.clip(lower, 0, depth)
+    peaks = clipped_upper-mean+_bearing_integral(texture_type, clipped_upper, depth, width, flank_angle, lattice)
+    valleys = _bearing_integral(texture_type, clipped_lower, depth, width, flank_angle, lattice)+np.maximum(-lower, 0)
+    # The reduced heights are those of triangles with the areas of the peaks and valleys.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spk = np.where(smr1 > 0, 2*peaks/smr1, 0.0)
+        svk = np.where(smr2 < 1, 2*valleys/(1-smr2), 0.0)
+    return sk, spk, svk, smr1, smr2
@@ -0,0 +1,161 @@
+"""Overlap and land width check of texture instances with a grid spatial hash.
+
+Every instance is a circular footprint around its site, e.g. a dimple of radius width/2.
+Two instances violate the check if the land between them, the distance of their sites
+minus both radii, is smaller than the minimum land width. Negative land means the grooves
+overlap, which the combine of the texture bodies may fail on.
+
+The sites are sorted into square grid cells whose edge is the largest distance at which
+two footprints can still violate the check, so only instances in the same or adjacent
+cells need to be compared. The candidate pairs of every neighbouring cell offset are built
+by array operations, so apart from one stable sort of the cell keys, which is close to linear
+for sites that come row by row, the check runs in time linear in the number of sites as long
+as the cells are not crowded. That is the case for any texture whose instances do not
+overlap massively. Sites are processed in blocks, so millions of sites fit into memory.
+Sites may be points in the plane or in space, e.g. instances placed on a curved face.
+"""
+
+import itertools
+from typing import NamedTuple
+
+import numpy as np
+
+# Number of sites whose candidate pairs are built at once.
+PAIR_BLOCK_SIZE = 1 << 18
+
+
+class OverlapReport(NamedTuple):
+    """Result of check_overlaps.
+
+    violations -- Number of pairs whose land is below the minimum land width.
+    overlaps -- Number of those pairs whose footprints overlap.
+    min_land_width -- Smallest land between any two instances within reach of the check, inf if there are none.
+    pairs -- Index pairs of the worst violations, at most max_pairs, sorted by their land.
+    land -- Land of these pairs.
+    """
+    violations: int
+    overlaps: int
+    min_land_width: float
+    pairs: np.ndarray
+    land: np.ndarray
+
+    @property
+    def ok(self) -> bool:
+        return self.violations == 0
+
+
+def check_overlaps(sites, radius, min_land: float = 0.0, max_pairs: int = 1000) -> OverlapReport:
+    """Finds all pairs of instances whose land is smaller than min_land.
+
+    Arguments:
+    sites -- Centers of the footprints, shape (n, 2) or (n, 3).
+    radius -- Radius of every footprint, a number or an array of n radii.
+    min_land -- Smallest allowed land between two footprints.
+    max_pairs -- Largest number of violating pairs returned.
+    """
+    sites = np.asarray(sites, dtype=float)
+    if sites.ndim != 2 or sites.shape[1] not in (2, 3):
+        raise ValueError('The sites must be an array of shape (n, 2) or (n, 3).')
+    count, dimensions = sites.shape
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), (count,))
+    if count < 2:
+        return OverlapReport(0, 0, np.inf, np.zeros((0, 2), dtype=np.int64), np.zeros(0))
+
+    # Footprints further apart than reach can neither overlap nor leave too little land.
+    reach = 2*float(radius.max())+max(min_land, 0.0)
+    if not reach > 0:
+        reach = float(np.ptp(sites, axis=0).max()) or 1.0
+    low = sites.min(axis=0)
+    cell = np.floor((sites-low)/reach).astype(np.int64)
+    shape = cell.max(axis=0)+1
+    key = np.ravel_multi_index(tuple(cell.T), tuple(shape))
+    order, cell_start = _sort_by_cell(key, int(np.prod(shape)))
+    sorted_sites, sorted_radius = sites[order], radius[order]
+    sorted_cell = cell[order]
+    sorted_key = key[order]
+
+    # Half of the neighbouring offsets, so every pair of cells is visited once.
+    offsets = [offset for offset in itertools.product((-1, 0, 1), repeat=dimensions) if offset > (0,)*dimensions]
+
+    violations = overlaps = 0
+    min_land_width = np.inf
+    worst_pairs, worst_land = [np.zeros((0, 2), dtype=np.int64)], [np.zeros(0)]
+    for start in range(0, count, PAIR_BLOCK_SIZE):
+        stop = min(start+PAIR_BLOCK_SIZE, count)
+        first = np.arange(start, stop)
+        candidates = [_same_cell_pairs(first, sorted_key, cell_start)]
+        for offset in offsets:
+            neighbour = sorted_cell[first]+offset
+            inside = np.all((neighbour >= 0) & (neighbour < shape), axis=1)
+            neighbour_key = np.ravel_multi_index(tuple(neighbour[inside].T), tuple(shape))
+            candidates.append(_cell_pairs(first[inside], neighbour_key, cell_start))
+        a, b = (np.concatenate(side) for side in zip(*candidates))
+        if not len(a):
+            continue
+        land = np.linalg.norm(sorted_sites[a]-sorted_sites[b], axis=1)-sorted_radius[a]-sorted_radius[b]
+        min_land_width = min(min_land_width, float(land.min()))
+        violating = land < min_land
+        violations += int(violating.sum())
+        overlaps += int((land < 0).sum())
+        if violating.any():
+            worst = np.flatnonzero(violating)
+            worst = worst[np.argsort(land[worst], kind='stable')[:max_pairs]]
+            worst_pairs.append(np.column_stack((order[a[worst]], order[b[worst]])))
+            worst_land.append(land[worst])
+
+    pairs, land = np.concatenate(worst_pairs), np.concatenate(worst_land)
+    worst = np.argsort(land, kind='stable')[:max_pairs]
+    return OverlapReport(violations, overlaps, min_land_width, np.sort(pairs[worst], axis=1), land[worst])
+
+
+def _sort_by_cell(key: np.ndarray, cells: int):
+    """Returns the order that sorts the sites by cell and the start of every cell in it, with one extra
+    entry for the end. The starts are a table while there are not many more cells than sites.
+    """
+    order = np.argsort(key, kind='stable')
+    if cells <= 4*len(key)+1024:
+        return order, np.concatenate(([0], np.cumsum(np.bincount(key, minlength=cells))))
+    # Sparse grids keep only the occupied cells, looked up by binary search.
+    return order, _SparseStarts(key[order])
+
+
+class _SparseStarts:
+    """cell_start of a sparse grid: maps cell keys to the range of their sites in the sorted order."""
+
+    def __init__(self, sorted_key: np.ndarray):
+        self.sorted_key = sorted_key
+
+    def __getitem__(self, key):
+        return np.searchsorted(self.sorted_key, key, side='left')
+
+    def end(self, key):
+        return np.searchsorted(self.sorted_key, key, side='right')
+
+
+def _cell_range(cell_start, key):
+    if isinstance(cell_start, _SparseStarts):
+        return cell_start[key], cell_start.end(key)
+    return cell_start[key], cell_start[key+1]
+
+
+def _same_cell_pairs(first: np.ndarray, sorted_key: np.ndarray, cell_start):
+    """Pairs of every site with the sites after it in its own cell."""
+    _, end = _cell_range(cell_start, sorted_key[first])
+    return _expand(first, first+1, end)
+
+
+def _cell_pairs(first: np.ndarray, neighbour_key: np.ndarray, cell_start):
+    """Pairs of every site with all sites of its neighbouring cell."""
+    begin, end = _cell_range(cell_start, neighbour_key)
+    return _expand(first, begin, end)
+
+
+def _expand(first: np.ndarray, begin: np.ndarray, end: np.ndarray):
+    """Returns the pairs (first[k], m) for all m in range(begin[k], end[k]) as two index arrays."""
+    counts = np.maximum(end-begin, 0)
+    total = int(counts.sum())
+    a = np.repeat(first, counts)
+    # The second index counts up from begin within each run of repeated first indices.
+    run_start = np.repeat(np.cumsum(counts)-counts, counts)
+    b = np.repeat(begin, counts)+np.arange(total)-run_start
+    return a, b
@@ -0,0 +1,386 @@
+"""Spatially graded textures whose parameters vary from instance to instance.
+
+A parameter field gives the value of a texture parameter at every lattice site
+(i*period, j*period) of a count_x by count_y patch:
+
+    a number        -- The same value everywhere, like the command dialog.
+    LinearField     -- A value changing linearly along a direction, clamped to [low, high].
+    RadialField     -- A value changing linearly with the distance from a center.
+    ImageField      -- A grayscale map stretched over an area, black maps to low and white to high.
+
+Any other function of (x, y) that broadcasts over arrays works as well. site_parameters
+samples the depth, width and flank angle fields at all sites and computes the radius and
+feasibility of every instance with one vectorized call of compute_profile. The period is
+the spacing of the lattice and stays uniform, the density of the texture is graded by the
+width of its grooves.
+
+The sites are rendered without any Fusion feature: graded_rasterize writes a depth map like
+heightmap.rasterize and graded_mesh returns a HeightfieldMesh for write_mesh. Every point
+takes the profile of its nearest site, like texture_depth. Infeasible instances are left
+out, unless site_parameters is asked to repair them.
+"""
+
+import math
+import os
+import struct
+import zlib
+from typing import NamedTuple
+
+import numpy as np
+
+from .feasible_region import MIN_LENGTH, RELATIVE_MARGIN
+from .groove_profile import compute_profile, depth_limits
+from .heightmap import MAX_GRAY, TEXTURE_TYPES, image_shape
+from .mesh import HeightfieldMesh
+
+
+class LinearField(NamedTuple):
+    """value at origin, changing by gradient = (d/dx, d/dy) per unit of length."""
+    value: float
+    gradient: tuple = (0.0, 0.0)
+    origin: tuple = (0.0, 0.0)
+    low: float = -math.inf
+    high: float = math.inf
+
+    def __call__(self, x, y) -> np.ndarray:
+        values = self.value+self.gradient[0]*(np.asarray(x)-self.origin[0])+self.gradient[1]*(np.asarray(y)-self.origin[1])
+        return np.clip(values, self.low, self.high)
+
+
+class RadialField(NamedTuple):
+    """center_value at center, changing linearly to edge_value at the distance radius and constant beyond."""
+    center_value: float
+    edge_value: float
+    radius: float
+    center: tuple = (0.0, 0.0)
+
+    def __call__(self, x, y) -> np.ndarray:
+        distance = np.hypot(np.asarray(x)-self.center[0], np.asarray(y)-self.center[1])
+        fraction = np.minimum(distance/self.radius, 1.0)
+        return self.center_value+(self.edge_value-self.center_value)*fraction
+
+
+class ImageField(NamedTuple):
+    """A grayscale image with values in [0, 1] stretched over size = (size_x, size_y) from origin.
+
+    Rows run along +y like the images of heightmap.rasterize, so a map drawn top down must be
+    flipped with image[::-1]. The image is sampled bilinearly between pixel centers and held
+    constant beyond the outer ones.
+    """
+    image: np.ndarray
+    low: float
+    high: float
+    size: tuple
+    origin: tuple = (0.0, 0.0)
+
+    def __call__(self, x, y) -> np.ndarray:
+        rows, columns = self.image.shape
+        u = np.clip((np.asarray(x)-self.origin[0])/self.size[0]*columns-0.5, 0, columns-1)
+        v = np.clip((np.asarray(y)-self.origin[1])/self.size[1]*rows-0.5, 0, rows-1)
+        column = np.minimum(u.astype(np.intp), max(columns-2, 0))
+        row = np.minimum(v.astype(np.intp), max(rows-2, 0))
+        next_column = np.minimum(column+1, columns-1)
+        next_row = np.minimum(row+1, rows-1)
+        s, t = u-column, v-row
+        gray = ((1-t)*((1-s)*self.image[row, column]+s*self.image[row, next_column])
+                + t*((1-s)*self.image[next_row, column]+s*self.image[next_row, next_column]))
+        return self.low+(self.high-self.low)*gray
+
+
+def image_field(image, low: float, high: float, size, origin=(0.0, 0.0)) -> ImageField:
+    """Returns the field of a grayscale map.
+
+    Arguments:
+    image -- Two dimensional array or the path of a .png or .npy file, see read_grayscale.
+             Integer images are scaled by the largest value of their type, float images must
+             lie in [0, 1] already.
+    low, high -- Parameter values of black and white.
+    size -- (size_x, size_y) of the area the image covers.
+    origin -- Lower left corner of the area relative to the lattice.
+    """
+    if isinstance(image, (str, os.PathLike)):
+        image = read_grayscale(image)
+    image = np.asarray(image)
+    if image.ndim != 2 or image.size == 0:
+        raise ValueError('A parameter map must be a non-empty two dimensional image.')
+    if image.dtype.kind in 'ui':
+        image = image/np.iinfo(image.dtype).max
+    return ImageField(np.clip(image.astype(float), 0, 1), low, high, tuple(size), tuple(origin))
+
+
+def read_grayscale(path: str) -> np.ndarray:
+    """Reads a grayscale image from a NumPy array (.npy) or an 8 or 16 bit grayscale PNG (.png).
+
+    PNG rows are returned in file order, which matches the images written by write_png.
+    Decoding a PNG takes a step per row, or per row and column if it uses the Average or
+    Paeth filter. A .npy file is read without decoding and is the fastest for large maps.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        return np.load(path)
+    if extension != '.png':
+        raise ValueError(f'Unsupported parameter map file type: {path}')
+
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ValueError(f'{path} is not a PNG file.')
+    header, compressed, position = None, [], 8
+    while position < len(data):
+        length, chunk_type = struct.unpack('>I4s', data[position:position+8])
+        chunk = data[position+8:position+8+length]
+        position += 12+length
+        if chunk_type == b'IHDR':
+            header = struct.unpack('>IIBBBBB', chunk)
+        elif chunk_type == b'IDAT':
+            compressed.append(chunk)
+        elif chunk_type == b'IEND':
+            break
+    if header is None:
+        raise ValueError(f'{path} has no PNG header.')
+    columns, rows, bit_depth, color_type, _, _, interlace = header
+    if color_type != 0 or bit_depth not in (8, 16) or interlace:
+        raise ValueError('Only non-interlaced 8 or 16 bit grayscale PNG files can be read.')
+
+    sample_bytes = bit_depth//8
+    stride = columns*sample_bytes
+    raw = np.frombuffer(zlib.decompress(b''.join(compressed)), dtype=np.uint8).reshape(rows, stride+1)
+    filters, lines = raw[:, 0], raw[:, 1:]
+    if filters.max(initial=0) > 4:
+        raise ValueError(f'Unknown PNG filter type: {filters.max()}')
+    if np.isin(filters, (3, 4)).any():
+        pixels = _unfilter_diagonals(filters, lines, sample_bytes)
+    else:
+        pixels = np.zeros((rows+1, stride), dtype=np.uint8)
+        for row in range(rows):
+            _unfilter(filters[row], lines[row], pixels[row], pixels[row+1], sample_bytes)
+        pixels = pixels[1:]
+    if bit_depth == 16:
+        return pixels.view('>u2').astype(np.uint16)
+    return pixels
+
+
+def _unfilter(filter_type: int, line: np.ndarray, previous: np.ndarray, out: np.ndarray, step: int):
+    """Reverses the None, Sub or Up filter of one row into out. previous is the unfiltered row before it."""
+    match filter_type:
+        case 0:
+            out[:] = line
+        case 1:
+            out[:] = np.cumsum(line.reshape(-1, step), axis=0, dtype=np.uint64).ravel() % 256
+        case 2:
+            out[:] = line+previous
+        case _:
+            raise ValueError(f'Unknown PNG filter type: {filter_type}')
+
+
+def _unfilter_diagonals(filters: np.ndarray, lines: np.ndarray, step: int) -> np.ndarray:
+    """Reverses the PNG filters of all rows, for images with Average or Paeth rows.
+
+    These filters predict a pixel from its left, upper and upper left neighbours, so a row
+    cannot be decoded at once. The pixels (row, column) with row+column = d only depend on
+    the diagonals before, so the image is decoded one anti-diagonal at a time, rows+columns-1
+    steps instead of one per byte. The pixels of a diagonal lie a fixed number of bytes apart
+    and are read and written through strided views.
+    """
+    rows, stride = lines.shape
+    columns = stride//step
+    # One row and one pixel of zeros above and left of the image.
+    width = stride+step
+    padded = np.zeros((rows+1)*width, dtype=np.uint8)
+    lines = np.ascontiguousarray(lines).ravel()
+    filters = filters.astype(np.int16)[:, None]
+
+    def diagonal(array, start, row_step, count):
+        return np.lib.stride_tricks.as_strided(array[start:], (count, step), (row_step, 1))
+
+    for d in range(rows+columns-1):
+        first, last = max(0, d-columns+1), min(rows-1, d)
+        count = last-first+1
+        position = (first+1)*width+(d-first+1)*step
+        out = diagonal(padded, position, width-step, count)
+        left = diagonal(padded, position-step, width-step, count).astype(np.int16)
+        up = diagonal(padded, position-width, width-step, count).astype(np.int16)
+        upper_left = diagonal(padded, position-width-step, width-step, count).astype(np.int16)
+        line = diagonal(lines, first*stride+(d-first)*step, stride-step, count)
+        row_filters = filters[first:last+1]
+
+        distance_left, distance_up = np.abs(up-upper_left), np.abs(left-upper_left)
+        distance_upper_left = np.abs(left+up-2*upper_left)
+        paeth = np.where((distance_left <= distance_up) & (distance_left <= distance_upper_left), left,
+                         np.where(distance_up <= distance_upper_left, up, upper_left))
+        predictor = np.select([row_filters == 1, row_filters == 2, row_filters == 3, row_filters == 4],
+                              [left, up, (left+up) >> 1, paeth], 0)
+        out[:] = (line+predictor) & 255
+    return np.ascontiguousarray(padded.reshape(rows+1, width)[1:, step:])
+
+
+class SiteParameters(NamedTuple):
+    """Parameters and profile of every instance, arrays of shape (count_y, count_x) indexed [j, i]."""
+    depth: np.ndarray
+    width: np.ndarray
+    flank_angle: np.ndarray
+    radius: np.ndarray
+    tangent_x: np.ndarray
+    tangent_z: np.ndarray
+    feasible: np.ndarray
+    repaired: np.ndarray
+    period: float
+
+    @property
+    def count_x(self) -> int:
+        return self.depth.shape[1]
+
+    @property
+    def count_y(self) -> int:
+        return self.depth.shape[0]
+
+
+def evaluate_field(field, x, y) -> np.ndarray:
+    """Returns the values of a field, a number or a function of (x, y), at the points (x, y)."""
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    values = field(x, y) if callable(field) else field
+    return np.broadcast_to(np.asarray(values, dtype=float), x.shape).copy()
+
+
+def site_parameters(depth, width, flank_angle, period: float, count_x: int, count_y: int,
+                    repair: bool = False, distance_margin: float = 0.0) -> SiteParameters:
+    """Samples the parameter fields at all lattice sites and computes the profile of every instance.
+
+    Arguments:
+    depth, width, flank_angle -- Numbers or fields of the texture parameters in cm and radians.
+    period -- Spacing of the lattice.
+    count_x, count_y -- Number of sites in x and y.
+    repair -- Move the depth of infeasible instances into the depth limits of their width and
+              flank angle, like project_parameters does for the depth input of the dialog.
+    distance_margin -- Distance the depth limits are moved inwards when repairing.
+    """
+    if count_x < 1 or count_y < 1:
+        raise ValueError('The patch needs at least one instance in each direction.')
+    if not period > 0:
+        raise ValueError('The period must be positive.')
+    y, x = np.meshgrid(np.arange(count_y)*period, np.arange(count_x)*period, indexing='ij')
+    depth, width, flank_angle = (evaluate_field(field, x, y) for field in (depth, width, flank_angle))
+
+    repaired = np.zeros(x.shape, dtype=bool)
+    if repair:
+        feasible = compute_profile(depth, width, flank_angle, period).feasible
+        given = depth.copy(), width.copy(), flank_angle.copy()
+        np.maximum(width, MIN_LENGTH, out=width)
+        np.clip(flank_angle, 0, np.pi/2-RELATIVE_MARGIN, out=flank_angle)
+        depth_min, depth_max = depth_limits(width, flank_angle, np.maximum(distance_margin, RELATIVE_MARGIN*width))
+        # Where the margins leave no room the middle of the open interval is the best there is.
+        middle = sum(depth_limits(width, flank_angle))/2
+        clamped = np.where(depth_min < depth_max, np.clip(depth, depth_min, depth_max), middle)
+        depth = np.where(feasible, given[0], clamped)
+        width = np.where(feasible, given[1], width)
+        flank_angle = np.where(feasible, given[2], flank_angle)
+        repaired = ~feasible
+
+    profile = compute_profile(depth, width, flank_angle, period)
+    return SiteParameters(depth, width, flank_angle, profile.radius, profile.tangent_x, profile.tangent_z,
+                          profile.feasible, repaired, float(period))
+
+
+def graded_depth(texture_type: str, sites: SiteParameters, x, y) -> np.ndarray:
+    """Returns the depth of a graded texture below the top surface at the points (x, y).
+
+    Every point takes the profile of its nearest site inside the patch, so the grooves end at
+    the last sites instead of repeating beyond them. Infeasible instances have depth zero.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    sites -- Result of site_parameters.
+    x, y -- Coordinates of the points, broadcast against each other.
+    """
+    if texture_type not in TEXTURE_TYPES:
+        raise ValueError(f'Unknown texture type: {texture_type}')
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    period = sites.period
+    i = np.clip(np.rint(x/period), 0, sites.count_x-1).astype(np.intp)
+    j = np.clip(np.rint(y/period), 0, sites.count_y-1).astype(np.intp)
+    distance_x, distance_y = np.abs(x-i*period), np.abs(y-j*period)
+    coefficients = [np.take(values, j*sites.count_x+i) for values in _profile_coefficients(sites)]
+    match texture_type:
+        case 'Dots':
+            return _profile_depth(np.hypot(distance_x, distance_y), *coefficients)
+        case 'Lines':
+            return _profile_depth(distance_x, *coefficients)
+        case 'Hatch':
+            return np.maximum(_profile_depth(distance_x, *coefficients), _profile_depth(distance_y, *coefficients))
+
+
+def graded_rasterize(texture_type: str, sites: SiteParameters, pixel_size: float, size=None, origin=None,
+                     depth_scale: float = None, out: np.ndarray = None, band_rows: int = 256) -> np.ndarray:
+    """Renders the depth map of a graded texture into a uint16 image, like heightmap.rasterize.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    sites -- Result of site_parameters.
+    pixel_size -- Edge length of a pixel.
+    size -- (size_x, size_y) of the rendered area. Defaults to the cells of all sites.
+    origin -- Position of the lower left corner of the area relative to the lattice. Defaults to
+              the corner of the cell of site (0, 0).
+    depth_scale -- Depth of one gray level. Defaults to the largest depth of a feasible instance/65535.
+    out -- Optional uint16 array of the image shape to render into, e.g. a memory map.
+    band_rows -- Number of rows evaluated at once.
+    """
+    period = sites.period
+    if size is None:
+        size = (sites.count_x*period, sites.count_y*period)
+    if origin is None:
+        origin = (-period/2, -period/2)
+    rows, columns = image_shape(size, pixel_size)
+    if out is None:
+        out = np.empty((rows, columns), dtype=np.uint16)
+    elif out.shape != (rows, columns):
+        raise ValueError(f'out has shape {out.shape}, expected {(rows, columns)}.')
+    scale = 1/(depth_scale or (max_site_depth(sites) or 1.0)/MAX_GRAY)
+
+    x = origin[0]+(np.arange(columns)+0.5)*pixel_size
+    y = origin[1]+(np.arange(rows)+0.5)*pixel_size
+    for start in range(0, rows, band_rows):
+        stop = min(start+band_rows, rows)
+        depth = graded_depth(texture_type, sites, x[None, :], y[start:stop, None])
+        gray = np.rint(depth*scale)
+        out[start:stop] = np.clip(gray, 0, MAX_GRAY, out=gray)
+    return out
+
+
+def graded_mesh(texture_type: str, sites: SiteParameters, spacing: float, thickness: float = None) -> HeightfieldMesh:
+    """Returns the mesh of the cells of all sites, sampled on a grid, for write_mesh.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    sites -- Result of site_parameters.
+    spacing -- Largest distance between grid vertices. It should resolve the narrowest groove.
+    thickness -- Close the surface into a slab reaching this far below the top surface.
+    """
+    if texture_type not in TEXTURE_TYPES:
+        raise ValueError(f'Unknown texture type: {texture_type}')
+    period = sites.period
+    return HeightfieldMesh(lambda x, y: graded_depth(texture_type, sites, x, y),
+                           (sites.count_x*period, sites.count_y*period), spacing, max_site_depth(sites),
+                           (-period/2, -period/2), thickness)
+
+
+def max_site_depth(sites: SiteParameters) -> float:
+    """Returns the largest depth of a feasible instance, zero if there is none."""
+    return float(sites.depth[sites.feasible].max(initial=0.0))
+
+
+def _profile_coefficients(sites: SiteParameters):
+    """Returns flat arrays (depth, radius, tangent_x, tangent_z, half_width) of all sites. Infeasible
+    sites get coefficients for which _profile_depth is zero everywhere.
+    """
+    feasible = sites.feasible.ravel()
+    blank = (0.0, 0.0, -1.0, 0.0, 0.0)
+    values = (sites.depth, sites.radius, sites.tangent_x, sites.tangent_z, sites.width/2)
+    return [np.where(feasible, value.ravel(), empty) for value, empty in zip(values, blank)]
+
+
+def _profile_depth(x, depth, radius, tangent_x, tangent_z, half_width) -> np.ndarray:
+    """groove_profile.profile_depth with the radius and tangent points computed once per site."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        flank = tangent_z*(half_width-x)/(half_width-tangent_x)
+        arc = depth-radius+np.sqrt(np.maximum(radius*radius-x*x, 0))
+    return np.where(x <= tangent_x, arc, np.where(x < half_width, flank, 0.0))
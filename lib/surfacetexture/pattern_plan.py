@@ -0,0 +1,78 @@
+"""Plans the rectangular pattern features that repeat the texture over count_x by count_y periods.
+
+A single pattern feature with count_x*count_y instances makes Fusion compute every instance in
+one feature, which gets expensive for large areas. The hierarchical plan doubles instead: the
+seed is patterned once with quantity 2, then the seed and that pattern are patterned again at
+twice the distance, and so on. Counts that are no power of two are completed by patterning the
+group of the largest fitting power of two once more. Every step patterns the seed together
+with a prefix of the earlier steps, so N by M instances take about 2*(log2 N + log2 M) pattern
+features with two instances each.
+
+Distances are given in periods, so the features can be driven by the Texture_period parameter.
+"""
+
+from typing import NamedTuple
+
+
+class PatternStep(NamedTuple):
+    """One rectangular pattern feature.
+
+    sources -- Number of preceding steps whose features are patterned together with the seed.
+    quantity_one, spacing_one -- Quantity and distance in periods along x.
+    quantity_two, spacing_two -- Quantity and distance in periods along y.
+    """
+    sources: int
+    quantity_one: int
+    spacing_one: int
+    quantity_two: int
+    spacing_two: int
+
+
+def plan_pattern(count_x: int, count_y: int, max_single_instances: int) -> list:
+    """Returns the pattern steps for count_x by count_y instances.
+
+    A single step is planned up to max_single_instances instances, the hierarchical plan above.
+
+    Arguments:
+    count_x, count_y -- Number of instances along x and y, at least 1.
+    max_single_instances -- Largest number of instances built by a single pattern feature.
+    """
+    if count_x < 1 or count_y < 1:
+        raise ValueError('The pattern needs at least one instance in each direction.')
+    if count_x == count_y == 1:
+        return []
+    if count_x*count_y <= max_single_instances:
+        return [PatternStep(0, count_x, 1, count_y, 1)]
+
+    steps = []
+    _double(steps, count_x, lambda sources, spacing: PatternStep(sources, 2, spacing, 1, 1))
+    _double(steps, count_y, lambda sources, spacing: PatternStep(sources, 1, 1, 2, spacing))
+    return steps
+
+
+def instance_positions(steps: list) -> list:
+    """Returns the sorted (i, j) lattice positions, in periods, of all instances the steps create."""
+    groups = [{(0, 0)}]
+    for step in steps:
+        group = set().union(*groups[:step.sources+1])
+        groups.append({(i+a*step.spacing_one, j+b*step.spacing_two)
+                       for i, j in group for a in range(step.quantity_one) for b in range(step.quantity_two)})
+    return sorted(set().union(*groups))
+
+
+def _double(steps: list, count: int, make_step):
+    """Appends the steps that repeat everything planned so far count times along one direction."""
+    first = len(steps)
+    # Doubling: every step patterns all features before it at the length covered so far.
+    covered = 1
+    while 2*covered <= count:
+        steps.append(make_step(len(steps), covered))
+        covered *= 2
+    # The rest is added in decreasing powers of two. The group of 2**k instances consists of
+    # the features before this direction and its first k doubling steps.
+    level = (covered.bit_length()-1)-1
+    while covered < count:
+        if covered+(1 << level) <= count:
+            steps.append(make_step(first+level, covered))
+            covered += 1 << level
+        level -= 1
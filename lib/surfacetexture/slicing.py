@@ -0,0 +1,198 @@
+"""Pass contours for removing a texture layer by layer, e.g. by laser ablation.
+
+The material to remove at a depth z is where the texture is deeper than z. Its contours follow
+from the profile of create_sketch in closed form, groove_profile.profile_half_width gives the
+distance r(z) from the middle line at which the profile reaches z:
+
+    Dots  -- A circle of radius r(z) around every site.
+    Lines -- A strip of width 2*r(z) along every groove.
+    Hatch -- The strips along y at full length plus the pieces of the strips along x between
+             them. The pieces only touch, so no area is removed twice by one pass.
+
+The sliced area is the same as the one of mesh.PatchMesh: count_x by count_y periods, cell
+(i, j) centered on the site (i*period, j*period). Every layer is sliced in its middle plane.
+Contours of a layer are produced as NumPy arrays in one go, so slicing costs time in the
+number of contours, not in the complexity of the Fusion bodies that make_dots and make_line
+create.
+"""
+
+import struct
+from typing import NamedTuple
+
+import numpy as np
+
+from .groove_profile import compute_profile, profile_half_width
+from .heightmap import TEXTURE_TYPES
+
+# Number of contours converted to points at once by write_cli.
+CONTOURS_PER_BLOCK = 1 << 14
+
+
+class Layer(NamedTuple):
+    """Contours of one pass.
+
+    index -- Number of the layer, starting at 1 below the top surface.
+    depth -- Depth of the middle plane of the layer.
+    circles -- (n, 3) array of center x, center y and radius.
+    rectangles -- (n, 4) array of x min, y min, x max, y max.
+    """
+    index: int
+    depth: float
+    circles: np.ndarray
+    rectangles: np.ndarray
+
+    @property
+    def contour_count(self) -> int:
+        return len(self.circles)+len(self.rectangles)
+
+
+def layer_depths(depth: float, layer_thickness: float) -> np.ndarray:
+    """Returns the depths of the middle planes of all layers that cut into a texture of the given depth."""
+    if not layer_thickness > 0:
+        raise ValueError('The layer thickness must be positive.')
+    middle = (np.arange(1, int(np.ceil(depth/layer_thickness))+1)-0.5)*layer_thickness
+    return middle[middle < depth]
+
+
+def slice_layers(texture_type: str, depth: float, width: float, flank_angle: float, period: float,
+                 count_x: int, count_y: int, layer_thickness: float):
+    """Yields the Layer of every pass from the top surface down.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    depth, width, flank_angle, period -- Texture parameters as in the command dialog.
+    count_x, count_y -- Number of periods in x and y.
+    layer_thickness -- Depth removed by one pass.
+    """
+    if texture_type not in TEXTURE_TYPES:
+        raise ValueError(f'Unknown texture type: {texture_type}')
+    if not compute_profile(depth, width, flank_angle, period).feasible:
+        raise ValueError('The texture parameters do not describe a valid groove profile.')
+    if period < width:
+        raise ValueError('Contours can only be sliced for textures whose grooves do not overlap.')
+    if count_x < 1 or count_y < 1:
+        raise ValueError('The area needs at least one period in each direction.')
+
+    layers = layer_depths(depth, layer_thickness)
+    half_widths = profile_half_width(layers, depth, width, flank_angle)
+    site_x = np.arange(count_x)*period
+    site_y = np.arange(count_y)*period
+    low_x, low_y = -period/2, -period/2
+    high_x, high_y = (count_x-0.5)*period, (count_y-0.5)*period
+    no_circles = np.empty((0, 3))
+    no_rectangles = np.empty((0, 4))
+
+    for index, (z, r) in enumerate(zip(layers, half_widths), 1):
+        match texture_type:
+            case 'Dots':
+                center_x, center_y = np.meshgrid(site_x, site_y)
+                circles = np.column_stack((center_x.ravel(), center_y.ravel(), np.full(center_x.size, r)))
+                yield Layer(index, float(z), circles, no_rectangles)
+            case 'Lines':
+                yield Layer(index, float(z), no_circles, _strips_along_y(site_x, r, low_y, high_y))
+            case 'Hatch':
+                # Pieces of the strips along x lie in the gaps between the strips along y,
+                # including the gaps towards the left and right border of the area.
+                gap_start = np.append(low_x, site_x+r)
+                gap_end = np.append(site_x-r, high_x)
+                gaps = gap_end > gap_start
+                gap_start, gap_end = gap_start[gaps], gap_end[gaps]
+                start, y = np.meshgrid(gap_start, site_y)
+                end, _ = np.meshgrid(gap_end, site_y)
+                pieces = np.column_stack((start.ravel(), y.ravel()-r, end.ravel(), y.ravel()+r))
+                yield Layer(index, float(z), no_circles,
+                            np.concatenate((_strips_along_y(site_x, r, low_y, high_y), pieces)))
+
+
+def _strips_along_y(site_x: np.ndarray, half_width: float, low_y: float, high_y: float) -> np.ndarray:
+    return np.column_stack((site_x-half_width, np.full(len(site_x), low_y),
+                            site_x+half_width, np.full(len(site_x), high_y)))
+
+
+def contour_points(layer: Layer, tolerance: float) -> list:
+    """Returns the closed polylines of a layer, counterclockwise, as arrays of shape (contours, points, 2).
+
+    Circles are approximated by inscribed polygons whose chords deviate at most the tolerance
+    from the circle. The first point is repeated at the end of every polyline.
+    """
+    polylines = []
+    if len(layer.circles):
+        radius = layer.circles[0, 2]
+        sectors = max(8, int(np.ceil(np.pi/np.arccos(max(1-tolerance/radius, -1.0))-1e-9)))
+        angle = 2*np.pi*np.arange(sectors+1)/sectors
+        angle[-1] = 0.0
+        unit = np.stack((np.cos(angle), np.sin(angle)), axis=-1)
+        polylines.append(layer.circles[:, None, :2]+layer.circles[:, None, 2:]*unit[None])
+    if len(layer.rectangles):
+        x0, y0, x1, y1 = layer.rectangles.T
+        polylines.append(np.stack((np.stack((x0, y0), -1), np.stack((x1, y0), -1), np.stack((x1, y1), -1),
+                                   np.stack((x0, y1), -1), np.stack((x0, y0), -1)), axis=1))
+    return polylines
+
+
+def write_cli(path: str, layers, tolerance: float = 1e-4, scale: float = 10.0, binary: bool = True):
+    """Writes layers as Common Layer Interface file, one layer after the other as they are produced.
+
+    The z value of a layer is the depth of its middle plane below the top surface. All contours are
+    written as closed counterclockwise (external) polylines. The binary variant writes whole layers
+    with NumPy and should be used for large jobs.
+
+    Arguments:
+    path -- File to write.
+    layers -- Iterable of Layer, e.g. the generator returned by slice_layers.
+    tolerance -- Chord tolerance of the circles, in the unit of the layers.
+    scale -- Factor from the unit of the layers to mm. The default converts cm.
+    binary -- Write binary instead of ASCII geometry.
+    """
+    with open(path, 'wb') as file:
+        file.write(f'$$HEADERSTART\n$${"BINARY" if binary else "ASCII"}\n$$UNITS/1.0\n$$VERSION/200\n'.encode('ascii'))
+        # The number of layers is only known at the end, a fixed width field is reserved for it.
+        layer_count_position = file.tell()
+        file.write(b'$$LAYERS/000000\n$$HEADEREND')
+        if not binary:
+            file.write(b'\n$$GEOMETRYSTART\n')
+        layer_count = 0
+        for layer in layers:
+            layer_count += 1
+            if binary:
+                file.write(struct.pack('<Hf', 127, layer.depth*scale))
+            else:
+                file.write(f'$$LAYER/{layer.depth*scale:.5f}\n'.encode('ascii'))
+            # The points of a layer take far more memory than its contours, so they are made in blocks.
+            for block in _blocks(layer):
+                for points in contour_points(block, tolerance):
+                    points = points*scale
+                    if binary:
+                        _write_binary_polylines(file, points)
+                        continue
+                    for polyline in points:
+                        coordinates = ','.join(f'{value:.5f}' for value in polyline.ravel())
+                        file.write(f'$$POLYLINE/1,1,{len(polyline)},{coordinates}\n'.encode('ascii'))
+        if not binary:
+            file.write(b'$$GEOMETRYEND\n')
+        file.seek(layer_count_position)
+        file.write(f'$$LAYERS/{layer_count:06d}'.encode('ascii'))
+
+
+def _blocks(layer: Layer):
+    """Splits a layer into layers of at most CONTOURS_PER_BLOCK circles and rectangles each."""
+    for name in ('circles', 'rectangles'):
+        contours = getattr(layer, name)
+        for start in range(0, len(contours), CONTOURS_PER_BLOCK):
+            empty = {'circles': layer.circles[:0], 'rectangles': layer.rectangles[:0]}
+            empty[name] = contours[start:start+CONTOURS_PER_BLOCK]
+            yield layer._replace(**empty)
+
+
+def _write_binary_polylines(file, points: np.ndarray):
+    """Writes polylines with the same number of points as long polyline commands (130)."""
+    count, length, _ = points.shape
+    command = np.dtype([('command', '<u2'), ('id', '<i4'), ('direction', '<i4'), ('points', '<i4'),
+                        ('coordinates', '<f4', (2*length,))])
+    records = np.empty(count, dtype=command)
+    records['command'] = 130
+    records['id'] = 1
+    records['direction'] = 1
+    records['points'] = length
+    records['coordinates'] = points.reshape(count, -1)
+    file.write(records.tobytes())
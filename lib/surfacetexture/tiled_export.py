@@ -0,0 +1,303 @@
+"""Out-of-core export of depth maps that do not fit into memory.
+
+The field is cut into square tiles which are rendered by heightmap.rasterize in a
+process pool. Every worker writes its tile straight into a memory map of the output
+file, so neither the workers nor the main process ever hold more than a tile. The
+output file is laid out completely before the first tile is rendered:
+
+    .npy       -- NumPy array of shape (rows, columns), uint16.
+    .raw       -- Little endian uint16, rows*columns samples, no header.
+    .tif/.tiff -- Uncompressed, tiled 16 bit grayscale BigTIFF.
+
+Finished tiles are recorded in a sidecar file next to the output (<path>.progress),
+which lets an interrupted export continue where it stopped. The sidecar is removed
+when the export is complete.
+
+Process pools need an interpreter that can start child processes, so this module is
+meant for scripts running outside of Fusion. Inside Fusion use workers=1, which
+renders all tiles in the calling process.
+"""
+
+import concurrent.futures
+import json
+import os
+import struct
+import time
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from .groove_profile import compute_profile
+from .heightmap import MAX_GRAY, TEXTURE_TYPES, image_shape, rasterize
+
+PROGRESS_SUFFIX = '.progress'
+TILED_FORMATS = ('.npy', '.raw', '.tif', '.tiff')
+
+# Seconds between two writes of the progress sidecar.
+PROGRESS_SAVE_INTERVAL = 1.0
+
+# TIFF field types used by _write_tiff_header.
+_TIFF_SHORT = 3
+_TIFF_ASCII = 2
+_TIFF_LONG8 = 16
+
+
+class ExportResult(NamedTuple):
+    path: str
+    shape: tuple
+    tiles: int
+    rendered: int
+    resumed: int
+    depth_scale: float
+    seconds: float
+
+
+class _Layout(NamedTuple):
+    """Where the samples of a tile are stored in the output file."""
+    kind: str
+    shape: tuple
+    tile_size: int
+    data_offset: int
+
+    @property
+    def tile_grid(self) -> tuple:
+        return -(-self.shape[0]//self.tile_size), -(-self.shape[1]//self.tile_size)
+
+    def open_memmap(self, path: str, mode: str = 'r+') -> np.ndarray:
+        if self.kind == 'tiff':
+            # Edge tiles are padded to the full tile size, the TIFF way.
+            grid = self.tile_grid
+            shape = (grid[0], grid[1], self.tile_size, self.tile_size)
+        else:
+            shape = self.shape
+        return np.memmap(path, dtype='<u2', mode=mode, offset=self.data_offset, shape=shape)
+
+    def tile_view(self, memmap: np.ndarray, tile_row: int, tile_column: int, rows: int, columns: int) -> np.ndarray:
+        if self.kind == 'tiff':
+            return memmap[tile_row, tile_column, :rows, :columns]
+        row = tile_row*self.tile_size
+        column = tile_column*self.tile_size
+        return memmap[row:row+rows, column:column+columns]
+
+
+def export_heightmap(path: str, texture_type: str, depth: float, width: float, flank_angle: float, period: float,
+                     size, pixel_size: float, depth_scale: float = None, tile_size: int = 2048,
+                     workers: int = None, resume: bool = True,
+                     progress: Callable[[int, int], None] = None) -> ExportResult:
+    """Renders the depth map of a texture tile by tile into a file.
+
+    Arguments:
+    path -- Output file, the extension selects the format (.npy, .raw, .tif or .tiff).
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    depth, width, flank_angle, period -- Texture parameters as in the command dialog, in cm and radians.
+    size -- (size_x, size_y) of the rendered area in cm.
+    pixel_size -- Edge length of a pixel in cm.
+    depth_scale -- Depth of one gray level. Defaults to depth/65535.
+    tile_size -- Edge length of a tile in pixels, a multiple of 16. Bounds the memory of every worker.
+    workers -- Number of worker processes. Defaults to the number of CPUs, 1 renders in this process.
+    resume -- Continue an interrupted export of the same parameters instead of starting over.
+    progress -- Called with (finished tiles, all tiles) after every tile.
+    """
+    start = time.perf_counter()
+    kind = _format_of(path)
+    if texture_type not in TEXTURE_TYPES:
+        raise ValueError(f'Unknown texture type: {texture_type}')
+    if not compute_profile(depth, width, flank_angle, period).feasible:
+        raise ValueError('The texture parameters do not describe a valid groove profile.')
+    if tile_size <= 0 or tile_size % 16:
+        raise ValueError('The tile size must be a positive multiple of 16.')
+
+    shape = image_shape(size, pixel_size)
+    depth_scale = depth_scale or depth/MAX_GRAY
+    parameters = {
+        'texture_type': texture_type, 'depth': depth, 'width': width, 'flank_angle': flank_angle,
+        'period': period, 'shape': list(shape), 'pixel_size': pixel_size, 'depth_scale': depth_scale,
+        'tile_size': tile_size, 'format': kind,
+    }
+
+    progress_path = path+PROGRESS_SUFFIX
+    done = _load_progress(progress_path, parameters) if resume and os.path.exists(path) else None
+    if done is None:
+        done = set()
+        layout = _create_output(path, kind, shape, tile_size, parameters)
+        _save_progress(progress_path, parameters, done)
+    else:
+        layout = _layout(path, kind, shape, tile_size)
+    resumed = len(done)
+
+    grid = layout.tile_grid
+    jobs = []
+    for tile_row in range(grid[0]):
+        for tile_column in range(grid[1]):
+            if tile_row*grid[1]+tile_column not in done:
+                jobs.append((path, layout, tile_row, tile_column, texture_type, depth, width, flank_angle,
+                             period, pixel_size, depth_scale))
+    tiles = grid[0]*grid[1]
+
+    last_save = time.monotonic()
+
+    def tile_finished(index):
+        nonlocal last_save
+        done.add(index)
+        if time.monotonic()-last_save > PROGRESS_SAVE_INTERVAL:
+            _save_progress(progress_path, parameters, done)
+            last_save = time.monotonic()
+        if progress:
+            progress(len(done), tiles)
+
+    try:
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(jobs) <= 1:
+            for job in jobs:
+                tile_finished(_render_tile(job))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(min(workers, len(jobs))) as executor:
+                for future in concurrent.futures.as_completed([executor.submit(_render_tile, job) for job in jobs]):
+                    tile_finished(future.result())
+    except BaseException:
+        _save_progress(progress_path, parameters, done)
+        raise
+
+    os.remove(progress_path)
+    return ExportResult(path, shape, tiles, tiles-resumed, resumed, depth_scale, time.perf_counter()-start)
+
+
+def _render_tile(job) -> int:
+    """Renders one tile into the output file and returns its index. Runs in the worker processes."""
+    path, layout, tile_row, tile_column, texture_type, depth, width, flank_angle, period, pixel_size, depth_scale = job
+    tile_size = layout.tile_size
+    row = tile_row*tile_size
+    column = tile_column*tile_size
+    rows = min(tile_size, layout.shape[0]-row)
+    columns = min(tile_size, layout.shape[1]-column)
+
+    tile = np.empty((rows, columns), dtype=np.uint16)
+    rasterize(texture_type, depth, width, flank_angle, period, (columns*pixel_size, rows*pixel_size), pixel_size,
+              origin=(column*pixel_size, row*pixel_size), depth_scale=depth_scale, out=tile)
+
+    memmap = layout.open_memmap(path)
+    layout.tile_view(memmap, tile_row, tile_column, rows, columns)[:] = tile
+    # The tile must be on disk before it is reported as done, otherwise a resumed export could skip it.
+    memmap.flush()
+    del memmap
+    return tile_row*layout.tile_grid[1]+tile_column
+
+
+def _format_of(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in TILED_FORMATS:
+        raise ValueError(f'Unsupported heightmap file type: {path}')
+    return 'tiff' if extension.startswith('.tif') else extension[1:]
+
+
+def _layout(path: str, kind: str, shape: tuple, tile_size: int) -> _Layout:
+    """Returns the layout of an existing output file."""
+    match kind:
+        case 'npy':
+            with open(path, 'rb') as file:
+                np.lib.format.read_magic(file)
+                np.lib.format.read_array_header_1_0(file)
+                data_offset = file.tell()
+        case 'raw':
+            data_offset = 0
+        case 'tiff':
+            data_offset = _tiff_data_offset(shape, tile_size, _tiff_description({}))
+    return _Layout(kind, shape, tile_size, data_offset)
+
+
+def _create_output(path: str, kind: str, shape: tuple, tile_size: int, parameters: dict) -> _Layout:
+    """Creates the output file at its final size. The samples are left as zeros."""
+    match kind:
+        case 'npy':
+            np.lib.format.open_memmap(path, mode='w+', dtype=np.uint16, shape=shape, version=(1, 0)).flush()
+            return _layout(path, kind, shape, tile_size)
+        case 'raw':
+            layout = _Layout(kind, shape, tile_size, 0)
+            data_size = shape[0]*shape[1]*2
+        case 'tiff':
+            description = _tiff_description(parameters)
+            layout = _Layout(kind, shape, tile_size, _tiff_data_offset(shape, tile_size, description))
+            grid = layout.tile_grid
+            data_size = grid[0]*grid[1]*tile_size*tile_size*2
+    with open(path, 'wb') as file:
+        if kind == 'tiff':
+            _write_tiff_header(file, layout, description)
+        # Extending the file leaves it sparse on most file systems, so this is quick even for huge maps.
+        file.truncate(layout.data_offset+data_size)
+    return layout
+
+
+def _tiff_description(parameters: dict) -> bytes:
+    """The ImageDescription of the TIFF, padded to a fixed length so the data offset does not depend on it."""
+    description = json.dumps({key: parameters[key] for key in ('pixel_size', 'depth_scale') if key in parameters})
+    return description.encode('ascii').ljust(255, b' ')+b'\0'
+
+
+def _tiff_data_offset(shape: tuple, tile_size: int, description: bytes) -> int:
+    tiles = -(-shape[0]//tile_size)*-(-shape[1]//tile_size)
+    # Header, IFD with 13 entries, the description and both tile arrays; the data is page aligned.
+    end = 16+8+13*20+8+len(description)+2*8*tiles
+    return -(-end//4096)*4096
+
+
+def _write_tiff_header(file, layout: _Layout, description: bytes):
+    grid = layout.tile_grid
+    tiles = grid[0]*grid[1]
+    tile_bytes = layout.tile_size*layout.tile_size*2
+    ifd_offset = 16
+    description_offset = ifd_offset+8+13*20+8
+    offsets_offset = description_offset+len(description)
+    counts_offset = offsets_offset+8*tiles
+
+    def entry(tag, field_type, count, value):
+        if field_type == _TIFF_SHORT and count == 1:
+            return struct.pack('<HHQHxxxxxx', tag, field_type, count, value)
+        return struct.pack('<HHQQ', tag, field_type, count, value)
+
+    def offsets_or_value(offset, first_value):
+        # Arrays that fit into the entry are stored inline.
+        return first_value if tiles == 1 else offset
+
+    entries = [
+        entry(256, _TIFF_LONG8, 1, layout.shape[1]),  # ImageWidth
+        entry(257, _TIFF_LONG8, 1, layout.shape[0]),  # ImageLength
+        entry(258, _TIFF_SHORT, 1, 16),  # BitsPerSample
+        entry(259, _TIFF_SHORT, 1, 1),  # Compression: none
+        entry(262, _TIFF_SHORT, 1, 1),  # PhotometricInterpretation: black is zero
+        entry(270, _TIFF_ASCII, len(description), description_offset),  # ImageDescription
+        entry(277, _TIFF_SHORT, 1, 1),  # SamplesPerPixel
+        entry(284, _TIFF_SHORT, 1, 1),  # PlanarConfiguration: chunky
+        entry(322, _TIFF_LONG8, 1, layout.tile_size),  # TileWidth
+        entry(323, _TIFF_LONG8, 1, layout.tile_size),  # TileLength
+        entry(324, _TIFF_LONG8, tiles, offsets_or_value(offsets_offset, layout.data_offset)),  # TileOffsets
+        entry(325, _TIFF_LONG8, tiles, offsets_or_value(counts_offset, tile_bytes)),  # TileByteCounts
+        entry(339, _TIFF_SHORT, 1, 1),  # SampleFormat: unsigned integer
+    ]
+
+    file.write(struct.pack('<2sHHHQ', b'II', 43, 8, 0, ifd_offset))
+    file.write(struct.pack('<Q', len(entries)))
+    file.write(b''.join(entries))
+    file.write(struct.pack('<Q', 0))
+    file.write(description)
+    (layout.data_offset+tile_bytes*np.arange(tiles, dtype='<u8')).astype('<u8').tofile(file)
+    np.full(tiles, tile_bytes, dtype='<u8').tofile(file)
+
+
+def _load_progress(progress_path: str, parameters: dict):
+    """Returns the indices of the finished tiles or None if the export cannot be resumed."""
+    try:
+        with open(progress_path) as file:
+            saved = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if saved.get('parameters') != parameters:
+        return None
+    return set(saved.get('done', []))
+
+
+def _save_progress(progress_path: str, parameters: dict, done: set):
+    # Written to a temporary file first, so an interruption never leaves a broken sidecar behind.
+    temporary_path = progress_path+'.tmp'
+    with open(temporary_path, 'w') as file:
+        json.dump({'parameters': parameters, 'done': sorted(done)}, file)
+    os.replace(temporary_path, progress_path)
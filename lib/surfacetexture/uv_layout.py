@@ -0,0 +1,270 @@
+"""Texture lattices laid out on curved faces in the parameter space (u, v) of the surface.
+
+Planar textures put site (i, j) at (i*period, j*period). On a curved face equal steps of
+the surface parameters cover different distances from place to place, so the lattice is
+laid out by arc length instead, from points of the surface sampled on a regular grid of
+parameters:
+
+    Rows of sites run along u. They are one period apart in arc length along v, measured
+    along the parameter lines v and averaged over u.
+    The sites of every row are one period apart in arc length along u at the v of the row,
+    so rows that are shorter in u get fewer sites, e.g. towards the apex of a cone.
+    Closed directions, like u around a full cylinder, get a whole number of sites with the
+    step stretched slightly to close up evenly. Open directions keep margin periods from
+    the edges of the parameter range and are centered.
+
+Arc lengths are measured along the polylines through the samples, the grid must be fine
+enough to follow the curvature. No function calls the Fusion API: the caller evaluates the
+grid with one batched SurfaceEvaluator.getPointsAtParameters call, lays out the lattice,
+evaluates points, normals and first derivatives at all sites with one batched call each
+and turns them into one coordinate frame per instance with placement_frames.
+
+rasterize_lattice renders the depth map of a laid out texture in the unrolled arc length
+coordinates (s, t) of the face, s along u from the start of every row and t along v.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from .groove_profile import compute_profile, profile_depth
+from .heightmap import MAX_GRAY, TEXTURE_TYPES, image_shape
+
+# Relative distance below which the first and last samples of a parameter line count as the same point.
+CLOSED_TOLERANCE = 1e-6
+
+
+class UVLattice(NamedTuple):
+    """Sites of a texture on a face. Site arrays are ordered row by row, row arrays by t."""
+    u: np.ndarray
+    v: np.ndarray
+    s: np.ndarray
+    t: np.ndarray
+    row_start: np.ndarray
+    row_step: np.ndarray
+    row_length: np.ndarray
+    row_t: np.ndarray
+    period: float
+    closed_u: bool
+    closed_v: bool
+    length_v: float
+
+    @property
+    def count(self) -> int:
+        return len(self.u)
+
+    @property
+    def row_count(self) -> np.ndarray:
+        return np.diff(self.row_start)
+
+
+class Placements(NamedTuple):
+    """Coordinate frames of the instances, arrays of shape (n, 3). The cell is built around the origin
+    with its grooves towards -z, so normal must point out of the body the texture is cut into.
+    """
+    origin: np.ndarray
+    x_direction: np.ndarray
+    y_direction: np.ndarray
+    normal: np.ndarray
+
+    def matrices(self) -> np.ndarray:
+        """Returns the transforms from the cell to the instances, shape (n, 4, 4). Their rows are the ones
+        Matrix3D.setWithArray expects.
+        """
+        matrices = np.zeros((len(self.origin), 4, 4))
+        for column, vectors in enumerate((self.x_direction, self.y_direction, self.normal, self.origin)):
+            matrices[:, :3, column] = vectors
+        matrices[:, 3, 3] = 1
+        return matrices
+
+
+def parameter_grid(u_range, v_range, samples: int):
+    """Returns the sample parameters (u, v) of a grid with samples values along each direction and the
+    (samples*samples, 2) array of all grid parameters in the order uv_lattice expects the points, v-major.
+    """
+    u = np.linspace(u_range[0], u_range[1], samples)
+    v = np.linspace(v_range[0], v_range[1], samples)
+    grid_v, grid_u = np.meshgrid(v, u, indexing='ij')
+    return u, v, np.column_stack((grid_u.ravel(), grid_v.ravel()))
+
+
+def grid_points(points, samples_u: int, samples_v: int) -> np.ndarray:
+    """Returns the points evaluated at the parameters of parameter_grid as array of shape (samples_v, samples_u, 3)."""
+    return np.asarray(points, dtype=float).reshape(samples_v, samples_u, 3)
+
+
+def arc_lengths(points: np.ndarray):
+    """Returns the cumulative arc lengths of the grid points (n_v, n_u, 3) along u and along v, both of shape (n_v, n_u)."""
+    step_u = np.linalg.norm(np.diff(points, axis=1), axis=-1)
+    step_v = np.linalg.norm(np.diff(points, axis=0), axis=-1)
+    length_u = np.concatenate((np.zeros((points.shape[0], 1)), np.cumsum(step_u, axis=1)), axis=1)
+    length_v = np.concatenate((np.zeros((1, points.shape[1])), np.cumsum(step_v, axis=0)), axis=0)
+    return length_u, length_v
+
+
+def uv_lattice(u: np.ndarray, v: np.ndarray, points: np.ndarray, period: float, margin: float = 0.5,
+               closed_u: bool = None, closed_v: bool = None) -> UVLattice:
+    """Lays out the sites of a texture with the given period on a sampled surface.
+
+    Arguments:
+    u, v -- Ascending sample parameters of the grid.
+    points -- Surface points at the grid parameters, shape (len(v), len(u), 3).
+    period -- Distance between neighbouring sites.
+    margin -- Distance of the outermost sites from open edges, in periods.
+    closed_u, closed_v -- Whether the surface closes up in that direction. Detected from the points if None.
+    """
+    if not period > 0:
+        raise ValueError('The period must be positive.')
+    points = np.asarray(points, dtype=float)
+    if points.shape != (len(v), len(u), 3) or len(u) < 2 or len(v) < 2:
+        raise ValueError('The points must be a grid of at least 2 by 2 samples of shape (len(v), len(u), 3).')
+    length_u, length_v = arc_lengths(points)
+    tolerance = CLOSED_TOLERANCE*max(length_u[:, -1].max(), length_v[-1].max(), period)
+    if closed_u is None:
+        closed_u = bool(np.all(np.linalg.norm(points[:, 0]-points[:, -1], axis=-1) < tolerance))
+    if closed_v is None:
+        closed_v = bool(np.all(np.linalg.norm(points[0]-points[-1], axis=-1) < tolerance))
+
+    # Rows are spaced along the mean arc length of the parameter lines v, which is ascending in v.
+    mean_length_v = length_v.mean(axis=1)
+    row_t = _sites_along(mean_length_v[-1], period, margin, closed_v)
+    row_v = np.interp(row_t, mean_length_v, v)
+
+    # Arc lengths along u at the v of every row, interpolated between the sampled parameter lines.
+    position = np.interp(row_v, v, np.arange(len(v)))
+    lower = np.minimum(position.astype(np.intp), len(v)-2)
+    weight = (position-lower)[:, None]
+    row_length_u = (1-weight)*length_u[lower]+weight*length_u[lower+1]
+
+    sites_u, sites_s, counts, steps = [], [], [], []
+    for lengths in row_length_u:
+        s = _sites_along(lengths[-1], period, margin, closed_u)
+        sites_s.append(s)
+        sites_u.append(np.interp(s, lengths, u))
+        counts.append(len(s))
+        steps.append(s[1]-s[0] if len(s) > 1 else period)
+    counts = np.array(counts, dtype=np.int64)
+    row_start = np.concatenate(([0], np.cumsum(counts)))
+    return UVLattice(
+        u=np.concatenate(sites_u) if sites_u else np.zeros(0),
+        v=np.repeat(row_v, counts),
+        s=np.concatenate(sites_s) if sites_s else np.zeros(0),
+        t=np.repeat(row_t, counts),
+        row_start=row_start,
+        row_step=np.array(steps, dtype=float),
+        row_length=row_length_u[:, -1].copy(),
+        row_t=row_t,
+        period=float(period),
+        closed_u=closed_u,
+        closed_v=closed_v,
+        length_v=float(mean_length_v[-1]),
+    )
+
+
+def _sites_along(length: float, period: float, margin: float, closed: bool) -> np.ndarray:
+    """Arc length positions of the sites along a line of the given length."""
+    if closed:
+        count = max(int(np.floor(length/period+1e-9)), 1) if length > 0 else 0
+        return np.arange(count)*(length/max(count, 1))
+    usable = length-2*margin*period
+    if usable < -1e-9*period:
+        return np.zeros(0)
+    count = int(np.floor(max(usable, 0)/period+1e-9))+1
+    return (length-(count-1)*period)/2+np.arange(count)*period
+
+
+def placement_frames(points, normals, derivatives_u) -> Placements:
+    """Returns the frames of instances at the given surface points, with x along the u direction of the surface.
+
+    Arguments:
+    points, normals -- Surface points and unit normals of the sites, shape (n, 3).
+    derivatives_u -- First derivatives of the surface by u at the sites. Where they vanish or are parallel
+                     to the normal, e.g. at a pole, any direction perpendicular to the normal is used.
+    """
+    points, normals, derivatives_u = (np.asarray(value, dtype=float).reshape(-1, 3) for value in (points, normals, derivatives_u))
+    normals = normals/np.linalg.norm(normals, axis=-1, keepdims=True)
+    x = derivatives_u-np.sum(derivatives_u*normals, axis=-1, keepdims=True)*normals
+    length = np.linalg.norm(x, axis=-1)
+    degenerate = length < 1e-12*np.maximum(np.linalg.norm(derivatives_u, axis=-1), 1.0)
+    if degenerate.any():
+        # The axis least aligned with the normal gives a well conditioned perpendicular.
+        axis = np.eye(3)[np.argmin(np.abs(normals[degenerate]), axis=-1)]
+        x[degenerate] = np.cross(normals[degenerate], axis)
+        length[degenerate] = np.linalg.norm(x[degenerate], axis=-1)
+    x /= length[:, None]
+    return Placements(points, x, np.cross(normals, x), normals)
+
+
+def lattice_depth(texture_type: str, lattice: UVLattice, s, t, depth: float, width: float, flank_angle: float) -> np.ndarray:
+    """Returns the depth of the texture below the surface at the unrolled coordinates (s, t).
+
+    Every point looks at the nearest row and the nearest site of that row only, like texture_depth.
+    Points beyond the end of their row lie outside of the face and have depth zero.
+    """
+    if texture_type not in TEXTURE_TYPES:
+        raise ValueError(f'Unknown texture type: {texture_type}')
+    s, t = np.broadcast_arrays(np.asarray(s, dtype=float), np.asarray(t, dtype=float))
+    counts = lattice.row_count
+    if not len(counts):
+        return np.zeros(s.shape)
+
+    row = np.rint(np.interp(t, lattice.row_t, np.arange(len(counts)))).astype(np.intp)
+    distance_t = np.abs(t-lattice.row_t[row])
+    if lattice.closed_v and len(counts) > 1:
+        # The first and the last row are neighbours across the seam.
+        distance_t = np.minimum(distance_t, lattice.length_v-distance_t)
+
+    count, step = counts[row], lattice.row_step[row]
+    first = lattice.s[np.minimum(lattice.row_start[row], max(lattice.count-1, 0))] if lattice.count else np.zeros(s.shape)
+    index = np.rint((s-first)/step)
+    if not lattice.closed_u:
+        index = np.clip(index, 0, np.maximum(count-1, 0))
+    # With a closed u the index is not wrapped, so the distance across the seam stays short.
+    distance_s = np.abs(s-first-index*step)
+
+    match texture_type:
+        case 'Dots':
+            result = profile_depth(np.hypot(distance_s, distance_t), depth, width, flank_angle)
+        case 'Lines':
+            result = profile_depth(distance_s, depth, width, flank_angle)
+        case 'Hatch':
+            result = np.maximum(profile_depth(distance_s, depth, width, flank_angle),
+                                profile_depth(distance_t, depth, width, flank_angle))
+    outside = (count == 0) | (s < 0) | (s > lattice.row_length[row]) | (t < 0) | (t > lattice.length_v)
+    return np.where(outside, 0.0, result)
+
+
+def rasterize_lattice(texture_type: str, lattice: UVLattice, depth: float, width: float, flank_angle: float,
+                      pixel_size: float, depth_scale: float = None, out: np.ndarray = None,
+                      band_rows: int = 256) -> np.ndarray:
+    """Renders the depth map of a texture laid out on a face into a uint16 image, like heightmap.rasterize.
+
+    The image covers s from 0 to the longest row and t from 0 to the arc length of the face along v.
+    Rows of pixels run along +t.
+
+    Arguments:
+    texture_type -- One of 'Dots', 'Lines' or 'Hatch'.
+    lattice -- Result of uv_lattice.
+    depth, width, flank_angle -- Texture parameters, the period is the one of the lattice.
+    pixel_size -- Edge length of a pixel.
+    depth_scale -- Depth of one gray level. Defaults to depth/65535.
+    out -- Optional uint16 array of the image shape to render into, e.g. a memory map.
+    band_rows -- Number of rows evaluated at once.
+    """
+    if not compute_profile(depth, width, flank_angle, lattice.period).feasible:
+        raise ValueError('The texture parameters do not describe a valid groove profile.')
+    size = (float(lattice.row_length.max(initial=0.0)), lattice.length_v)
+    rows, columns = image_shape(size, pixel_size)
+    if out is None:
+        out = np.empty((rows, columns), dtype=np.uint16)
+    elif out.shape != (rows, columns):
+        raise ValueError(f'out has shape {out.shape}, expected {(rows, columns)}.')
+    scale = 1/(depth_scale or depth/MAX_GRAY)
+
+    s = (np.arange(columns)+0.5)*pixel_size
+    t = (np.arange(rows)+0.5)*pixel_size
+    for start in range(0, rows, band_rows):
+        stop = min(start+band_rows, rows)
+        gray = np.rint(lattice_depth(texture_type, lattice, s[None, :], t[start:stop, None], depth, width, flank_angle)*scale)
+        out[start:stop] = np.clip(gray, 0, MAX_GRAY, out=gray)
+    return out
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# surfacetexture does not import adsk, so it is tested as a top level package like scripts use it.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib'))
@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+import pytest
+
+from surfacetexture import groove_profile
+
+# (depth, width, flank_angle) of profiles the dialog accepts, including vertical flanks.
+PROFILES = [
+    (0.1, 0.1, math.radians(20)),
+    (0.05, 0.2, math.radians(45)),
+    (0.3, 0.4, 0.0),
+    (0.06, 0.5, math.radians(70)),
+    (0.1, 0.2, math.radians(30)),
+]
+
+
+def original_radius(depth, width, flank_angle):
+    """calculate_radius of the command dialog before the profile moved into surfacetexture."""
+    return (width*math.cos(flank_angle)/2-depth*math.sin(flank_angle))/(1-math.sin(flank_angle))
+
+
+def original_tangent_point(depth, width, flank_angle):
+    """point_arc_X and point_arc_Y of create_sketch."""
+    radius = original_radius(depth, width, flank_angle)
+    return radius*math.cos(flank_angle), depth-radius+radius*math.sin(flank_angle)
+
+
+@pytest.mark.parametrize('depth, width, flank_angle', PROFILES)
+def test_radius_and_tangent_points_match_create_sketch(depth, width, flank_angle):
+    assert groove_profile.calculate_radius(depth, width, flank_angle) == pytest.approx(
+        original_radius(depth, width, flank_angle), rel=1e-12)
+    tangent_x, tangent_z = groove_profile.tangent_points(depth, width, flank_angle)
+    assert (tangent_x, tangent_z) == pytest.approx(original_tangent_point(depth, width, flank_angle), rel=1e-12)
+
+
+@pytest.mark.parametrize('depth, width, flank_angle', PROFILES)
+def test_sketch_is_tangent_and_closed(depth, width, flank_angle):
+    radius = original_radius(depth, width, flank_angle)
+    tangent_x, tangent_z = original_tangent_point(depth, width, flank_angle)
+    # The tangent point lies on the arc around (0, depth-radius) ...
+    assert math.hypot(tangent_x, tangent_z-(depth-radius)) == pytest.approx(radius)
+    # ... and on the flank through (width/2, 0) inclined by the flank angle against the vertical.
+    assert (width/2-tangent_x)/tangent_z == pytest.approx(math.tan(flank_angle), abs=1e-12)
+    # The radius to the tangent point is perpendicular to the flank.
+    assert tangent_x*math.sin(flank_angle)-(tangent_z-depth+radius)*math.cos(flank_angle) == pytest.approx(0, abs=1e-12)
+
+
+@pytest.mark.parametrize('depth, width, flank_angle', PROFILES)
+def test_profile_depth_follows_sketch(depth, width, flank_angle):
+    radius = original_radius(depth, width, flank_angle)
+    tangent_x, tangent_z = original_tangent_point(depth, width, flank_angle)
+    x = np.linspace(-width, width, 2001)
+    z = groove_profile.profile_depth(x, depth, width, flank_angle)
+
+    expected = []
+    for value in np.abs(x):
+        if value <= tangent_x:
+            expected.append(depth-radius+math.sqrt(radius**2-value**2))
+        elif value < width/2:
+            expected.append(tangent_z*(width/2-value)/(width/2-tangent_x))
+        else:
+            expected.append(0.0)
+    np.testing.assert_allclose(z, expected, rtol=1e-12, atol=1e-15)
+    assert groove_profile.profile_depth(0.0, depth, width, flank_angle) == pytest.approx(depth)
+    assert groove_profile.profile_depth(tangent_x, depth, width, flank_angle) == pytest.approx(tangent_z)
+
+
+# A vertical flank has every depth at half the width, so profile_depth cannot be inverted there.
+@pytest.mark.parametrize('depth, width, flank_angle', [profile for profile in PROFILES if profile[2] > 0])
+def test_profile_half_width_inverts_profile_depth(depth, width, flank_angle):
+    z = np.linspace(0, depth, 101)[1:-1]
+    half_width = groove_profile.profile_half_width(z, depth, width, flank_angle)
+    np.testing.assert_allclose(groove_profile.profile_depth(half_width, depth, width, flank_angle), z, rtol=1e-9)
+
+
+@pytest.mark.parametrize('depth, width, flank_angle', PROFILES)
+def test_profile_samples_keep_tolerance(depth, width, flank_angle):
+    tolerance = 1e-4
+    x, z = groove_profile.profile_samples(depth, width, flank_angle, tolerance)
+    assert x[0] == 0 and x[-1] == pytest.approx(width/2)
+    assert np.all(np.diff(x) > 0)
+    np.testing.assert_allclose(z, groove_profile.profile_depth(x, depth, width, flank_angle))
+    # The midpoints of the chords of the arc stay within the tolerance of the arc.
+    radius = original_radius(depth, width, flank_angle)
+    tangent_x, _ = original_tangent_point(depth, width, flank_angle)
+    on_arc = x <= tangent_x*(1+1e-9)
+    arc_x, arc_z = x[on_arc], z[on_arc]
+    sagitta = radius-np.hypot((arc_x[1:]+arc_x[:-1])/2, (arc_z[1:]+arc_z[:-1])/2-(depth-radius))
+    assert np.all(sagitta <= tolerance*(1+1e-9))
+
+
+def test_feasibility_matches_positive_radius():
+    depth, width, flank_angle = np.meshgrid(np.linspace(0.01, 0.5, 40), np.linspace(0.01, 0.5, 40),
+                                            np.radians(np.linspace(0, 80, 17)), indexing='ij')
+    profile = groove_profile.compute_profile(depth, width, flank_angle, 1.0)
+    radius = np.vectorize(original_radius)(depth, width, flank_angle)
+    _, tangent_z = np.vectorize(original_tangent_point)(depth, width, flank_angle)
+    # A profile exists if the arc has a radius and the tangent point lies below the top.
+    drawable = (radius > 0) & (tangent_z > 0)
+    margin = np.minimum(np.abs(depth-profile.depth_min), np.abs(depth-profile.depth_max)) > 1e-9
+    np.testing.assert_array_equal(profile.feasible[margin], drawable[margin])
+    np.testing.assert_allclose(profile.radius, radius, rtol=1e-12)
+
+
+@pytest.mark.parametrize('depth, width, flank_angle', PROFILES)
+def test_limits_are_consistent(depth, width, flank_angle):
+    depth_min, depth_max = groove_profile.depth_limits(width, flank_angle)
+    width_min, width_max = groove_profile.width_limits(depth, flank_angle)
+    flank_angle_min, flank_angle_max = groove_profile.flank_angle_limits(depth, width)
+    assert depth_min < depth < depth_max
+    assert width_min < width < width_max
+    assert flank_angle_min <= flank_angle < flank_angle_max
+    # The tangent point reaches the top at the minimum depth and the radius vanishes at the maximum.
+    assert original_tangent_point(float(depth_min), width, flank_angle)[1] == pytest.approx(0, abs=1e-12)
+    if flank_angle > 0:
+        assert original_radius(float(depth_max), width, flank_angle) == pytest.approx(0, abs=1e-12)
@@ -0,0 +1,72 @@
+import math
+import zlib
+
+import numpy as np
+import pytest
+
+from surfacetexture import heightmap
+from surfacetexture.parameter_field import read_grayscale
+
+PARAMETERS = (0.1, 0.2, math.radians(20), 0.3)
+
+
+@pytest.mark.parametrize('texture_type', heightmap.TEXTURE_TYPES)
+def test_rasterize_matches_texture_depth(texture_type):
+    pixel_size = 0.004
+    origin = (-0.05, 0.02)
+    image = heightmap.rasterize(texture_type, *PARAMETERS, (0.7, 0.5), pixel_size, origin)
+    rows, columns = image.shape
+    assert (rows, columns) == heightmap.image_shape((0.7, 0.5), pixel_size)
+    x = origin[0]+(np.arange(columns)+0.5)*pixel_size
+    y = origin[1]+(np.arange(rows)+0.5)*pixel_size
+    depth = heightmap.texture_depth(texture_type, x[None, :], y[:, None], *PARAMETERS)
+    # Lines and Hatch are evaluated in float32 and Dots through a lookup table, both within a gray level.
+    np.testing.assert_allclose(image*(PARAMETERS[0]/heightmap.MAX_GRAY), depth, atol=1.5*PARAMETERS[0]/heightmap.MAX_GRAY)
+
+
+@pytest.mark.parametrize('extension', ['.png', '.npy', '.raw'])
+def test_write_heightmap_round_trip(tmp_path, extension):
+    image = heightmap.rasterize('Dots', *PARAMETERS, (0.9, 0.6), 0.005)
+    path = str(tmp_path/f'map{extension}')
+    heightmap.write_heightmap(path, image, 0.005, PARAMETERS[0]/heightmap.MAX_GRAY)
+    if extension == '.raw':
+        read = np.fromfile(path, dtype='<u2').reshape(image.shape)
+    else:
+        read = read_grayscale(path)
+    assert read.dtype == np.uint16
+    np.testing.assert_array_equal(read, image)
+
+
+def test_png_carries_pixel_size_and_depth_scale(tmp_path):
+    path = str(tmp_path/'map.png')
+    heightmap.write_heightmap(path, np.zeros((3, 4), dtype=np.uint16), 0.005, 2e-6)
+    with open(path, 'rb') as file:
+        data = file.read()
+    assert b'tEXtpixel_size\x000.005' in data and b'tEXtdepth_scale\x002e-06' in data
+    # Every chunk carries the CRC of its type and data.
+    position = 8
+    while position < len(data):
+        length = int.from_bytes(data[position:position+4], 'big')
+        chunk = data[position+4:position+8+length]
+        assert int.from_bytes(data[position+8+length:position+12+length], 'big') == zlib.crc32(chunk)
+        position += 12+length
+
+
+def test_large_png_is_split_into_chunks(tmp_path):
+    rng = np.random.default_rng(2)
+    # Noise does not compress, so the 1.6 MB of samples are written in more than one chunk.
+    image = rng.integers(0, heightmap.MAX_GRAY+1, (800, 1000)).astype(np.uint16)
+    path = str(tmp_path/'noise.png')
+    heightmap.write_png(path, image, compression=1)
+    with open(path, 'rb') as file:
+        assert file.read().count(b'IDAT') > 1
+    np.testing.assert_array_equal(read_grayscale(path), image)
+
+
+def test_unsupported_heightmaps(tmp_path):
+    with pytest.raises(ValueError):
+        heightmap.write_heightmap(str(tmp_path/'map.jpg'), np.zeros((2, 2), dtype=np.uint16), 0.1, 0.1)
+    with pytest.raises(ValueError):
+        heightmap.write_png(str(tmp_path/'map.png'), np.zeros((2, 2), dtype=np.uint8))
+    with pytest.raises(ValueError):
+        heightmap.rasterize('Dots', 0.5, 0.2, math.radians(20), 0.3, (1, 1), 0.1)
@@ -0,0 +1,118 @@
+import collections
+import math
+import struct
+import xml.etree.ElementTree as ElementTree
+import zipfile
+
+import numpy as np
+import pytest
+
+from surfacetexture import groove_profile, mesh
+from surfacetexture.parameter_field import LinearField, graded_mesh, site_parameters
+
+PARAMETERS = (0.1, 0.2, math.radians(20), 0.3)
+NAMESPACE = '{http://schemas.microsoft.com/3dmanufacturing/core/2015/02}'
+
+
+def read_stl(path):
+    with open(path, 'rb') as file:
+        file.read(80)
+        count, = struct.unpack('<I', file.read(4))
+        facets = np.frombuffer(file.read(), dtype=mesh._STL_FACET)
+    assert len(facets) == count
+    return facets
+
+
+def read_3mf(path):
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read('3D/3dmodel.model'))
+        assert '3D/3dmodel.model' in archive.read('_rels/.rels').decode()
+    assert root.get('unit') == 'millimeter'
+    vertices = np.array([[float(vertex.get(axis)) for axis in 'xyz'] for vertex in root.iter(NAMESPACE+'vertex')])
+    triangles = np.array([[int(triangle.get(name)) for name in ('v1', 'v2', 'v3')]
+                          for triangle in root.iter(NAMESPACE+'triangle')])
+    return vertices, triangles
+
+
+def edge_uses(triangles):
+    """Number of triangles sharing every undirected edge and the directed edges, to check orientation."""
+    directed = np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]])
+    return collections.Counter(map(tuple, np.sort(directed, axis=1))), collections.Counter(map(tuple, directed))
+
+
+@pytest.fixture(params=['Dots', 'Lines', 'Hatch'])
+def closed_patch(request):
+    return mesh.patch_mesh(request.param, *PARAMETERS, 3, 2, tolerance=1e-3, thickness=0.5)
+
+
+def test_stl_round_trip(tmp_path, closed_patch):
+    path = str(tmp_path/'patch.stl')
+    mesh.write_mesh(path, closed_patch)
+    facets = read_stl(path)
+    vertices, triangles = closed_patch.arrays()
+    assert len(facets) == closed_patch.triangle_count == len(triangles)
+    np.testing.assert_allclose(facets['vertices'], (vertices[triangles]*10).astype(np.float32), atol=1e-5)
+    normals = np.cross(facets['vertices'][:, 1]-facets['vertices'][:, 0], facets['vertices'][:, 2]-facets['vertices'][:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    assert np.all(lengths > 0)
+    np.testing.assert_allclose(facets['normal'], normals/lengths[:, None], atol=1e-4)
+
+
+def test_3mf_round_trip(tmp_path, closed_patch):
+    path = str(tmp_path/'patch.3mf')
+    mesh.write_mesh(path, closed_patch)
+    vertices, triangles = read_3mf(path)
+    expected_vertices, expected_triangles = closed_patch.arrays()
+    assert len(vertices) == closed_patch.vertex_count
+    np.testing.assert_allclose(vertices, expected_vertices*10, atol=0.5e-4+1e-9)
+    np.testing.assert_array_equal(triangles, expected_triangles)
+
+
+def test_closed_patch_is_watertight(closed_patch):
+    vertices, triangles = closed_patch.arrays()
+    undirected, directed = edge_uses(triangles)
+    assert set(undirected.values()) == {2}
+    # Consistently oriented: every edge is used once in each direction.
+    assert set(directed.values()) == {1}
+    # The signed volume is that of the slab less the grooves, so the normals point outwards.
+    corners = vertices[triangles]
+    volume = np.einsum('ij,ij->i', corners[:, 0], np.cross(corners[:, 1], corners[:, 2])).sum()/6
+    low, high = closed_patch.bounds
+    assert 0 < volume < np.prod(high-low)
+
+
+def test_patch_surface_follows_profile():
+    patch = mesh.patch_mesh('Dots', *PARAMETERS, 2, 2, tolerance=1e-4)
+    vertices, _ = patch.arrays()
+    period = PARAMETERS[3]
+    distance = np.hypot(*(vertices[:, :2]-period*np.rint(vertices[:, :2]/period)).T)
+    np.testing.assert_allclose(-vertices[:, 2], groove_profile.profile_depth(distance, *PARAMETERS[:3]), atol=1e-12)
+
+
+def test_heightfield_round_trip(tmp_path):
+    sites = site_parameters(0.1, LinearField(0.15, (0.05, 0.0), low=0.12, high=0.2), math.radians(20), 0.3, 3, 2)
+    heightfield = graded_mesh('Lines', sites, spacing=0.01, thickness=0.3)
+    path = str(tmp_path/'graded.3mf')
+    mesh.write_mesh(path, heightfield)
+    vertices, triangles = read_3mf(path)
+    expected_vertices, expected_triangles = heightfield.arrays()
+    np.testing.assert_allclose(vertices, expected_vertices*10, atol=0.5e-4+1e-9)
+    np.testing.assert_array_equal(triangles, expected_triangles)
+    assert set(edge_uses(triangles)[0].values()) == {2}
+
+
+def test_blocks_do_not_change_the_mesh(tmp_path, monkeypatch, closed_patch):
+    whole = str(tmp_path/'whole.stl')
+    mesh.write_stl(whole, closed_patch)
+    monkeypatch.setattr(mesh, 'BLOCK_SIZE', 100)
+    blocks = str(tmp_path/'blocks.stl')
+    mesh.write_stl(blocks, closed_patch)
+    with open(whole, 'rb') as first, open(blocks, 'rb') as second:
+        assert first.read() == second.read()
+
+
+def test_unsupported_meshes():
+    with pytest.raises(ValueError):
+        mesh.patch_mesh('Dots', 0.1, 0.4, math.radians(20), 0.3, 2, 2)
+    with pytest.raises(ValueError):
+        mesh.write_mesh('patch.obj', mesh.patch_mesh('Lines', *PARAMETERS, 1, 1))
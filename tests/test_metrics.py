@@ -0,0 +1,89 @@
+import functools
+import math
+
+import numpy as np
+import pytest
+
+from surfacetexture import metrics
+from surfacetexture.lattice import lattice_texture_depth, make_lattice
+
+# Pixels along each edge of the sampled area.
+SAMPLES = 1000
+
+TEXTURES = [
+    ('Dots', 'Square', 0.1, 0.15, math.radians(20), 0.3),
+    ('Lines', 'Square', 0.05, 0.2, math.radians(45), 0.25),
+    ('Hatch', 'Square', 0.1, 0.1, math.radians(20), 0.3),
+    ('Dots', 'Hexagonal', 0.1, 0.2, math.radians(30), 0.3),
+    ('Lines', 'Rectangular', 0.15, 0.2, 0.0, 0.35),
+    ('Hatch', 'Staggered', 0.08, 0.12, math.radians(10), 0.2),
+]
+
+
+@functools.lru_cache(maxsize=None)
+def sampled_depth(texture_type, lattice, depth, width, flank_angle):
+    """Depths at the pixel centers of one repeating unit in the middle of a patch, two rows high so the
+    shifted rows of staggered lattices are covered once.
+    """
+    fraction = (np.arange(SAMPLES)+0.5)/SAMPLES
+    x = (2+fraction)*lattice.period_x
+    y = (2+2*fraction)*lattice.period_y
+    return lattice_texture_depth(texture_type, lattice, 6, 6, x[None, :], y[:, None], depth, width, flank_angle).ravel()
+
+
+@pytest.fixture(params=TEXTURES, ids=lambda texture: f'{texture[0]}-{texture[1]}')
+def texture(request):
+    texture_type, lattice_type, depth, width, flank_angle, period = request.param
+    lattice = make_lattice(lattice_type, period, period*1.2)
+    samples = sampled_depth(texture_type, lattice, depth, width, flank_angle)
+    return texture_type, (depth, width, flank_angle, lattice), samples
+
+
+def test_height_parameters_match_samples(texture):
+    texture_type, parameters, samples = texture
+    result = metrics.texture_metrics(texture_type, *parameters)
+    mean = samples.mean()
+    heights = mean-samples
+    sq = np.sqrt(np.mean(heights**2))
+    assert result.volume_per_area == pytest.approx(mean, rel=2e-3)
+    assert result.volume_per_cell == pytest.approx(result.volume_per_area*result.cell_area)
+    assert result.land_ratio == pytest.approx(np.mean(samples == 0), abs=2e-3)
+    assert result.sa == pytest.approx(np.mean(np.abs(heights)), rel=2e-3)
+    assert result.sq == pytest.approx(sq, rel=2e-3)
+    assert result.ssk == pytest.approx(np.mean(heights**3)/sq**3, rel=5e-3, abs=2e-3)
+    assert result.sku == pytest.approx(np.mean(heights**4)/sq**4, rel=5e-3)
+    assert result.sp == pytest.approx(heights.max(), rel=2e-3)
+    assert result.sv == pytest.approx(-heights.min(), rel=2e-3)
+    assert result.sz == pytest.approx(np.ptp(heights), rel=1e-3)
+
+
+def test_bearing_curve_matches_sample_quantiles(texture):
+    texture_type, parameters, samples = texture
+    ratio = np.linspace(0.02, 0.98, 49)
+    bearing = metrics.bearing_curve(texture_type, ratio, *parameters)
+    # The depth at a material ratio is a quantile of the samples: less than that ratio of them is shallower
+    # and at least that ratio is not deeper. Checked this way, jumps of the quantiles do not matter.
+    assert np.all([np.mean(samples < value) for value in bearing] <= ratio+3e-3)
+    assert np.all([np.mean(samples <= value) for value in bearing] >= ratio-3e-3)
+    depth = parameters[0]
+    t = np.linspace(0, depth, 21)
+    np.testing.assert_allclose(metrics.material_ratio(texture_type, t[1:-1], *parameters),
+                               [np.mean(samples <= value) for value in t[1:-1]], atol=3e-3)
+
+
+def test_core_height_matches_sampled_secant(texture):
+    texture_type, parameters, samples = texture
+    result = metrics.texture_metrics(texture_type, *parameters)
+    # The flattest secant over 40 % of the material ratio, searched on the sorted samples.
+    ratio = np.linspace(0, 0.6, 601)
+    drops = np.quantile(samples, ratio+0.4)-np.quantile(samples, ratio)
+    assert result.sk == pytest.approx(drops.min()/0.4, rel=2e-2, abs=1e-3*parameters[0])
+
+
+def test_overlapping_and_infeasible_textures_are_nan():
+    lattice = make_lattice('Square', 0.1)
+    # Wider than the period, a valid texture and deeper than the flanks allow.
+    result = metrics.texture_metrics('Dots', [0.05, 0.05, 0.2], [0.15, 0.08, 0.08], math.radians(20), lattice)
+    np.testing.assert_array_equal(np.isnan(result.sa), [True, False, True])
+    with pytest.raises(ValueError):
+        metrics.texture_metrics('Waves', 0.1, 0.1, 0.3, lattice)
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from surfacetexture import overlap_check
+from surfacetexture.lattice import lattice_sites, make_lattice, nearest_land_width
+
+
+def brute_force(sites, radius):
+    """Land of all pairs, compared one by one."""
+    count = len(sites)
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), (count,))
+    a, b = np.triu_indices(count, 1)
+    land = np.linalg.norm(sites[a]-sites[b], axis=1)-radius[a]-radius[b]
+    return a, b, land
+
+
+def assert_matches_brute_force(sites, radius, min_land, max_pairs=1000):
+    report = overlap_check.check_overlaps(sites, radius, min_land, max_pairs)
+    a, b, land = brute_force(sites, radius)
+    violating = land < min_land
+    assert report.violations == violating.sum()
+    assert report.overlaps == (land < 0).sum()
+    assert report.ok == (not violating.any())
+    # Pairs beyond the reach of the check are not measured, but the smallest land is always a violation.
+    if violating.any():
+        assert report.min_land_width == pytest.approx(land.min())
+    worst = np.argsort(land[violating], kind='stable')[:max_pairs]
+    np.testing.assert_allclose(report.land, land[violating][worst])
+    # Pairs of equal land may come in any order.
+    found = {tuple(pair) for pair in report.pairs}
+    expected = {(a[k], b[k]) for k in np.flatnonzero(violating)}
+    assert found <= expected and len(found) == min(violating.sum(), max_pairs)
+    return report
+
+
+@pytest.mark.parametrize('dimensions', [2, 3])
+@pytest.mark.parametrize('seed', range(5))
+def test_random_sites(dimensions, seed):
+    rng = np.random.default_rng(seed)
+    sites = rng.uniform(0, 10, (300, dimensions))
+    radius = rng.uniform(0.05, 0.4, 300)
+    assert_matches_brute_force(sites, radius, min_land=0.1)
+
+
+def test_uniform_radius_and_negative_min_land():
+    rng = np.random.default_rng(7)
+    sites = rng.uniform(0, 5, (200, 2))
+    assert_matches_brute_force(sites, 0.2, min_land=-0.1)
+
+
+def test_max_pairs_keeps_the_worst():
+    rng = np.random.default_rng(3)
+    sites = rng.uniform(0, 3, (200, 2))
+    report = assert_matches_brute_force(sites, 0.3, min_land=0.0, max_pairs=10)
+    assert len(report.pairs) == 10 and report.violations > 10
+
+
+def test_sparse_grid():
+    # A few clusters far apart leave most grid cells empty, so the cells are looked up by binary search.
+    rng = np.random.default_rng(11)
+    centers = rng.uniform(0, 1000, (20, 2))
+    sites = np.concatenate([center+rng.uniform(0, 1, (10, 2)) for center in centers])
+    assert_matches_brute_force(sites, 0.1, min_land=0.05)
+
+
+def test_blocks(monkeypatch):
+    monkeypatch.setattr(overlap_check, 'PAIR_BLOCK_SIZE', 7)
+    rng = np.random.default_rng(5)
+    sites = rng.uniform(0, 4, (150, 2))
+    assert_matches_brute_force(sites, rng.uniform(0.05, 0.2, 150), min_land=0.1)
+
+
+def test_lattice_land_matches_nearest_land_width():
+    lattice = make_lattice('Hexagonal', 0.3)
+    x, y = lattice_sites(lattice, 12, 9)
+    width = 0.25
+    report = overlap_check.check_overlaps(np.column_stack((x, y)), width/2)
+    assert report.ok
+    assert report.min_land_width == pytest.approx(nearest_land_width('Dots', lattice, width))
+
+
+def test_fewer_than_two_sites():
+    report = overlap_check.check_overlaps(np.zeros((1, 2)), 1.0)
+    assert report.ok and report.min_land_width == np.inf and report.pairs.shape == (0, 2)
+    with pytest.raises(ValueError):
+        overlap_check.check_overlaps(np.zeros((4, 4)), 1.0)
@@ -0,0 +1,133 @@
+import math
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from surfacetexture import parameter_field
+from surfacetexture.groove_profile import compute_profile
+from surfacetexture.parameter_field import ImageField, LinearField, RadialField, read_grayscale
+
+NONE, SUB, UP, AVERAGE, PAETH = range(5)
+
+
+def paeth_predictor(left, up, upper_left):
+    estimate = left+up-upper_left
+    distances = abs(estimate-left), abs(estimate-up), abs(estimate-upper_left)
+    return (left, up, upper_left)[distances.index(min(distances))]
+
+
+def write_filtered_png(path, image, filters, color_type=0, interlace=0):
+    """Writes a grayscale PNG whose rows use the given filter types, as the PNG specification defines them."""
+    bit_depth = 16 if image.dtype == np.uint16 else 8
+    step = bit_depth//8
+    data = image.astype(f'>u{step}').view(np.uint8).reshape(image.shape[0], -1).astype(int)
+    rows, stride = data.shape
+    filtered = bytearray()
+    for row in range(rows):
+        filtered.append(filters[row])
+        for k in range(stride):
+            left = data[row, k-step] if k >= step else 0
+            up = data[row-1, k] if row else 0
+            upper_left = data[row-1, k-step] if row and k >= step else 0
+            predictors = (0, left, up, (left+up)//2, paeth_predictor(left, up, upper_left))
+            # Unknown filter types are written unfiltered, for the error of the reader.
+            predictor = predictors[filters[row]] if filters[row] < len(predictors) else 0
+            filtered.append((data[row, k]-predictor) % 256)
+
+    def chunk(chunk_type, payload):
+        return struct.pack('>I', len(payload))+chunk_type+payload+struct.pack('>I', zlib.crc32(chunk_type+payload))
+
+    header = struct.pack('>IIBBBBB', image.shape[1], image.shape[0], bit_depth, color_type, 0, 0, interlace)
+    compressed = zlib.compress(bytes(filtered))
+    with open(path, 'wb') as file:
+        file.write(b'\x89PNG\r\n\x1a\n'+chunk(b'IHDR', header))
+        # Image data split over several chunks, like large files are.
+        middle = len(compressed)//2
+        file.write(chunk(b'IDAT', compressed[:middle])+chunk(b'IDAT', compressed[middle:])+chunk(b'IEND', b''))
+
+
+@pytest.mark.parametrize('dtype', [np.uint8, np.uint16])
+@pytest.mark.parametrize('shape', [(1, 1), (1, 9), (7, 1), (13, 29)])
+@pytest.mark.parametrize('filters', ['none', 'sub-up', 'average', 'paeth', 'mixed'])
+def test_read_grayscale_reverses_all_filters(tmp_path, dtype, shape, filters):
+    rng = np.random.default_rng(sum(shape))
+    image = rng.integers(0, np.iinfo(dtype).max+1, shape).astype(dtype)
+    choices = {'none': [NONE], 'sub-up': [SUB, UP], 'average': [AVERAGE], 'paeth': [PAETH],
+               'mixed': [NONE, SUB, UP, AVERAGE, PAETH]}[filters]
+    path = str(tmp_path/'map.png')
+    write_filtered_png(path, image, rng.choice(choices, shape[0]))
+    read = read_grayscale(path)
+    assert read.dtype == dtype
+    np.testing.assert_array_equal(read, image)
+
+
+def test_read_grayscale_of_smooth_map(tmp_path):
+    # Smooth maps are where encoders pick Average and Paeth.
+    y, x = np.mgrid[0:40, 0:50]
+    image = (32767.5*(1+np.sin(x/7)*np.cos(y/5))).astype(np.uint16)
+    path = str(tmp_path/'smooth.png')
+    write_filtered_png(path, image, [PAETH, AVERAGE]*20)
+    np.testing.assert_array_equal(read_grayscale(path), image)
+
+
+def test_unsupported_pngs(tmp_path):
+    image = np.zeros((2, 3), dtype=np.uint8)
+    path = str(tmp_path/'map.png')
+    write_filtered_png(path, image, [NONE, 5])
+    with pytest.raises(ValueError, match='filter'):
+        read_grayscale(path)
+    write_filtered_png(path, image, [NONE, NONE], color_type=2)
+    with pytest.raises(ValueError, match='grayscale'):
+        read_grayscale(path)
+    write_filtered_png(path, image, [NONE, NONE], interlace=1)
+    with pytest.raises(ValueError):
+        read_grayscale(path)
+    (tmp_path/'text.png').write_bytes(b'not a png')
+    with pytest.raises(ValueError):
+        read_grayscale(str(tmp_path/'text.png'))
+    with pytest.raises(ValueError):
+        read_grayscale(str(tmp_path/'map.bmp'))
+
+
+def test_npy_maps(tmp_path):
+    image = np.arange(12, dtype=np.uint16).reshape(3, 4)*5000
+    path = str(tmp_path/'map.npy')
+    np.save(path, image)
+    np.testing.assert_array_equal(read_grayscale(path), image)
+    field = parameter_field.image_field(path, 0.1, 0.3, (0.4, 0.3))
+    assert field.image.max() == pytest.approx(55000/65535)
+
+
+def test_fields():
+    linear = LinearField(1.0, (2.0, -1.0), (0.5, 0.0), low=0.0, high=2.5)
+    np.testing.assert_allclose(linear(np.array([0.5, 1.0, 2.0, 0.5]), np.array([0.0, 0.0, 0.0, 2.0])), [1, 2, 2.5, 0])
+    radial = RadialField(1.0, 3.0, 2.0, (1.0, 1.0))
+    np.testing.assert_allclose(radial(np.array([1.0, 2.0, 9.0]), 1.0), [1, 2, 3])
+    # Pixel centers of a 2 by 2 image lie at a quarter and three quarters of the size.
+    image = ImageField(np.array([[0.0, 1.0], [0.5, 0.5]]), 10.0, 20.0, (2.0, 2.0))
+    np.testing.assert_allclose(image(np.array([0.5, 1.5, 1.0, 0.0]), np.array([0.5, 0.5, 0.5, 3.0])), [10, 20, 15, 15])
+
+
+def test_site_parameters_sample_the_fields():
+    period = 0.3
+    width = LinearField(0.1, (0.1, 0.0))
+    sites = parameter_field.site_parameters(0.06, width, math.radians(20), period, 4, 3)
+    expected_width = np.broadcast_to(0.1+0.1*np.arange(4)*period, (3, 4))
+    np.testing.assert_allclose(sites.width, expected_width)
+    profile = compute_profile(0.06, expected_width, math.radians(20), period)
+    np.testing.assert_allclose(sites.radius, profile.radius)
+    np.testing.assert_array_equal(sites.feasible, profile.feasible)
+    assert not sites.repaired.any()
+
+
+def test_repair_moves_infeasible_depths_into_the_limits():
+    depth = LinearField(0.02, (0.1, 0.0))
+    sites = parameter_field.site_parameters(depth, 0.1, math.radians(20), 0.3, 5, 1, repair=True)
+    given = depth(np.arange(5)*0.3, 0.0)
+    feasible = compute_profile(given, 0.1, math.radians(20), 0.3).feasible
+    assert feasible.any() and not feasible.all()
+    assert sites.feasible.all()
+    np.testing.assert_array_equal(sites.repaired[0], ~feasible)
+    np.testing.assert_allclose(sites.depth[0, feasible], given[feasible])
@@ -0,0 +1,141 @@
+import json
+import math
+import os
+
+import numpy as np
+import pytest
+
+from surfacetexture import heightmap, tiled_export
+
+PARAMETERS = ('Hatch', 0.1, 0.2, math.radians(20), 0.3)
+SIZE = (1.0, 0.7)
+PIXEL_SIZE = 0.01
+TILE_SIZE = 16
+
+
+class Interrupted(Exception):
+    pass
+
+
+def read_output(path, shape):
+    """Reads the samples of an exported file back into an image."""
+    kind = tiled_export._format_of(path)
+    layout = tiled_export._layout(path, kind, shape, TILE_SIZE)
+    memmap = layout.open_memmap(path, 'r')
+    image = np.empty(shape, dtype=np.uint16)
+    rows, columns = layout.tile_grid
+    for tile_row in range(rows):
+        for tile_column in range(columns):
+            row, column = tile_row*TILE_SIZE, tile_column*TILE_SIZE
+            height, width = min(TILE_SIZE, shape[0]-row), min(TILE_SIZE, shape[1]-column)
+            image[row:row+height, column:column+width] = layout.tile_view(memmap, tile_row, tile_column, height, width)
+    del memmap
+    return image
+
+
+def export(path, **arguments):
+    return tiled_export.export_heightmap(path, *PARAMETERS, SIZE, PIXEL_SIZE, tile_size=TILE_SIZE, workers=1, **arguments)
+
+
+def interrupt_after(tiles):
+    def progress(done, total):
+        if done == tiles:
+            raise Interrupted
+    return progress
+
+
+@pytest.fixture(scope='module')
+def expected():
+    return heightmap.rasterize(*PARAMETERS, SIZE, PIXEL_SIZE)
+
+
+@pytest.mark.parametrize('extension', tiled_export.TILED_FORMATS)
+def test_export_matches_rasterize(tmp_path, expected, extension):
+    path = str(tmp_path/f'map{extension}')
+    result = export(path)
+    assert result.shape == expected.shape
+    assert result.tiles == result.rendered == 5*7 and result.resumed == 0
+    assert not os.path.exists(path+tiled_export.PROGRESS_SUFFIX)
+    np.testing.assert_array_equal(read_output(path, expected.shape), expected)
+    if extension == '.npy':
+        np.testing.assert_array_equal(np.load(path), expected)
+
+
+@pytest.mark.parametrize('extension', tiled_export.TILED_FORMATS)
+def test_interrupted_export_resumes(tmp_path, expected, extension):
+    path = str(tmp_path/f'map{extension}')
+    with pytest.raises(Interrupted):
+        export(path, progress=interrupt_after(12))
+    progress_path = path+tiled_export.PROGRESS_SUFFIX
+    with open(progress_path) as file:
+        assert len(json.load(file)['done']) == 12
+
+    calls = []
+    result = export(path, progress=lambda done, total: calls.append(done))
+    assert result.resumed == 12 and result.rendered == result.tiles-12
+    assert calls == list(range(13, result.tiles+1))
+    assert not os.path.exists(progress_path)
+    np.testing.assert_array_equal(read_output(path, expected.shape), expected)
+
+
+def test_resume_skips_finished_tiles(tmp_path, expected):
+    path = str(tmp_path/'map.raw')
+    with pytest.raises(Interrupted):
+        export(path, progress=interrupt_after(10))
+    # Tiles recorded as done are not rendered again, so marking a finished tile shows up in the output.
+    layout = tiled_export._layout(path, 'raw', expected.shape, TILE_SIZE)
+    memmap = layout.open_memmap(path)
+    layout.tile_view(memmap, 0, 0, TILE_SIZE, TILE_SIZE)[:] = 7
+    memmap.flush()
+    del memmap
+    export(path)
+    image = read_output(path, expected.shape)
+    assert np.all(image[:TILE_SIZE, :TILE_SIZE] == 7)
+    np.testing.assert_array_equal(image[TILE_SIZE:], expected[TILE_SIZE:])
+
+
+def test_changed_parameters_start_over(tmp_path):
+    path = str(tmp_path/'map.npy')
+    with pytest.raises(Interrupted):
+        export(path, progress=interrupt_after(10))
+    texture_type, depth, width, flank_angle, period = PARAMETERS
+    result = tiled_export.export_heightmap(path, texture_type, depth, width*0.9, flank_angle, period, SIZE, PIXEL_SIZE,
+                                           tile_size=TILE_SIZE, workers=1)
+    assert result.resumed == 0
+    np.testing.assert_array_equal(np.load(path), heightmap.rasterize(texture_type, depth, width*0.9, flank_angle,
+                                                                      period, SIZE, PIXEL_SIZE))
+
+
+def test_resume_false_starts_over(tmp_path):
+    path = str(tmp_path/'map.npy')
+    with pytest.raises(Interrupted):
+        export(path, progress=interrupt_after(10))
+    assert export(path, resume=False).resumed == 0
+
+
+def test_broken_sidecar_starts_over(tmp_path, expected):
+    path = str(tmp_path/'map.tif')
+    with pytest.raises(Interrupted):
+        export(path, progress=interrupt_after(10))
+    with open(path+tiled_export.PROGRESS_SUFFIX, 'w') as file:
+        file.write('{"parameters":')
+    result = export(path)
+    assert result.resumed == 0
+    np.testing.assert_array_equal(read_output(path, expected.shape), expected)
+
+
+def test_tiff_header(tmp_path, expected):
+    path = str(tmp_path/'map.tiff')
+    export(path)
+    with open(path, 'rb') as file:
+        header = file.read(16)
+    assert header[:4] == b'II+\x00'
+    with open(path, 'rb') as file:
+        assert b'"pixel_size": 0.01' in file.read(4096)
+
+
+def test_invalid_exports(tmp_path):
+    with pytest.raises(ValueError):
+        export(str(tmp_path/'map.png'))
+    with pytest.raises(ValueError):
+        tiled_export.export_heightmap(str(tmp_path/'map.npy'), *PARAMETERS, SIZE, PIXEL_SIZE, tile_size=20)